@@ -1,13 +1,22 @@
 import heapq
-import time
+
+import cli
+from coverage import CoverageRoute
+from gridmap import open_map
+from grid_search import UNREACHED, bfs_tree
+from renderers import AnsiRenderer, GridView
+from spatial_index import NearestCellIndex
+from world_state import WorldState
 
 class CleaningBot:
+    __slots__ = ("id", "pos", "color", "cleaned", "path")
+
     def __init__(self, bot_id, start_pos, color):
         self.id = bot_id
         self.pos = start_pos
         self.color = color
         self.cleaned = []
-        self.path = []
+        self.path = []  # rest of the route to the current target
     
     def a_star(self, start, goal, grid, occupied):
         def h(p1, p2):
@@ -43,103 +52,145 @@ class CleaningBot:
         
         return []
 
-def visualize(grid, bot1, bot2, step):
-    print("\n" * 2)
-    print(f"{'='*50}")
-    print(f"CLEANING BOTS COORDINATION - Step {step}")
-    print(f"{'='*50}\n")
+def clean(bot, grid, indexes):
+    if grid[bot.pos[0]][bot.pos[1]] == 1:
+        bot.cleaned.append(bot.pos)
+        grid[bot.pos[0]][bot.pos[1]] = 0
+        for index in indexes:
+            index.discard(bot.pos)
+
+def clean_step(bot, dirt, grid, indexes, obstacles=frozenset()):
+    # One move towards the nearest dirty cell in the bot's area; False once
+    # the area is clean. A target stays chosen until it is clean: around
+    # furniture the nearest cell by distance can flip back and forth as the
+    # bot moves, and re-picking every step would never reach either.
+    target = bot.path[-1] if bot.path and grid[bot.path[-1][0]][bot.path[-1][1]] == 1 else dirt.nearest(bot.pos)
+    if target is None:
+        return False
+    if bot.pos != target:
+        # Reuse the route while the target stays the same; a neighbouring
+        # target needs no search
+        if abs(target[0] - bot.pos[0]) + abs(target[1] - bot.pos[1]) == 1:
+            bot.path = [target]
+        elif not bot.path or bot.path[-1] != target:
+            bot.path = bot.a_star(bot.pos, target, grid, obstacles)
+        if not bot.path:
+            return True
+        bot.pos = bot.path.pop(0)
+    clean(bot, grid, indexes)
+    return True
+
+def sweep_step(bot, route, dirt, grid, indexes, blocked, obstacles=frozenset()):
+    # Coverage mode: clean the current cell or take the next move of the
+    # precomputed sweep; dirt the sweep had to skip is cleaned greedily after
+    if grid[bot.pos[0]][bot.pos[1]] != 1:
+        nxt = route.next(bot.pos, blocked)
+        if nxt is None:
+            return clean_step(bot, dirt, grid, indexes, obstacles)
+        bot.pos = nxt
+    clean(bot, grid, indexes)
+    return True
+
+def visualize(view, bot1, bot2, step, renderer):
+    if not renderer.active:
+        return
+    header = ["\n" * 2, f"{'='*50}", f"CLEANING BOTS COORDINATION - Step {step}", f"{'='*50}\n"]
     
-    for i in range(len(grid)):
-        row = ""
-        for j in range(len(grid[0])):
-            if (i, j) == bot1.pos:
-                row += "🤖 "
-            elif (i, j) == bot2.pos:
-                row += "🦾 "
-            elif (i, j) in bot1.cleaned:
-                row += "✨ "
-            elif (i, j) in bot2.cleaned:
-                row += "💎 "
-            elif grid[i][j] == 1:
-                row += "💩 "
-            else:
-                row += "⬜ "
-        print(row)
+    # Later layers win: cleaned cells, then the bots
+    overlay = {}
+    for pos in bot2.cleaned:
+        overlay[pos] = "💎 "
+    for pos in bot1.cleaned:
+        overlay[pos] = "✨ "
+    overlay[bot2.pos] = "🦾 "
+    overlay[bot1.pos] = "🤖 "
     
-    print(f"\n🤖 Bot 1 cleaned: {len(bot1.cleaned)} | 🦾 Bot 2 cleaned: {len(bot2.cleaned)}")
-    time.sleep(0.3)
+    footer = [f"\n🤖 Bot 1 cleaned: {len(bot1.cleaned)} | 🦾 Bot 2 cleaned: {len(bot2.cleaned)}"]
+    renderer.grid(view, header, overlay, footer, 0.3)
 
-def main():
-    grid = [
-        [1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1],
-        [1, 1, 1, 1, 1, 1, 1, 1],
-    ]
+def main(renderer=None, rows=6, cols=8, mode="greedy", obstacles=(), grid_map=None):
+    # mode="greedy" heads for the nearest dirty cell every step;
+    # mode="coverage" follows one boustrophedon sweep per bot planned up front.
+    # grid_map: a map file (gridmap.py) whose size, walls (as furniture) and
+    # "starts" replace rows, cols and the default starts
+    renderer = renderer or AnsiRenderer()
+    grid_map = open_map(grid_map)
+    starts = None
+    if grid_map:
+        rows, cols = grid_map.rows, grid_map.cols
+        walls = [divmod(i, cols) for i, v in enumerate(grid_map.cells) if v == 1]
+        obstacles = list(obstacles) + walls
+        starts = grid_map.get("starts")
+    # 1 = dirty, 2 = furniture; the rest of the floor starts dirty
+    grid = [[1] * cols for _ in range(rows)]
+    obstacles = frozenset(obstacles)
+    for r, c in obstacles:
+        grid[r][c] = 2
     
-    bot1 = CleaningBot(1, (0, 0), "blue")
-    bot2 = CleaningBot(2, (3, 0), "green")  
+    # Dirt only ever turns into a cleaned cell, so the start grid is the background
+    view = None
+    if renderer.active:
+        view = GridView([["💩 " if v == 1 else "🟫 " if v == 2 else "⬜ " for v in row] for row in grid], cell_width=3)
     
     mid_row = len(grid) // 2
-    bot1_area = [(i, j) for i in range(mid_row) for j in range(len(grid[0]))]
-    bot2_area = [(i, j) for i in range(mid_row, len(grid)) for j in range(len(grid[0]))]
+    starts = starts or [(0, 0), (mid_row, 0)]
+    bot1 = CleaningBot(1, starts[0], "blue")
+    bot2 = CleaningBot(2, starts[1], "green")
+    
+    # Each bot's half, less furniture and anything it can't get to
+    floor = WorldState(rows, cols)
+    for r, c in obstacles:
+        floor.passable[r * cols + c] = 0
+    reach1 = reach2 = floor.passable
+    if obstacles:
+        reach1 = bfs_tree(grid, [bot1.pos], passable=floor.passable)[0]
+        reach2 = reach1
+        if reach1[bot2.pos[0] * cols + bot2.pos[1]] == UNREACHED:
+            reach2 = bfs_tree(grid, [bot2.pos], passable=floor.passable)[0]
+    bot1_area = [(i, j) for i in range(mid_row) for j in range(cols)
+                 if grid[i][j] == 1 and reach1[i * cols + j] != UNREACHED]
+    bot2_area = [(i, j) for i in range(mid_row, rows) for j in range(cols)
+                 if grid[i][j] == 1 and reach2[i * cols + j] != UNREACHED]
+    
+    # Dirty cells left in each bot's half, for nearest-cell queries
+    bot1_dirt = NearestCellIndex(rows, cols, bot1_area)
+    bot2_dirt = NearestCellIndex(rows, cols, bot2_area)
+    indexes = (bot1_dirt, bot2_dirt)
+    
+    if mode == "coverage":
+        bot1_route = CoverageRoute(bot1.pos, bot1_area, floor.walkable)
+        bot2_route = CoverageRoute(bot2.pos, bot2_area, floor.walkable)
     
     step = 0
-    visualize(grid, bot1, bot2, step)
+    visualize(view, bot1, bot2, step, renderer)
     
     while True:
         step += 1
-        moved = False
-        
-        dirty_bot1 = [cell for cell in bot1_area if grid[cell[0]][cell[1]] == 1]
-        if dirty_bot1:
-            moved = True
-            target = min(dirty_bot1, key=lambda c: abs(c[0]-bot1.pos[0]) + abs(c[1]-bot1.pos[1]))
-            if bot1.pos == target:
-                bot1.cleaned.append(bot1.pos)
-                grid[bot1.pos[0]][bot1.pos[1]] = 0
-            else:
-                path = bot1.a_star(bot1.pos, target, grid, set())
-                if path:
-                    bot1.pos = path[0]
-                    if grid[bot1.pos[0]][bot1.pos[1]] == 1:
-                        bot1.cleaned.append(bot1.pos)
-                        grid[bot1.pos[0]][bot1.pos[1]] = 0
-        
-        dirty_bot2 = [cell for cell in bot2_area if grid[cell[0]][cell[1]] == 1]
-        if dirty_bot2:
-            moved = True
-            target = min(dirty_bot2, key=lambda c: abs(c[0]-bot2.pos[0]) + abs(c[1]-bot2.pos[1]))
-            if bot2.pos == target:
-                bot2.cleaned.append(bot2.pos)
-                grid[bot2.pos[0]][bot2.pos[1]] = 0
-            else:
-                path = bot2.a_star(bot2.pos, target, grid, set())
-                if path:
-                    bot2.pos = path[0]
-                    if grid[bot2.pos[0]][bot2.pos[1]] == 1:
-                        bot2.cleaned.append(bot2.pos)
-                        grid[bot2.pos[0]][bot2.pos[1]] = 0
+        if mode == "coverage":
+            moved = sweep_step(bot1, bot1_route, bot1_dirt, grid, indexes, {bot2.pos}, obstacles)
+            moved = sweep_step(bot2, bot2_route, bot2_dirt, grid, indexes, {bot1.pos}, obstacles) or moved
+        else:
+            moved = clean_step(bot1, bot1_dirt, grid, indexes, obstacles)
+            moved = clean_step(bot2, bot2_dirt, grid, indexes, obstacles) or moved
         
         if not moved:
             break
             
-        visualize(grid, bot1, bot2, step)
+        visualize(view, bot1, bot2, step, renderer)
     
     total_cells = len(bot1.cleaned) + len(bot2.cleaned)
     efficiency = (total_cells / step) * 100 if step > 0 else 0
     
-    print(f"\n{'='*50}")
-    print(f"CLEANING COMPLETE!")
-    print(f"{'='*50}")
-    print(f"Total cells cleaned: {total_cells}")
-    print(f"Total steps: {step}")
-    print(f"Efficiency score: {efficiency:.2f}%")
-    print(f"\033[94mBot 1\033[0m: {len(bot1.cleaned)} cells")
-    print(f"\033[92mBot 2\033[0m: {len(bot2.cleaned)} cells")
-    print(f"{'='*50}\n")
+    renderer.write(f"\n{'='*50}")
+    renderer.write(f"CLEANING COMPLETE!")
+    renderer.write(f"{'='*50}")
+    renderer.write(f"Total cells cleaned: {total_cells}")
+    renderer.write(f"Total steps: {step}")
+    renderer.write(f"Efficiency score: {efficiency:.2f}%")
+    renderer.write(f"\033[94mBot 1\033[0m: {len(bot1.cleaned)} cells")
+    renderer.write(f"\033[92mBot 2\033[0m: {len(bot2.cleaned)} cells")
+    renderer.write(f"{'='*50}\n")
+    return bot1, bot2, step
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli.main(main)
\ No newline at end of file
@@ -1,7 +1,12 @@
-import collections
-import time
 import os
 
+import cli
+import grid_search
+from distance_field import DistanceField
+from dstar_lite import IncrementalPlanner
+from gridmap import open_map
+from renderers import AnsiRenderer, GridView
+
 MAZE_LAYOUT = [
     [1, 1, 1, 1, 1, 1, 1, 1, 1],
     [1, 'A', 0, 0, 1, 0, 'K', 0, 1],
@@ -12,96 +17,126 @@ MAZE_LAYOUT = [
     [1, 1, 1, 1, 1, 1, 1, 1, 1]
 ]
 
+# Directions: Up, Down, Left, Right
+MOVES = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
 
 class CooperativeMaze:
-    def __init__(self, layout):
-        self.grid = [row[:] for row in layout]
+    def __init__(self, layout=MAZE_LAYOUT, incremental=False, compare=False, grid_map=None, renderer=None):
+        self.renderer = renderer or AnsiRenderer()
+        # grid_map: a map file (gridmap.py) used instead of layout; agents
+        # start on its "starts" and the keys are its "targets"
+        grid_map = open_map(grid_map)
+        self.grid = grid_map or [row[:] for row in layout]
         self.rows = len(self.grid)
         self.cols = len(self.grid[0])
         self.agents = {}
         self.keys = []
         self.visited_paths = set()
-
-        for r in range(self.rows):
-            for c in range(self.cols):
-                val = self.grid[r][c]
-                if val == 'A':
-                    self.agents['A'] = (r, c)
-                elif val == 'B':
-                    self.agents['B'] = (r, c)
-                elif val == 'K':
-                    self.keys.append((r, c))
+        self.collected = {'A': [], 'B': []}
+        self.targets = {}  # agent -> key it is heading for
+        self.step = 0
+        self.view = None
+        if self.renderer.active:
+            self.view = GridView([["█ " if v == 1 else "  " for v in row] for row in self.grid])
+
+        if grid_map:
+            self.agents['A'], self.agents['B'] = grid_map.get("starts")[:2]
+            self.keys = grid_map.get("targets", [])
+        else:
+            for r in range(self.rows):
+                for c in range(self.cols):
+                    val = self.grid[r][c]
+                    if val == 'A':
+                        self.agents['A'] = (r, c)
+                    elif val == 'B':
+                        self.agents['B'] = (r, c)
+                    elif val == 'K':
+                        self.keys.append((r, c))
+
+        # Optional D* Lite planners that repair last tick's search instead of
+        # replanning from scratch when the other agent moves; compare=True
+        # also plans each one from scratch to report the saving
+        self.incremental = IncrementalPlanner(self.grid, MOVES, compare=compare) if incremental else None
 
     def print_maze(self, message=""):
-        print("\n" * 2)
-        print(f"Keys remaining: {len(self.keys)}")
+        if not self.renderer.active:
+            return
+        header = ["\n" * 2, f"Keys remaining: {len(self.keys)}"]
         if message:
-            print(f"Communication: {message}")
-        print("-" * (self.cols * 2))
-
-        for r in range(self.rows):
-            line = ""
-            for c in range(self.cols):
-                val = self.grid[r][c]
-                # Visualization logic
-                if (r, c) in self.agents.values():
-                    # Identify which agent
-                    agent_name = [k for k, v in self.agents.items() if v == (r, c)][0]
-                    line += f"{agent_name} "
-                elif val == 1:
-                    line += "█ "
-                elif val == 'K':
-                    line += "⚷ "
-                elif (r, c) in self.visited_paths:
-                    line += ". "
-                else:
-                    line += "  "
-            print(line)
-        print("-" * (self.cols * 2))
-        time.sleep(0.5)
-
-    def bfs_path(self, start, goals):
+            header.append(f"Communication: {message}")
+        header.append("-" * (self.cols * 2))
+
+        # Later layers win: visited cells, keys, then the agents
+        overlay = {}
+        for pos in self.visited_paths:
+            if self.grid[pos[0]][pos[1]] != 1:
+                overlay[pos] = ". "
+        for pos in self.keys:
+            overlay[pos] = "⚷ "
+        for name, pos in reversed(list(self.agents.items())):
+            overlay[pos] = f"{name} "
+        self.renderer.grid(self.view, header, overlay, ["-" * (self.cols * 2)], 0.5)
+    
+    def bfs_path(self, start, goals, avoid=()):
 
         if not goals: return None, []
 
-        queue = collections.deque([(start, [])])
-        visited = {start}
-
-        while queue:
-            (cur_r, cur_c), path = queue.popleft()
-
-            if (cur_r, cur_c) in goals:
-                return (cur_r, cur_c), path + [(cur_r, cur_c)]
-
-            # Directions: Up, Down, Left, Right
-            moves = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-
-            for dr, dc in moves:
-                nr, nc = cur_r + dr, cur_c + dc
-
-                if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                    cell_content = self.grid[nr][nc]
-                    is_obstacle = cell_content == 1
-
-                    other_agent_pos = list(self.agents.values())
-                    if (nr, nc) in other_agent_pos and (nr, nc) not in goals:
-                        is_obstacle = True
-
-                    if not is_obstacle and (nr, nc) not in visited:
-                        visited.add((nr, nc))
-                        queue.append(((nr, nc), path + [(cur_r, cur_c)]))
-
-        return None, []
+        # Agents block each other unless standing on a goal
+        blocked = [pos for pos in self.agents.values() if pos not in goals] + list(avoid)
+        return grid_search.bfs(self.grid, start, goals, blocked, MOVES)
+
+    def field_path(self, name):
+        # Read the nearest key and next step from the shared key field; only
+        # search when the other agent stands on that step
+        pos = self.agents[name]
+        target = self.key_field.nearest(pos)
+        if target is None:
+            return None, []
+        if pos == target:
+            return target, [pos]
+        next_pos = self.key_field.next_step(pos)
+        if next_pos in self.agents.values() and next_pos not in self.keys:
+            return self.bfs_path(pos, self.keys)
+        return target, [pos, next_pos]
+
+    def plan_path(self, name, goals, avoid=()):
+        # An agent keeps last tick's key while it is still on offer: picking
+        # the nearest key afresh every tick can swing it back and forth once
+        # the other agent has made it detour to a farther one
+        kept = self.targets.get(name)
+        if kept in goals:
+            goals = [kept]
+        if self.incremental:
+            blocked = [pos for other, pos in self.agents.items() if other != name and pos not in goals]
+            target, path = self.incremental.path(name, self.agents[name], goals, blocked + list(avoid))
+        elif name == 'A' and self.key_field.nearest(self.agents[name]) in goals:
+            target, path = self.field_path(name)
+        else:
+            target, path = self.bfs_path(self.agents[name], goals, avoid)
+        self.targets[name] = target
+        return target, path
+
+    def collect_key(self, name, pos):
+        self.collected[name].append(pos)
+        self.keys.remove(pos)
+        self.key_field.remove_target(pos)
+        self.grid[pos[0]][pos[1]] = 0
 
     def run_simulation(self):
         self.print_maze()
         total_keys = len(self.keys)
+        self.key_field = DistanceField(self.grid, self.keys, moves=MOVES)
+        # Two greedy agents can still block each other for good in a tight
+        # spot, so give up after far more steps than any real run takes
+        limit = 4 * self.rows * self.cols * max(total_keys, 1)
 
-        while self.keys:
+        while self.keys and self.step < limit:
+            self.step += 1
             message = ""
             
             # Agent A looks for nearest key
-            target_a, path_a = self.bfs_path(self.agents['A'], self.keys)
+            target_a, path_a = self.plan_path('A', self.keys)
 
             # Agent B looks for nearest key, excludes A's target
             available_for_b = [k for k in self.keys if k != target_a]
@@ -112,7 +147,9 @@ class CooperativeMaze:
             elif target_a:
                 message = f"Agent A targeting {target_a}, Agent B exploring other regions"
 
-            target_b, path_b = self.bfs_path(self.agents['B'], available_for_b)
+            # B moves second, so it also steers clear of A's next cell
+            avoid = [p for p in (path_a or [])[1:2] if p not in available_for_b]
+            target_b, path_b = self.plan_path('B', available_for_b, avoid)
 
             # Move Agent A
             if path_a and len(path_a) > 1:
@@ -123,13 +160,11 @@ class CooperativeMaze:
                 self.agents['A'] = next_pos
                 
                 if next_pos in self.keys:
-                    self.keys.remove(next_pos)
-                    self.grid[next_pos[0]][next_pos[1]] = 0
+                    self.collect_key('A', next_pos)
                     message = f"Agent A collected key at {next_pos}!"
             elif target_a and self.agents['A'] == target_a:
                 if target_a in self.keys:
-                    self.keys.remove(target_a)
-                    self.grid[target_a[0]][target_a[1]] = 0
+                    self.collect_key('A', target_a)
                     message = f"Agent A collected key at {target_a}!"
 
             # Move Agent B
@@ -142,26 +177,30 @@ class CooperativeMaze:
                     self.agents['B'] = next_pos
                     
                     if next_pos in self.keys:
-                        self.keys.remove(next_pos)
-                        self.grid[next_pos[0]][next_pos[1]] = 0
+                        self.collect_key('B', next_pos)
                         message = f"Agent B collected key at {next_pos}!"
             elif target_b and self.agents['B'] == target_b:
                 if target_b in self.keys:
-                    self.keys.remove(target_b)
-                    self.grid[target_b[0]][target_b[1]] = 0
+                    self.collect_key('B', target_b)
                     message = f"Agent B collected key at {target_b}!"
 
             self.print_maze(message)
-            time.sleep(0.5)
-
-        print("\n" + "="*50)
-        print("All keys collected! Mission Complete.")
-        print(f"Total keys collected: {total_keys}")
-        print(f"Agent A path length: {len([p for p in self.visited_paths if p])}")
-        print("="*50)
+            self.renderer.pause(0.5)
+
+        self.renderer.write("\n" + "="*50)
+        if self.keys:
+            self.renderer.write(f"Agents stuck after {self.step} steps, {len(self.keys)} keys left.")
+        else:
+            self.renderer.write("All keys collected! Mission Complete.")
+        self.renderer.write(f"Total keys collected: {total_keys - len(self.keys)}")
+        self.renderer.write(f"Agent A path length: {len([p for p in self.visited_paths if p])}")
+        if self.incremental:
+            stats = self.incremental.stats
+            full = f" (full replans: {stats['full_expanded']})" if self.incremental.compare else ""
+            self.renderer.write(f"Incremental replans: {stats['replans']}, nodes expanded: {stats['expanded']}{full}")
+        self.renderer.write("="*50)
 
 
 # --- Execution ---
 if __name__ == "__main__":
-    game = CooperativeMaze(MAZE_LAYOUT)
-    game.run_simulation()
\ No newline at end of file
+    cli.main(lambda renderer: CooperativeMaze(MAZE_LAYOUT, renderer=renderer).run_simulation())
\ No newline at end of file
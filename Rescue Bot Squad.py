@@ -1,43 +1,33 @@
-import time
-from collections import deque
+import cli
+import grid_search
+from assignment import assign_tasks, balanced
+from distance_field import DistanceField
+from gridmap import open_map
+from renderers import AnsiRenderer, GridView
+from scheduler import TickScheduler
+from world_state import WorldState
 
 class RescueBot:
-    def __init__(self, bot_id, start_pos, symbol):
+    __slots__ = ("id", "pos", "symbol", "rescued", "path")
+
+    def __init__(self, bot_id, start_pos, symbol, world):
         self.id = bot_id
         self.pos = start_pos
         self.symbol = symbol
         self.rescued = []
-        self.path = []
+        self.path = world.layer()
     
     def bfs(self, start, goals, grid):
-        if not goals:
-            return None, []
-        
-        queue = deque([(start, [])])
-        visited = {start}
-        
-        while queue:
-            pos, path = queue.popleft()
-            
-            if pos in goals:
-                return pos, path + [pos]
-            
-            for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-                nx, ny = pos[0] + dx, pos[1] + dy
-                neighbor = (nx, ny)
-                
-                if (0 <= nx < len(grid) and 0 <= ny < len(grid[0]) and 
-                    grid[nx][ny] != 1 and neighbor not in visited):
-                    visited.add(neighbor)
-                    queue.append((neighbor, path + [pos]))
-        
-        return None, []
+        return grid_search.bfs(grid, start, goals)
 
 
 class RescueSystem:
-    def __init__(self):
+    def __init__(self, victims=None, grid_map=None, renderer=None):
+        self.renderer = renderer or AnsiRenderer()
+        # grid_map: a map file (gridmap.py) to run on instead of this maze
+        grid_map = open_map(grid_map)
         # Maze: 0=path, 1=wall - fully connected maze
-        self.maze = [
+        self.maze = grid_map or [
             [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
             [1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1],
             [1, 0, 1, 0, 1, 0, 1, 1, 1, 1, 0, 1],
@@ -49,154 +39,117 @@ class RescueSystem:
         
         self.rows = len(self.maze)
         self.cols = len(self.maze[0])
+        self.view = None
+        if self.renderer.active:
+            self.view = GridView([["██" if v == 1 else "░░" for v in row] for row in self.maze], border=True)
+        self.world = WorldState(self.rows, self.cols, self.maze)
         
         # Place victims in accessible locations
-        self.victims = [(1, 3), (3, 9), (5, 5), (1, 10)]
+        self.victims = list(victims or (grid_map and grid_map.get("targets")) or [(1, 3), (3, 9), (5, 5), (1, 10)])
         
         # Initialize bots
-        self.bot1 = RescueBot(1, (1, 1), "🤖")
-        self.bot2 = RescueBot(2, (5, 10), "🦾")
+        starts = (grid_map and grid_map.get("starts")) or [(1, 1), (5, 10)]
+        self.bot1 = RescueBot(1, starts[0], "🤖", self.world)
+        self.bot2 = RescueBot(2, starts[1], "🦾", self.world)
         
         self.step = 0
         self.assign_zones()
+        
+        # Both bots move one cell per tick
+        self.scheduler = TickScheduler([self.bot1, self.bot2], self.maze, self.next_route, self.rescue,
+                                       moved=lambda bot: bot.path.add(bot.pos), on_tick=self.tick)
     
     def assign_zones(self):
-        # Logic-based assignment: divide victims evenly by proximity
-        victims_with_dist = []
-        
-        for victim in self.victims:
-            dist1 = abs(victim[0] - self.bot1.pos[0]) + abs(victim[1] - self.bot1.pos[1])
-            dist2 = abs(victim[0] - self.bot2.pos[0]) + abs(victim[1] - self.bot2.pos[1])
-            victims_with_dist.append((victim, dist1, dist2))
-        
-        # Sort by which bot is closer
-        victims_with_dist.sort(key=lambda x: x[1] - x[2])
-        
-        # Assign half to each bot
-        mid = len(victims_with_dist) // 2
-        self.bot1_victims = [v[0] for v in victims_with_dist[:mid]]
-        self.bot2_victims = [v[0] for v in victims_with_dist[mid:]]
+        # Divide victims evenly, minimising the bots' total maze distance
+        self.bot1_victims, self.bot2_victims = assign_tasks(
+            self.maze, [self.bot1.pos, self.bot2.pos], self.victims, balanced(self.victims, 2))
+        
+        # One distance field per bot's victim list, updated as victims move between lists
+        self.fields = {self.bot1.id: DistanceField(self.maze, self.bot1_victims),
+                       self.bot2.id: DistanceField(self.maze, self.bot2_victims)}
+        self.assigned = {self.bot1: self.bot1_victims, self.bot2: self.bot2_victims}
+    
+    def reassign(self, victim, from_bot, to_bot):
+        self.assigned[from_bot].remove(victim)
+        self.assigned[to_bot].append(victim)
+        self.fields[from_bot.id].remove_target(victim)
+        self.fields[to_bot.id].add_target(victim)
+    
+    def next_route(self, bot):
+        victims = self.assigned[bot]
+        if not victims:
+            return None
+        target, path = self.fields[bot.id].path(bot.pos)
+        if target and path:
+            return target, path[1:]
+        other = self.bot2 if bot is self.bot1 else self.bot1
+        unreachable = victims[0]
+        if other.bfs(other.pos, [unreachable], self.maze)[0]:
+            # Can't reach, reassign to the other bot
+            self.reassign(unreachable, bot, other)
+            self.renderer.write(f"\n{bot.symbol} Bot {bot.id} can't reach {unreachable}, reassigning to Bot {other.id}")
+        return None
+    
+    def rescue(self, bot, target):
+        bot.rescued.append(target)
+        self.victims.remove(target)
+        self.assigned[bot].remove(target)
+        self.fields[bot.id].remove_target(target)
+        self.renderer.write(f"\n{bot.symbol} Bot {bot.id} rescued victim at {target}!")
+        self.renderer.pause(0.5)
+    
+    def tick(self, tick):
+        self.step = tick
+        self.visualize()
     
     def visualize(self):
-        print("\n" * 2)
-        print(f"{'='*50}")
-        print(f"RESCUE BOT SQUAD - Step {self.step}")
-        print(f"{'='*50}\n")
-        
-        # Top border
-        print("┌" + "─" * (self.cols * 2) + "┐")
-        
-        for i in range(self.rows):
-            row = "│"
-            for j in range(self.cols):
-                if (i, j) == self.bot1.pos:
-                    row += "🤖"
-                elif (i, j) == self.bot2.pos:
-                    row += "🦾"
-                elif (i, j) in self.victims:
-                    row += "🆘"
-                elif (i, j) in self.bot1.path:
-                    row += "\033[94m░░\033[0m"
-                elif (i, j) in self.bot2.path:
-                    row += "\033[92m░░\033[0m"
-                elif self.maze[i][j] == 1:
-                    row += "██"
-                else:
-                    row += "░░"
-            row += "│"
-            print(row)
-        
-        # Bottom border
-        print("└" + "─" * (self.cols * 2) + "┘")
-        
-        print(f"\n🤖 Bot 1 at {self.bot1.pos}, rescued: {len(self.bot1.rescued)}")
-        print(f"🦾 Bot 2 at {self.bot2.pos}, rescued: {len(self.bot2.rescued)}")
-        time.sleep(0.2)
+        if not self.renderer.active:
+            return
+        header = ["\n" * 2, f"{'='*50}", f"RESCUE BOT SQUAD - Step {self.step}", f"{'='*50}\n"]
+        
+        # Later layers win: trails, then victims, then the bots
+        overlay = {}
+        for pos in self.bot2.path:
+            overlay[pos] = "\033[92m░░\033[0m"
+        for pos in self.bot1.path:
+            overlay[pos] = "\033[94m░░\033[0m"
+        for pos in self.victims:
+            overlay[pos] = "🆘"
+        overlay[self.bot2.pos] = "🦾"
+        overlay[self.bot1.pos] = "🤖"
+        
+        footer = [f"\n🤖 Bot 1 at {self.bot1.pos}, rescued: {len(self.bot1.rescued)}",
+                  f"🦾 Bot 2 at {self.bot2.pos}, rescued: {len(self.bot2.rescued)}"]
+        self.renderer.grid(self.view, header, overlay, footer, 0.2)
     
     def run(self):
-        print("\nStarting Rescue Bot Squad...")
-        print(f"🤖 Bot 1 starts at {self.bot1.pos}")
-        print(f"🦾 Bot 2 starts at {self.bot2.pos}")
-        print(f"\nVictims at: {self.victims}")
-        print(f"Bot 1 assigned: {self.bot1_victims}")
-        print(f"Bot 2 assigned: {self.bot2_victims}")
+        self.renderer.write("\nStarting Rescue Bot Squad...")
+        self.renderer.write(f"🤖 Bot 1 starts at {self.bot1.pos}")
+        self.renderer.write(f"🦾 Bot 2 starts at {self.bot2.pos}")
+        self.renderer.write(f"\nVictims at: {self.victims}")
+        self.renderer.write(f"Bot 1 assigned: {self.bot1_victims}")
+        self.renderer.write(f"Bot 2 assigned: {self.bot2_victims}")
         
         self.visualize()
         
-        # Rescue all victims - alternate between bots
-        while self.victims:
-            moved = False
-            
-            # Bot 1 rescue
-            if self.bot1_victims:
-                target, path = self.bot1.bfs(self.bot1.pos, self.bot1_victims, self.maze)
-                
-                if target and path:
-                    moved = True
-                    for pos in path:
-                        self.step += 1
-                        self.bot1.pos = pos
-                        if pos not in self.bot1.path:
-                            self.bot1.path.append(pos)
-                        self.visualize()
-                    
-                    self.bot1.rescued.append(target)
-                    self.victims.remove(target)
-                    self.bot1_victims.remove(target)
-                    print(f"\n🤖 Bot 1 rescued victim at {target}!")
-                    time.sleep(0.5)
-                else:
-                    # Can't reach, reassign to bot 2
-                    if self.bot1_victims:
-                        unreachable = self.bot1_victims[0]
-                        self.bot1_victims.remove(unreachable)
-                        self.bot2_victims.append(unreachable)
-                        print(f"\n🤖 Bot 1 can't reach {unreachable}, reassigning to Bot 2")
-            
-            # Bot 2 rescue
-            if self.bot2_victims:
-                target, path = self.bot2.bfs(self.bot2.pos, self.bot2_victims, self.maze)
-                
-                if target and path:
-                    moved = True
-                    for pos in path:
-                        self.step += 1
-                        self.bot2.pos = pos
-                        if pos not in self.bot2.path:
-                            self.bot2.path.append(pos)
-                        self.visualize()
-                    
-                    self.bot2.rescued.append(target)
-                    self.victims.remove(target)
-                    self.bot2_victims.remove(target)
-                    print(f"\n🦾 Bot 2 rescued victim at {target}!")
-                    time.sleep(0.5)
-                else:
-                    # Can't reach, reassign to bot 1
-                    if self.bot2_victims:
-                        unreachable = self.bot2_victims[0]
-                        self.bot2_victims.remove(unreachable)
-                        self.bot1_victims.append(unreachable)
-                        print(f"\n🦾 Bot 2 can't reach {unreachable}, reassigning to Bot 1")
-            
-            if not moved:
-                print("\nNo bot can reach remaining victims!")
-                break
+        # Rescue all victims - both bots at once
+        self.scheduler.run()
+        if self.victims:
+            self.renderer.write("\nNo bot can reach remaining victims!")
         
         self.show_results()
     
     def show_results(self):
-        print(f"\n{'='*50}")
-        print(f"ALL VICTIMS RESCUED!")
-        print(f"{'='*50}")
-        print(f"Total steps: {self.step}")
-        print(f"🤖 Bot 1 rescued: {len(self.bot1.rescued)} victims")
-        print(f"   Victims: {self.bot1.rescued}")
-        print(f"🦾 Bot 2 rescued: {len(self.bot2.rescued)} victims")
-        print(f"   Victims: {self.bot2.rescued}")
-        print(f"{'='*50}\n")
+        self.renderer.write(f"\n{'='*50}")
+        self.renderer.write("ALL VICTIMS RESCUED!" if not self.victims else f"{len(self.victims)} VICTIMS NOT RESCUED")
+        self.renderer.write(f"{'='*50}")
+        self.renderer.write(f"Total steps: {self.step}")
+        self.renderer.write(f"🤖 Bot 1 rescued: {len(self.bot1.rescued)} victims")
+        self.renderer.write(f"   Victims: {self.bot1.rescued}")
+        self.renderer.write(f"🦾 Bot 2 rescued: {len(self.bot2.rescued)} victims")
+        self.renderer.write(f"   Victims: {self.bot2.rescued}")
+        self.renderer.write(f"{'='*50}\n")
 
 
 if __name__ == "__main__":
-    system = RescueSystem()
-    system.run()
\ No newline at end of file
+    cli.main(lambda renderer: RescueSystem(renderer=renderer).run())
\ No newline at end of file
@@ -1,29 +1,31 @@
-import time
-from collections import deque
+import cli
+import grid_search
+from assignment import assign_tasks, balanced
+from goal_cache import DistanceCache
+from gridmap import open_map
+from renderers import AnsiRenderer, GridView
+from scheduler import TickScheduler
+from world_state import WorldState
 
 class WarehouseAgent:
-    def __init__(self, agent_id, start_pos, symbol):
-        self.id, self.pos, self.symbol, self.collected, self.path = agent_id, start_pos, symbol, [], []
+    __slots__ = ("id", "pos", "symbol", "collected", "path")
+
+    def __init__(self, agent_id, start_pos, symbol, world):
+        self.id, self.pos, self.symbol, self.collected, self.path = agent_id, start_pos, symbol, [], world.layer()
     
     def bfs(self, start, goal, grid, obstacles):
         if not goal: return []
-        queue, visited = deque([(start, [])]), {start}
-        while queue:
-            pos, path = queue.popleft()
-            if pos == goal: return path + [pos]
-            for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-                nx, ny = pos[0] + dx, pos[1] + dy
-                if (0 <= nx < len(grid) and 0 <= ny < len(grid[0]) and 
-                    grid[nx][ny] == 0 and (nx, ny) not in visited and (nx, ny) not in obstacles):
-                    visited.add((nx, ny))
-                    queue.append(((nx, ny), path + [pos]))
-        return []
+        return grid_search.bfs(grid, start, [goal], obstacles)[1]
 
 
 class WarehouseSystem:
-    def __init__(self):
+    def __init__(self, items=None, grid_map=None, renderer=None):
+        self.renderer = renderer or AnsiRenderer()
+        # grid_map: a map file (gridmap.py) to run on instead of this floor;
+        # its "drop" list gives the drop-off zone
+        grid_map = open_map(grid_map)
         # Warehouse grid: 0=path, 1=obstacle
-        self.grid = [
+        self.grid = grid_map or [
             [0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
             [0, 1, 1, 0, 0, 0, 1, 1, 1, 0],
             [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
@@ -32,172 +34,159 @@ class WarehouseSystem:
         ]
         
         self.rows, self.cols = len(self.grid), len(self.grid[0])
+        self.view = None
+        if self.renderer.active:
+            self.view = GridView([["██" if v == 1 else "  " for v in row] for row in self.grid], border=True)
+        self.world = WorldState(self.rows, self.cols, self.grid)
         
         # Drop-off zone
-        self.drop_zone = (2, 9)
+        self.drop_zone = ((grid_map and grid_map.get("drop")) or [(2, 9)])[0]
+        
+        # Distance tables to the drop zone and item sites, built once per goal
+        self.paths = DistanceCache(self.grid)
         
         # Items to pick up
-        self.items = [(1, 3), (3, 2), (4, 5), (2, 7)]
+        self.items = list(items or (grid_map and grid_map.get("targets")) or [(1, 3), (3, 2), (4, 5), (2, 7)])
         self.delivered = []
         
         # Agents
-        self.agent1 = WarehouseAgent(1, (0, 0), "🤖")
-        self.agent2 = WarehouseAgent(2, (4, 0), "🦾")
+        starts = (grid_map and grid_map.get("starts")) or [(0, 0), (4, 0)]
+        self.agent1 = WarehouseAgent(1, starts[0], "🤖", self.world)
+        self.agent2 = WarehouseAgent(2, starts[1], "🦾", self.world)
         
         self.agents = [self.agent1, self.agent2]
         self.step = 0
         
         self.assign_items()
+        
+        # Both agents move one cell per tick
+        self.carrying = {}  # agent -> item on board
+        self.scheduler = TickScheduler(self.agents, self.grid, self.next_route, self.arrive,
+                                       moved=lambda agent: agent.path.add(agent.pos), on_tick=self.tick)
     
     def assign_items(self):
-        # Greedy assignment: nearest items
-        available = list(self.items)
-        self.agent1_items = []
-        self.agent2_items = []
-        
-        while available:
-            # Agent 1's turn
-            if available:
-                nearest = min(available, key=lambda i: abs(i[0]-self.agent1.pos[0]) + abs(i[1]-self.agent1.pos[1]))
-                self.agent1_items.append(nearest)
-                available.remove(nearest)
-            
-            # Agent 2's turn
-            if available:
-                nearest = min(available, key=lambda i: abs(i[0]-self.agent2.pos[0]) + abs(i[1]-self.agent2.pos[1]))
-                self.agent2_items.append(nearest)
-                available.remove(nearest)
+        # Even split minimising total walking distance to the items
+        self.agent1_items, self.agent2_items = assign_tasks(
+            self.grid, [self.agent1.pos, self.agent2.pos], self.items, balanced(self.items, 2))
+        self.assigned = {self.agent1: self.agent1_items, self.agent2: self.agent2_items}
     
     def visualize(self):
-        print("\n" * 2)
-        print(f"{'='*50}")
-        print(f"WAREHOUSE PICKUP TEAM - Step {self.step}")
-        print(f"{'='*50}\n")
-        
-        # Top border
-        print("┌" + "──" * self.cols + "┐")
-        
-        for i in range(self.rows):
-            row = "│"
-            for j in range(self.cols):
-                if (i, j) == self.agent1.pos:
-                    row += "🤖"
-                elif (i, j) == self.agent2.pos:
-                    row += "🦾"
-                elif (i, j) == self.drop_zone:
-                    row += "🎯"
-                elif (i, j) in self.items:
-                    row += "📦"
-                elif (i, j) in self.delivered:
-                    row += "✅"
-                elif (i, j) in self.agent1.path:
-                    row += "\033[94m░░\033[0m"
-                elif (i, j) in self.agent2.path:
-                    row += "\033[92m░░\033[0m"
-                elif self.grid[i][j] == 1:
-                    row += "██"
-                else:
-                    row += "  "
-            row += "│"
-            print(row)
-        
-        # Bottom border
-        print("└" + "──" * self.cols + "┘")
-        
-        print(f"\n🤖 Agent 1: {len(self.agent1.collected)} delivered | 🦾 Agent 2: {len(self.agent2.collected)} delivered")
-        print(f"📦 Items remaining: {len(self.items)} | ✅ Delivered: {len(self.delivered)}")
-        time.sleep(0.15)
+        if not self.renderer.active:
+            return
+        header = ["\n" * 2, f"{'='*50}", f"WAREHOUSE PICKUP TEAM - Step {self.step}", f"{'='*50}\n"]
+        
+        # Later layers win: trails, delivered, items, drop zone, then agents
+        overlay = {}
+        for pos in self.agent2.path:
+            overlay[pos] = "\033[92m░░\033[0m"
+        for pos in self.agent1.path:
+            overlay[pos] = "\033[94m░░\033[0m"
+        for pos in self.delivered:
+            overlay[pos] = "✅"
+        for pos in self.items:
+            overlay[pos] = "📦"
+        overlay[self.drop_zone] = "🎯"
+        overlay[self.agent2.pos] = "🦾"
+        overlay[self.agent1.pos] = "🤖"
+        
+        footer = [f"\n🤖 Agent 1: {len(self.agent1.collected)} delivered | 🦾 Agent 2: {len(self.agent2.collected)} delivered",
+                  f"📦 Items remaining: {len(self.items)} | ✅ Delivered: {len(self.delivered)}"]
+        self.renderer.grid(self.view, header, overlay, footer, 0.15)
+    
+    def next_route(self, agent):
+        # Next leg: to the drop zone with an item on board, else to the next
+        # item, else off the drop zone if someone still needs it
+        item_list = self.assigned[agent]
+        others = [a for a in self.agents if a is not agent]
+        if agent in self.carrying:
+            task, goal = ("drop", self.carrying[agent]), self.drop_zone
+        elif item_list:
+            task, goal = ("pickup", item_list[0]), item_list[0]
+        elif agent.pos == self.drop_zone and any(a in self.carrying or self.assigned[a] for a in others):
+            task, goal = ("clear", None), self.free_neighbour(agent.pos)
+            if goal is None:
+                return None
+        else:
+            return None
+        
+        # Avoid the other agents' cells when possible, except on the goal itself
+        avoid = {a.pos for a in others}
+        avoid.discard(goal)
+        path = self.paths.path(agent.pos, goal, avoid) or self.paths.path(agent.pos, goal)
+        if not path:
+            if task[0] != "clear":
+                # Unreachable: give up on the item
+                self.carrying.pop(agent, None)
+                if item_list and item_list[0] == task[1]:
+                    item_list.pop(0)
+            return None
+        return task, path[1:]
     
-    def deliver_item(self, agent, item_list, symbol):
-        if not item_list: return False
-        
-        item = item_list[0]
-        
-        # Get other agent's position to avoid collision
-        other_pos = [a.pos for a in self.agents if a.id != agent.id]
-        
-        # Go to item
-        path_to_item = agent.bfs(agent.pos, item, self.grid, other_pos)
-        if not path_to_item: return False
-        
-        for pos in path_to_item:
-            self.step += 1
-            agent.pos = pos
-            if pos not in agent.path:
-                agent.path.append(pos)
-            self.visualize()
-        
-        # Pick up item
-        self.items.remove(item)
-        print(f"\n{symbol} Agent {agent.id} picked up item at {item}!")
-        time.sleep(0.3)
-        
-        # Go to drop zone
-        path_to_drop = agent.bfs(agent.pos, self.drop_zone, self.grid, other_pos)
-        if not path_to_drop: return False
-        
-        for pos in path_to_drop:
-            self.step += 1
-            agent.pos = pos
-            if pos not in agent.path:
-                agent.path.append(pos)
-            self.visualize()
-        
-        # Deliver item
-        agent.collected.append(item)
-        self.delivered.append(item)
-        item_list.pop(0)
-        print(f"\n{symbol} Agent {agent.id} delivered item to drop zone!")
-        time.sleep(0.3)
-        
-        return True
+    def free_neighbour(self, pos):
+        taken = {a.pos for a in self.agents}
+        for dr, dc in grid_search.MOVES:
+            nr, nc = pos[0] + dr, pos[1] + dc
+            if 0 <= nr < self.rows and 0 <= nc < self.cols and self.grid[nr][nc] == 0 and (nr, nc) not in taken:
+                return (nr, nc)
+        return None
+    
+    def arrive(self, agent, task):
+        kind, item = task
+        if kind == "pickup":
+            # Pick up item
+            self.items.remove(item)
+            self.carrying[agent] = item
+            self.renderer.write(f"\n{agent.symbol} Agent {agent.id} picked up item at {item}!")
+            self.renderer.pause(0.3)
+        elif kind == "drop":
+            # Deliver item
+            del self.carrying[agent]
+            agent.collected.append(item)
+            self.delivered.append(item)
+            self.assigned[agent].pop(0)
+            self.renderer.write(f"\n{agent.symbol} Agent {agent.id} delivered item to drop zone!")
+            self.renderer.pause(0.3)
+    
+    def tick(self, tick):
+        self.step = tick
+        self.visualize()
     
     def run(self):
-        print("\nStarting Warehouse Pickup Team...")
-        print(f"🤖 Agent 1: {self.agent1.pos}")
-        print(f"🦾 Agent 2: {self.agent2.pos}")
-        print(f"🎯 Drop zone: {self.drop_zone}")
-        print(f"📦 Items: {self.items}")
-        print(f"Agent 1 assigned: {self.agent1_items}")
-        print(f"Agent 2 assigned: {self.agent2_items}\n")
+        self.renderer.write("\nStarting Warehouse Pickup Team...")
+        self.renderer.write(f"🤖 Agent 1: {self.agent1.pos}")
+        self.renderer.write(f"🦾 Agent 2: {self.agent2.pos}")
+        self.renderer.write(f"🎯 Drop zone: {self.drop_zone}")
+        self.renderer.write(f"📦 Items: {self.items}")
+        self.renderer.write(f"Agent 1 assigned: {self.agent1_items}")
+        self.renderer.write(f"Agent 2 assigned: {self.agent2_items}\n")
         
         self.visualize()
         
         # Deliver all items
-        while self.agent1_items or self.agent2_items:
-            # Agent 1 delivery
-            if not self.deliver_item(self.agent1, self.agent1_items, "🤖"):
-                if self.agent1_items:
-                    self.agent1_items.pop(0)
-            
-            # Agent 2 delivery
-            if not self.deliver_item(self.agent2, self.agent2_items, "🦾"):
-                if self.agent2_items:
-                    self.agent2_items.pop(0)
+        self.scheduler.run()
         
         self.show_results()
     
     def show_results(self):
         total = len(self.agent1.collected) + len(self.agent2.collected)
         
-        print(f"\n{'='*50}\nALL ITEMS DELIVERED!\n{'='*50}")
-        print(f"Total time: {self.step} steps")
-        print(f"Total items delivered: {total}")
-        print(f"🤖 Agent 1: {len(self.agent1.collected)} items")
-        print(f"🦾 Agent 2: {len(self.agent2.collected)} items")
+        self.renderer.write(f"\n{'='*50}\nALL ITEMS DELIVERED!\n{'='*50}")
+        self.renderer.write(f"Total time: {self.step} steps")
+        self.renderer.write(f"Total items delivered: {total}")
+        self.renderer.write(f"🤖 Agent 1: {len(self.agent1.collected)} items")
+        self.renderer.write(f"🦾 Agent 2: {len(self.agent2.collected)} items")
         
         # Delivery chart
-        print(f"\n{'='*50}\nDELIVERY CHART\n{'='*50}\n")
+        self.renderer.write(f"\n{'='*50}\nDELIVERY CHART\n{'='*50}\n")
         
         max_items = max(len(self.agent1.collected), len(self.agent2.collected))
         
         for agent in self.agents:
             bar = "█" * len(agent.collected)
-            print(f"{agent.symbol} Agent {agent.id}: {bar} ({len(agent.collected)})")
+            self.renderer.write(f"{agent.symbol} Agent {agent.id}: {bar} ({len(agent.collected)})")
         
-        print(f"\n{'='*50}\n")
+        self.renderer.write(f"\n{'='*50}\n")
 
 
 if __name__ == "__main__":
-    system = WarehouseSystem()
-    system.run()
\ No newline at end of file
+    cli.main(lambda renderer: WarehouseSystem(renderer=renderer).run())
\ No newline at end of file
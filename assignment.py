@@ -0,0 +1,113 @@
+import instruments
+from grid_search import MOVES, UNREACHED, bfs_tree, cell_id, open_cells
+
+# Cost of an agent/task pair with no path; such pairs are never assigned
+NO_PATH = 10 ** 9
+
+
+def cost_matrix(grid, agents, tasks, moves=MOVES):
+    # True travel distances, rows per agent and columns per task, from one
+    # whole-grid BFS per agent instead of one search per pair
+    passable = open_cells(grid)
+    cols = len(grid[0])
+    ids = [cell_id(t, cols) for t in tasks]
+    matrix = []
+    for pos in agents:
+        dist, _ = bfs_tree(grid, [pos], moves=moves, passable=passable)
+        matrix.append([NO_PATH if dist[i] == UNREACHED else dist[i] for i in ids])
+    return matrix
+
+
+def hungarian(cost):
+    # Minimum-cost matching of every row to a distinct column (Kuhn-Munkres
+    # with potentials, O(rows^2 x columns)); needs rows <= columns. Returns
+    # the column chosen for each row.
+    n, m = len(cost), len(cost[0])
+    INF = float('inf')
+    u, v = [0] * (n + 1), [0] * (m + 1)
+    match = [0] * (m + 1)  # column -> row, 1-based; 0 is free
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        minv = [INF] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            row = cost[i0 - 1]
+            delta, j1 = INF, 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    result = [None] * n
+    for j in range(1, m + 1):
+        if match[j]:
+            result[match[j] - 1] = j - 1
+    return result
+
+
+def assign(cost, capacity=None):
+    # Task indices per agent, nearest first, minimising the summed distance.
+    # capacity caps how many tasks an agent takes: one int for everyone or a
+    # list per agent (None is unlimited). Agents with room for several tasks
+    # get one matrix row per slot. A task the matching could only give to an
+    # agent that can't reach it goes to the nearest agent that can, over
+    # that agent's cap. Tasks nobody can reach, or beyond the total
+    # capacity, are left out.
+    agents = len(cost)
+    tasks = len(cost[0]) if agents else 0
+    if capacity is None:
+        capacity = tasks
+    if isinstance(capacity, int):
+        capacity = [capacity] * agents
+    groups = [[] for _ in range(agents)]
+    slots = [a for a in range(agents) for _ in range(min(capacity[a], tasks))]
+    if not slots or not tasks:
+        return groups
+
+    if len(slots) <= tasks:
+        chosen = hungarian([cost[a] for a in slots])
+        pairs = [(slots[s], j) for s, j in enumerate(chosen)]
+    else:
+        chosen = hungarian([[cost[a][j] for a in slots] for j in range(tasks)])
+        pairs = [(slots[s], j) for j, s in enumerate(chosen)]
+    for a, j in pairs:
+        if cost[a][j] >= NO_PATH:
+            a = min(range(agents), key=lambda k: cost[k][j])
+        if cost[a][j] < NO_PATH:
+            groups[a].append(j)
+    for a, group in enumerate(groups):
+        group.sort(key=lambda j: cost[a][j])
+    return groups
+
+
+def assign_tasks(grid, agents, tasks, capacity=None, moves=MOVES):
+    # assign() on true grid distances; returns task positions per agent
+    with instruments.phase("assign"):
+        groups = assign(cost_matrix(grid, agents, tasks, moves), capacity)
+    if instruments.active:
+        instruments.active.observe("assign.tasks", len(tasks))
+    return [[tasks[j] for j in group] for group in groups]
+
+
+def balanced(tasks, agents):
+    # Capacity that splits tasks as evenly as possible
+    return -(-len(tasks) // agents)
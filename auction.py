@@ -0,0 +1,74 @@
+import heapq
+
+
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class Auction:
+    # Market allocator for a shared task pool. Each agent keeps a heap of
+    # its bids (travel cost, task) on the open tasks. Awarding a task only
+    # marks it closed, so stale bids are dropped lazily when they surface,
+    # and an agent's bids are recomputed only when that agent has moved.
+    # allocate() runs one auction round for all idle agents at once: the
+    # cheapest outstanding bid wins, then the rest re-bid. A task handed back
+    # with add_task(task, exclude) is never offered to those agents again.
+    def __init__(self, tasks=(), cost=manhattan):
+        self.cost = cost
+        self.open = set(tasks)
+        self.bids = {}       # agent -> heap of (cost, task)
+        self.positions = {}  # agent -> position its bids were made from
+        self.excluded = {}   # task -> agents that may not bid on it
+
+    def update_agent(self, agent, pos):
+        # Re-bid from a new position; a no-op if the agent hasn't moved
+        if self.positions.get(agent) == pos and agent in self.bids:
+            return
+        self.positions[agent] = pos
+        heap = [(self.cost(pos, task), task) for task in self.open
+                if agent not in self.excluded.get(task, ())]
+        heapq.heapify(heap)
+        self.bids[agent] = heap
+
+    def add_task(self, task, exclude=()):
+        # (Re)open task, e.g. one its winner turned out unable to reach
+        if exclude:
+            self.excluded.setdefault(task, set()).update(exclude)
+        if task in self.open:
+            return
+        self.open.add(task)
+        for agent, heap in self.bids.items():
+            if agent not in self.excluded.get(task, ()):
+                heapq.heappush(heap, (self.cost(self.positions[agent], task), task))
+
+    def remove_task(self, task):
+        self.open.discard(task)
+
+    def best(self, agent):
+        # Cheapest bid on a still-open task, or None
+        heap = self.bids.get(agent)
+        while heap and (heap[0][1] not in self.open or agent in self.excluded.get(heap[0][1], ())):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def allocate(self, agents):
+        # Award at most one task to each of the given (idle) agents;
+        # returns {agent: task}
+        round_heap = []
+        for order, agent in enumerate(agents):
+            bid = self.best(agent)
+            if bid:
+                round_heap.append((bid, order, agent))
+        heapq.heapify(round_heap)
+        awarded = {}
+        while round_heap:
+            (cost, task), order, agent = heapq.heappop(round_heap)
+            if task not in self.open:
+                # Outbid this round; bid again on what is left
+                bid = self.best(agent)
+                if bid:
+                    heapq.heappush(round_heap, (bid, order, agent))
+                continue
+            self.open.discard(task)
+            awarded[agent] = task
+        return awarded
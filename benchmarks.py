@@ -0,0 +1,323 @@
+import argparse
+import collections
+import heapq
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import grid_search
+import scenarios
+from cbs import CBSSolver
+from gridmap import load_map, random_grid, save_map
+from reservations import ReservationTable
+from spacetime import astar_time_aware
+from world_state import WorldState
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "benchmark_baseline.json")
+
+
+def random_map(size, density, seed=0):
+    # size x size grid with about `density` walls, cut down to one connected
+    # part holding at least half the free cells, so every free cell can get
+    # to every other one. Returns the grid, its free cells in row-major
+    # order and the Random that made it.
+    rng = random.Random(f"{size}:{density}:{seed}")
+    grid, free = random_grid(size, size, density, rng)
+    return grid, free, rng
+
+
+def _far_pair(grid, free):
+    # The first free cell and the free cell farthest from it
+    dist, _ = grid_search.bfs_tree(grid, [free[0]])
+    cols = len(grid[0])
+    return free[0], max(free, key=lambda p: dist[p[0] * cols + p[1]])
+
+
+def _columns(free, agents, size):
+    # Free cells split into `agents` bands of columns
+    width = -(-size // agents)
+    return [[p for p in free if k * width <= p[1] < (k + 1) * width] for k in range(agents)]
+
+
+# Each case takes (size, density, agents, seed), does its setup and returns
+# the run to time. A run that returns an int reports its own count of
+# expanded nodes; otherwise priority-queue and BFS-queue pops during the run
+# are counted.
+def cleaning_a_star(size, density, agents, seed):
+    grid, free, _ = random_map(size, density, seed)
+    start, goal = _far_pair(grid, free)
+    bot = scenarios.load("cleaning").CleaningBot(1, start, "blue")
+    walls = {(r, c) for r in range(size) for c in range(size) if grid[r][c] == 1}
+    return lambda: bot.a_star(start, goal, grid, walls)
+
+
+def _reserved(size, density, agents, seed):
+    # Map plus a reservation table holding agents - 1 random BFS routes
+    grid, free, rng = random_map(size, density, seed)
+    table = ReservationTable(size, size)
+    for k in range(agents - 1):
+        a, b = rng.sample(free, 2)
+        table.reserve_path(k, grid_search.bfs(grid, a, [b])[1])
+    return grid, free, table
+
+
+def spacetime_astar(size, density, agents, seed):
+    grid, free, table = _reserved(size, density, agents, seed)
+    start, goal = _far_pair(grid, free)
+    return lambda: astar_time_aware(start, goal, grid, table, max_time=4 * size * size)
+
+
+def spacetime_sipp(size, density, agents, seed):
+    grid, free, table = _reserved(size, density, agents, seed)
+    start, goal = _far_pair(grid, free)
+    return lambda: astar_time_aware(start, goal, grid, table, max_time=4 * size * size, safe_intervals=True)
+
+
+def cbs_solve(size, density, agents, seed):
+    # Conflict resolution between agents with crossing random routes
+    grid, free, rng = random_map(size, density, seed)
+    cells = rng.sample(free, 2 * agents)
+    solver = CBSSolver(grid, time_limit=30)
+    return lambda: solver.solve(cells[:agents], cells[agents:])
+
+
+def rescue_bfs(size, density, agents, seed):
+    grid, free, _ = random_map(size, density, seed)
+    start, goal = _far_pair(grid, free)
+    bot = scenarios.load("rescue").RescueBot(1, start, "🤖", WorldState(size, size, grid))
+    return lambda: bot.bfs(start, [goal], grid)
+
+
+def painting(size, density, agents, seed):
+    # PaintingRobot.paint_next until every robot's band is painted
+    grid, free, _ = random_map(size, density, seed)
+    world = WorldState(size, size, grid)
+    module = scenarios.load("painting")
+    robots, areas = [], []
+    for k, band in enumerate(_columns(free, agents, size)):
+        if band:
+            robots.append(module.PaintingRobot(k + 1, band[0], "blue", "🤖", world))
+            areas.append(world.layer(band))
+
+    def run():
+        steps = 0
+        while any([robot.paint_next(world, area) for robot, area in zip(robots, areas)]):
+            steps += 1
+        return steps
+    return run
+
+
+def exploration(size, density, agents, seed):
+    # ExplorerAgent.explore_next until every explorer's band is explored
+    grid, free, _ = random_map(size, density, seed)
+    world = WorldState(size, size)
+    module = scenarios.load("exploration")
+    bands = [band for band in _columns(free, agents, size) if band]
+    explorers = [module.ExplorerAgent(k + 1, band[0], "🤖", world) for k, band in enumerate(bands)]
+
+    def run():
+        explored = world.layer(e.pos for e in explorers)
+        steps = 0
+        while True:
+            moved = [e.explore_next(band, explored) for e, band in zip(explorers, bands)]
+            if not any(moved):
+                return steps
+            explored.update(p for p in moved if p)
+            steps += 1
+    return run
+
+
+def scenario(name):
+    # A whole scenario run headless on a random map file (gridmap.py)
+    def case(size, density, agents, seed):
+        grid, free, rng = random_map(size, density, seed)
+        cells = rng.sample(free, min(len(free), 10))
+        fd, path = tempfile.mkstemp(suffix=".gmap")
+        os.close(fd)
+        save_map(path, grid, {"starts": cells[:3], "targets": cells[3:9], "drop": cells[9:]})
+        grid_map = load_map(path)
+        os.remove(path)
+        return lambda: scenarios.run(name, grid_map=grid_map)
+    return case
+
+
+# name -> (case, uses the agent count, largest size worth running)
+CASES = {
+    "cleaning.a_star": (cleaning_a_star, False, None),
+    "spacetime.astar": (spacetime_astar, True, None),
+    "spacetime.sipp": (spacetime_sipp, True, None),
+    "cbs.solve": (cbs_solve, True, 64),
+    "rescue.bfs": (rescue_bfs, False, None),
+    "painting.paint_next": (painting, True, None),
+    "exploration.explore_next": (exploration, True, 64),
+}
+for _name in scenarios.SCENARIOS:
+    # Exploration rescans its region every step; past 64 cells a side a
+    # single run takes minutes
+    CASES["scenario." + _name] = (scenario(_name), False, 64 if _name == "exploration" else None)
+
+
+class _Pops:
+    # Counts pops from heapq heaps and collections.deque queues in every
+    # loaded module while active, by swapping in counting stand-ins
+    def __init__(self):
+        self.count = 0
+        self.swapped = []
+
+    def __enter__(self):
+        pops = self
+        real_heapq, real_deque = heapq, collections.deque
+
+        class CountingHeapq:
+            def __getattr__(self, name):
+                return getattr(real_heapq, name)
+
+            def heappop(self, heap):
+                pops.count += 1
+                return real_heapq.heappop(heap)
+
+        class CountingDeque(real_deque):
+            def popleft(self):
+                pops.count += 1
+                return real_deque.popleft(self)
+
+            def pop(self):
+                pops.count += 1
+                return real_deque.pop(self)
+
+        stand_ins = {"heapq": (real_heapq, CountingHeapq()), "deque": (real_deque, CountingDeque)}
+        modules = list(sys.modules.values()) + list(scenarios._modules.values())
+        for module in modules:
+            if module in (real_heapq, collections, sys.modules[__name__]):
+                continue
+            for attr, (real, fake) in stand_ins.items():
+                if getattr(module, attr, None) is real:
+                    setattr(module, attr, fake)
+                    self.swapped.append((module, attr, real))
+        return self
+
+    def __exit__(self, *exc):
+        for module, attr, real in self.swapped:
+            setattr(module, attr, real)
+        self.swapped = []
+
+
+def measure(name, size, density, agents, repeat=5, seed=0):
+    # Best wall time of `repeat` runs, node expansions and peak memory of
+    # one more run each; setup is never counted
+    case = CASES[name][0]
+    best = float('inf')
+    for _ in range(repeat):
+        run = case(size, density, agents, seed)
+        began = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - began)
+    run = case(size, density, agents, seed)
+    with _Pops() as pops:
+        own = run()
+    expansions = own if isinstance(own, int) else pops.count
+    run = case(size, density, agents, seed)
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"time": best, "expansions": expansions, "peak_kb": peak // 1024}
+
+
+def key(name, size, density, agents):
+    return f"{name} size={size} density={density}" + (f" agents={agents}" if agents else "")
+
+
+def run_suite(names, sizes, densities, agent_counts, repeat=5, report=print):
+    results = {}
+    for name in names:
+        _, uses_agents, limit = CASES[name]
+        for size in sizes:
+            if limit and size > limit:
+                continue
+            for density in densities:
+                for agents in (agent_counts if uses_agents else [None]):
+                    k = key(name, size, density, agents)
+                    results[k] = measure(name, size, density, agents or 1, repeat)
+                    if report:
+                        report(k, results[k])
+    return results
+
+
+def compare(results, baseline, threshold, min_time=0.001):
+    # Lines for every result, and how many went past threshold (a fraction)
+    # on time, expansions or memory against the baseline. Runs shorter than
+    # min_time seconds are too noisy to flag on time; expansion counts are
+    # exact, so they are always checked.
+    lines, regressions = [], 0
+    for k, new in results.items():
+        old = baseline.get(k)
+        if old is None:
+            lines.append(f"{k}: {new['time'] * 1000:.2f} ms (no baseline)")
+            continue
+        flags = []
+        for metric, label in (("time", "slower"), ("expansions", "more expansions"), ("peak_kb", "more memory")):
+            if metric == "time" and new["time"] < min_time:
+                continue
+            if old[metric] and new[metric] > old[metric] * (1 + threshold):
+                flags.append(f"{label} x{new[metric] / old[metric]:.2f}")
+        regressions += bool(flags)
+        ratio = new["time"] / old["time"] if old["time"] else float('inf')
+        lines.append(f"{k}: {new['time'] * 1000:.2f} ms vs {old['time'] * 1000:.2f} ms (x{ratio:.2f})"
+                     + ("  REGRESSION: " + ", ".join(flags) if flags else ""))
+    return lines, regressions
+
+
+def _numbers(kind):
+    return lambda text: [kind(v) for v in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time planners and scenarios across map sizes.")
+    parser.add_argument("cases", nargs="*", help="case names or prefixes (default: all)")
+    parser.add_argument("--sizes", type=_numbers(int), default=[16, 32, 64])
+    parser.add_argument("--densities", type=_numbers(float), default=[0.0, 0.2])
+    parser.add_argument("--agents", type=_numbers(int), default=[2, 4])
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case; the best counts")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline results file (JSON)")
+    parser.add_argument("--save", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="flag results this much worse than the baseline (0.25 = 25%%)")
+    parser.add_argument("--min-time", type=float, default=0.001,
+                        help="don't flag time on runs shorter than this many seconds")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+    names = [n for n in CASES if not args.cases or any(n.startswith(c) for c in args.cases)]
+    results = run_suite(names, args.sizes, args.densities, args.agents, args.repeat,
+                        report=lambda k, r: print(f"{k}: {r['time'] * 1000:.2f} ms, "
+                                                  f"{r['expansions']} expansions, {r['peak_kb']} KB peak"))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    lines, regressions = compare(results, baseline, args.threshold, args.min_time)
+    if baseline:
+        print("\nAgainst " + args.baseline)
+        print("\n".join(lines))
+        print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results": dict(baseline, **results)}, f, indent=1, sort_keys=True)
+        print(f"Saved {len(results)} results to {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
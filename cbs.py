@@ -0,0 +1,217 @@
+import heapq
+import time
+
+from goal_cache import DistanceCache
+from spacetime import astar_time_aware, focal_time_aware
+
+
+class Constraints:
+    # One agent's constraints in a CBS node, in the reservation-table
+    # interface astar_time_aware expects. Constraints are only ever added,
+    # so children share nothing mutable with their parent.
+    __slots__ = ("vertices", "moves", "last_goal")
+
+    def __init__(self, vertices=frozenset(), moves=frozenset(), last_goal=-1):
+        self.vertices = vertices  # {(pos, t)}: not on pos at time t
+        self.moves = moves        # {(frm, to, t)}: no move frm -> to arriving at t
+        self.last_goal = last_goal
+
+    def blocked(self, pos, t):
+        return (pos, t) in self.vertices
+
+    def swap_blocked(self, frm, to, t):
+        return (frm, to, t) in self.moves
+
+    def with_vertex(self, pos, t, goal):
+        last = max(self.last_goal, t) if pos == goal else self.last_goal
+        return Constraints(self.vertices | {(pos, t)}, self.moves, last)
+
+    def with_move(self, frm, to, t):
+        return Constraints(self.vertices, self.moves | {(frm, to, t)}, self.last_goal)
+
+
+def _at(path, t):
+    # Agents wait on their goal after arriving
+    return path[t] if t < len(path) else path[-1]
+
+
+def find_conflicts(paths, first=False):
+    # Vertex conflicts (a, b, pos, t) and swaps (a, b, frm, to, t), where a
+    # moves frm -> to while b moves to -> frm, in time order
+    found = []
+    horizon = max(len(p) for p in paths)
+    prev = {}
+    for t in range(horizon):
+        here = {}
+        for a, path in enumerate(paths):
+            pos = _at(path, t)
+            b = here.get(pos)
+            if b is not None:
+                found.append((b, a, pos, t))
+                if first:
+                    return found
+            else:
+                here[pos] = a
+            if t:
+                frm = _at(path, t - 1)
+                b = prev.get(pos)
+                if frm != pos and b is not None and b < a and _at(paths[b], t) == frm:
+                    found.append((a, b, frm, pos, t))
+                    if first:
+                        return found
+        prev = {_at(path, t): a for a, path in enumerate(paths)}
+    return found
+
+
+class _Node:
+    __slots__ = ("constraints", "paths", "bounds", "cost", "lb", "conflicts", "id")
+
+    def __init__(self, constraints, paths, bounds, conflicts, node_id):
+        self.constraints = constraints
+        self.paths = paths
+        self.bounds = bounds  # per-agent lower bounds on the optimal path length
+        self.cost = sum(len(p) - 1 for p in paths)
+        self.lb = sum(bounds)
+        self.conflicts = conflicts
+        self.id = node_id
+
+
+class CBSSolver:
+    # Conflict-Based Search (Sharon et al.) over astar_time_aware. Each
+    # constraint-tree node holds one path per agent; the first collision in
+    # a node splits it into two children that forbid the colliding cell or
+    # move to one agent each. With w == 1 the cheapest node is expanded
+    # first and the sum of path lengths is optimal. With w > 1 it runs as
+    # ECBS (Barer et al.): both levels use focal search, expanding anything
+    # within w of the lower bound and preferring fewer collisions, so the
+    # result costs at most w times the optimum.
+    def __init__(self, grid, max_time=None, node_limit=20000, time_limit=None):
+        self.grid = grid
+        self.max_time = max_time or len(grid) * len(grid[0])
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        # True-distance heuristic tables per goal, reused by every replan
+        self.distances = DistanceCache(grid)
+        self.stats = {"conflicts": 0, "nodes": 0, "expanded": 0, "runtime": 0.0, "cost": None}
+
+    def _plan(self, agent, starts, goals, constraints, paths, w):
+        # Returns (path, lower bound). Collisions with the other agents'
+        # current paths are soft costs for tie-breaking / the focal list.
+        occupied, parked = {}, {}
+        for b, path in enumerate(paths):
+            if b == agent:
+                continue
+            for t, pos in enumerate(path):
+                occupied[(pos, t)] = occupied.get((pos, t), 0) + 1
+            parked[path[-1]] = min(parked.get(path[-1], len(path)), len(path))
+
+        def conflicts(pos, t):
+            n = occupied.get((pos, t), 0)
+            if pos in parked and t >= parked[pos]:
+                n += 1
+            return n
+
+        args = (self.grid, constraints)
+        kw = {"max_time": self.max_time, "min_arrival": constraints.last_goal + 1,
+              "conflicts": conflicts if occupied else None, "distances": self.distances}
+        if w > 1:
+            return focal_time_aware(starts[agent], goals[agent], *args, w, **kw)
+        path = astar_time_aware(starts[agent], goals[agent], *args, **kw)
+        return path, len(path) - 1 if path else None
+
+    def solve(self, starts, goals, w=1.0):
+        # Collision-free paths (path[t] is the cell at time t) or None when
+        # no solution is found within the node or time limit
+        began = time.perf_counter()
+        stats = self.stats = {"conflicts": 0, "nodes": 0, "expanded": 0, "runtime": 0.0, "cost": None}
+        n = len(starts)
+        self.distances.max_entries = max(self.distances.max_entries, n)
+        if len(set(starts)) < n or len(set(goals)) < n:
+            stats["runtime"] = time.perf_counter() - began
+            return None
+        constraints = [Constraints() for _ in range(n)]
+        paths, bounds = [], []
+        for a in range(n):
+            path, bound = self._plan(a, starts, goals, constraints[a], paths, w)
+            if path is None:
+                stats["runtime"] = time.perf_counter() - began
+                return None
+            paths.append(path)
+            bounds.append(bound)
+        root = _Node(constraints, paths, bounds, find_conflicts(paths), 0)
+        stats["nodes"] = 1
+
+        # by_lb finds the smallest lower bound among unexpanded nodes; nodes
+        # costing at most w times that are in focal, ordered by collision
+        # count, and the rest wait in by_cost until the bound catches up
+        by_lb = [(root.lb, root.id)]
+        by_cost = [(root.cost, root.id, root)]
+        focal = []
+        done = set()
+        bound = -1
+
+        while by_lb:
+            if stats["nodes"] >= self.node_limit or (
+                    self.time_limit and time.perf_counter() - began > self.time_limit):
+                break
+            while by_lb and by_lb[0][1] in done:
+                heapq.heappop(by_lb)
+            if not by_lb:
+                break
+            bound = max(bound, by_lb[0][0] * w)
+            while by_cost and by_cost[0][0] <= bound:
+                cost, node_id, node = heapq.heappop(by_cost)
+                heapq.heappush(focal, (len(node.conflicts), cost, node_id, node))
+            node = heapq.heappop(focal)[3]
+            if node.id in done:
+                continue
+            done.add(node.id)
+            stats["expanded"] += 1
+
+            if not node.conflicts:
+                stats["cost"] = node.cost
+                stats["runtime"] = time.perf_counter() - began
+                return node.paths
+            stats["conflicts"] += 1
+
+            conflict = node.conflicts[0]
+            if len(conflict) == 4:
+                a, b, pos, t = conflict
+                splits = ((a, lambda c: c.with_vertex(pos, t, goals[a])),
+                          (b, lambda c: c.with_vertex(pos, t, goals[b])))
+            else:
+                a, b, frm, to, t = conflict
+                splits = ((a, lambda c: c.with_move(frm, to, t)),
+                          (b, lambda c: c.with_move(to, frm, t)))
+
+            children = []
+            for agent, constrain in splits:
+                constraints = list(node.constraints)
+                constraints[agent] = constrain(constraints[agent])
+                path, lb = self._plan(agent, starts, goals, constraints[agent], node.paths, w)
+                if path is None:
+                    continue
+                paths = list(node.paths)
+                paths[agent] = path
+                bounds = list(node.bounds)
+                bounds[agent] = max(lb, node.bounds[agent])
+                conflicts = find_conflicts(paths)
+                if len(path) == len(node.paths[agent]) and len(conflicts) < len(node.conflicts):
+                    # Bypass: an equally long path with fewer collisions also
+                    # satisfies this node's constraints, so keep one node
+                    # instead of branching
+                    children = [_Node(node.constraints, paths, node.bounds, conflicts, stats["nodes"])]
+                    stats["nodes"] += 1
+                    break
+                children.append(_Node(constraints, paths, bounds, conflicts, stats["nodes"]))
+                stats["nodes"] += 1
+
+            for child in children:
+                heapq.heappush(by_lb, (child.lb, child.id))
+                if child.cost <= bound:
+                    heapq.heappush(focal, (len(child.conflicts), child.cost, child.id, child))
+                else:
+                    heapq.heappush(by_cost, (child.cost, child.id, child))
+
+        stats["runtime"] = time.perf_counter() - began
+        return None
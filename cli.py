@@ -0,0 +1,53 @@
+import argparse
+
+import instruments
+import profiling
+import renderers
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--headless", action="store_true",
+                        help="run at full speed without drawing frames or sleeping; messages and results still print")
+    parser.add_argument("--renderer", choices=sorted(renderers.RENDERERS),
+                        help="output backend (default: ansi, or log with --headless)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="print search counters and phase timings after the run")
+    parser.add_argument("--instrument-json", metavar="PATH",
+                        help="write the counters and timings to PATH as JSON")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="run headless under the profiler and write collapsed stacks to PATH")
+    parser.add_argument("--profile-top", type=int, default=15, metavar="N",
+                        help="planner functions to list after a profiled run")
+    parser.add_argument("--profile-match", default=profiling.PLANNERS, metavar="REGEX",
+                        help="functions (module:name) the list is filtered to")
+    return parser.parse_args(argv)
+
+
+def main(run, argv=None):
+    # Shared entry point for the scenario scripts; run() takes a renderer
+    args = parse_args(argv)
+    name = args.renderer or ("log" if args.headless else "ansi")
+    profiler = None
+    if args.profile:
+        # Always headless, so the stacks show the planners rather than sleeps
+        name, profiler = "log", profiling.StackProfiler()
+    renderer = renderers.make(name)
+    go = (lambda: profiler.run(run, renderer)) if profiler else (lambda: run(renderer))
+    if not (args.instrument or args.instrument_json):
+        result = go()
+    else:
+        probe = instruments.enable()
+        try:
+            with probe.phase("run"):
+                result = go()
+        finally:
+            instruments.disable()
+    if args.instrument:
+        print(probe.report())
+    if args.instrument_json:
+        probe.save(args.instrument_json)
+    if profiler:
+        profiler.save(args.profile)
+        print(profiler.top(args.profile_top, args.profile_match))
+    return result
@@ -1,134 +1,229 @@
-import time
-from collections import deque
+import cli
+import grid_search
+from assignment import assign_tasks, balanced
+from distance_field import DistanceField
+from dstar_lite import IncrementalPlanner
+from gridmap import open_map
+from renderers import AnsiRenderer, GridView
+from scheduler import TickScheduler
+from world_state import WorldState
 
 class Firefighter:
-    def __init__(self, agent_id, start_pos, symbol):
-        self.id, self.pos, self.symbol, self.extinguished, self.path = agent_id, start_pos, symbol, [], []
+    __slots__ = ("id", "pos", "symbol", "extinguished", "path")
+
+    def __init__(self, agent_id, start_pos, symbol, world):
+        self.id, self.pos, self.symbol, self.extinguished, self.path = agent_id, start_pos, symbol, [], world.layer()
     
     def bfs(self, start, goals, grid):
-        if not goals: return None, []
-        queue, visited = deque([(start, [])]), {start}
-        while queue:
-            pos, path = queue.popleft()
-            if pos in goals: return pos, path + [pos]
-            for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-                nx, ny = pos[0] + dx, pos[1] + dy
-                if 0 <= nx < len(grid) and 0 <= ny < len(grid[0]) and (nx, ny) not in visited:
-                    visited.add((nx, ny))
-                    queue.append(((nx, ny), path + [pos]))
-        return None, []
+        return grid_search.bfs(grid, start, goals)
 
 
 class FirefightingSystem:
-    def __init__(self):
-        self.rows = 10
-        self.cols = 16
-        self.grid = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+    def __init__(self, engine="bfs", incremental=False, compare=False, spread="simple", seed=None, ignition=0.05,
+                 lookahead=False, workers=2, deadline=0.2, fires=None, grid_map=None, renderer=None):
+        self.renderer = renderer or AnsiRenderer()
+        # grid_map: a map file (gridmap.py) to run on instead of the open field
+        grid_map = open_map(grid_map)
+        if grid_map:
+            self.grid, self.rows, self.cols = grid_map, grid_map.rows, grid_map.cols
+        else:
+            self.rows = 10
+            self.cols = 16
+            self.grid = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        self.view = None
+        if self.renderer.active:
+            self.view = GridView([["⬛ " if v == 1 else "⬜ " for v in row] for row in self.grid], cell_width=3)
+        self.world = WorldState(self.rows, self.cols, self.grid)
+
+        # engine="wavefront" floods with NumPy (needs numpy); default is the BFS core
+        self.wavefront = None
+        if engine == "wavefront":
+            from wavefront import Wavefront
+            self.wavefront = Wavefront(self.grid)
         
         # Initial fires
-        self.fires = [(1, 2), (3, 8), (7, 5), (2, 14), (8, 12), (5, 10)]
+        self.fires = list(fires or (grid_map and grid_map.get("targets"))
+                          or [(1, 2), (3, 8), (7, 5), (2, 14), (8, 12), (5, 10)])
         self.all_fires = list(self.fires)
+        self.initial_fires = len(self.fires)
+
+        # spread="stochastic" runs the NumPy fire model (needs numpy): every
+        # spread event can ignite any number of cells, reproducibly per seed;
+        # the default lights one neighbour of the first fire that has one
+        self.fire_model = None
+        if spread == "stochastic":
+            from fire_model import FireModel
+            self.fire_model = FireModel.from_grid(self.grid, ignition=ignition, seed=seed, burning=self.fires)
+
+        # lookahead=True reorders the zones after every spread with rollouts
+        # of the fire model on `workers` processes, within `deadline` seconds
+        self.planner = None
+        if lookahead:
+            if not self.fire_model:
+                raise ValueError("lookahead needs spread='stochastic'")
+            from rollouts import RolloutPlanner
+            from wavefront import free_mask
+            self.planner = RolloutPlanner(workers=workers, deadline=deadline, seed=seed or 0)
+            self.free = free_mask(self.grid)
         
         # Firefighters
-        self.agent1 = Firefighter(1, (0, 0), "🚒")
-        self.agent2 = Firefighter(2, (self.rows-1, self.cols-1), "🚑")
+        starts = (grid_map and grid_map.get("starts")) or [(0, 0), (self.rows-1, self.cols-1)]
+        self.agent1 = Firefighter(1, starts[0], "🚒", self.world)
+        self.agent2 = Firefighter(2, starts[1], "🚑", self.world)
+        
+        # Optional D* Lite planners that repair each agent's route every step
+        # as fires spread, instead of following a path fixed at the start;
+        # compare=True also plans each one from scratch to report the saving
+        self.incremental = IncrementalPlanner(self.grid, compare=compare) if incremental else None
         
         self.step = 0
         self.spread_interval = 8
         self.time_log = []
         
         self.assign_zones()
+        
+        # Both firefighters move one cell per tick
+        self.scheduler = TickScheduler([self.agent1, self.agent2], self.grid, self.next_route, self.extinguish,
+                                       moved=self.moved, on_tick=self.tick)
+        self.look_ahead()
     
     def assign_zones(self):
-        fires_with_dist = [(f, abs(f[0]-self.agent1.pos[0])+abs(f[1]-self.agent1.pos[1]), 
-                           abs(f[0]-self.agent2.pos[0])+abs(f[1]-self.agent2.pos[1])) for f in self.fires]
-        fires_with_dist.sort(key=lambda x: x[1] - x[2])
-        mid = len(fires_with_dist) // 2
-        self.agent1_fires, self.agent2_fires = [f[0] for f in fires_with_dist[:mid]], [f[0] for f in fires_with_dist[mid:]]
+        # Even split of the fires with the least total travel
+        self.agent1_fires, self.agent2_fires = assign_tasks(
+            self.grid, [self.agent1.pos, self.agent2.pos], self.fires, balanced(self.fires, 2))
+        # One distance field per zone, kept current as fires spread and go out
+        self.fields = {self.agent1.id: DistanceField(self.grid, self.agent1_fires),
+                       self.agent2.id: DistanceField(self.grid, self.agent2_fires)}
+        self.zones = {self.agent1: self.agent1_fires, self.agent2: self.agent2_fires}
+    
+    def look_ahead(self):
+        # Take the target orders whose simulated futures burn the least;
+        # each agent then works through its zone in that order
+        if not self.planner:
+            return
+        agents = [self.agent1, self.agent2]
+        orders = self.planner.plan(self.fire_model, self.free, [a.pos for a in agents],
+                                   [self.zones[a] for a in agents], self.spread_interval, self.step)
+        for agent, order in zip(agents, orders):
+            self.zones[agent][:] = order
+            self.fields[agent.id] = DistanceField(self.grid, order)
+            self.scheduler.replan(agent)
     
     def spread_fire(self):
+        if self.fire_model:
+            new_fires = sorted(self.fire_model.step())
+            for fire in new_fires:
+                self.add_fire(fire)
+            return bool(new_fires)
         new_fires = [(fire[0]+dx, fire[1]+dy) for fire in self.fires for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)] 
                      if 0 <= fire[0]+dx < self.rows and 0 <= fire[1]+dy < self.cols and (fire[0]+dx, fire[1]+dy) not in self.fires]
         if new_fires:
-            fire = new_fires[0]
-            self.fires.append(fire)
-            self.all_fires.append(fire)
-            (self.agent1_fires if abs(fire[0]-self.agent1.pos[0])+abs(fire[1]-self.agent1.pos[1]) < 
-             abs(fire[0]-self.agent2.pos[0])+abs(fire[1]-self.agent2.pos[1]) else self.agent2_fires).append(fire)
+            self.add_fire(new_fires[0])
             return True
         return False
     
+    def add_fire(self, fire):
+        # A new fire goes to the nearer firefighter
+        self.fires.append(fire)
+        self.all_fires.append(fire)
+        agent = (self.agent1 if abs(fire[0]-self.agent1.pos[0])+abs(fire[1]-self.agent1.pos[1]) < 
+                 abs(fire[0]-self.agent2.pos[0])+abs(fire[1]-self.agent2.pos[1]) else self.agent2)
+        (self.agent1_fires if agent is self.agent1 else self.agent2_fires).append(fire)
+        self.fields[agent.id].add_target(fire)
+    
     def visualize(self):
-        print("\n" * 2)
-        print(f"{'='*60}")
-        print(f"COOPERATIVE FIREFIGHTERS - Step {self.step}")
-        print(f"{'='*60}\n")
+        if not self.renderer.active:
+            return
+        header = ["\n" * 2, f"{'='*60}", f"COOPERATIVE FIREFIGHTERS - Step {self.step}", f"{'='*60}\n"]
         
-        for i in range(self.rows):
-            row = ""
-            for j in range(self.cols):
-                if (i, j) == self.agent1.pos:
-                    row += "🚒 "
-                elif (i, j) == self.agent2.pos:
-                    row += "🚑 "
-                elif (i, j) in self.fires:
-                    row += "🔥 "
-                elif (i, j) in self.agent1.extinguished:
-                    row += "\033[94m·\033[0m "
-                elif (i, j) in self.agent2.extinguished:
-                    row += "\033[92m·\033[0m "
-                else:
-                    row += "⬜ "
-            print(row)
+        # Later layers win: extinguished cells, fires, then agents
+        overlay = {}
+        for pos in self.agent2.extinguished:
+            overlay[pos] = "\033[92m·\033[0m "
+        for pos in self.agent1.extinguished:
+            overlay[pos] = "\033[94m·\033[0m "
+        for pos in self.fires:
+            overlay[pos] = "🔥 "
+        overlay[self.agent2.pos] = "🚑 "
+        overlay[self.agent1.pos] = "🚒 "
         
-        print(f"\n🚒 Agent 1 at {self.agent1.pos}, extinguished: {len(self.agent1.extinguished)}")
-        print(f"🚑 Agent 2 at {self.agent2.pos}, extinguished: {len(self.agent2.extinguished)}")
-        print(f"🔥 Active fires: {len(self.fires)}")
-        time.sleep(0.15)
+        footer = [f"\n🚒 Agent 1 at {self.agent1.pos}, extinguished: {len(self.agent1.extinguished)}",
+                  f"🚑 Agent 2 at {self.agent2.pos}, extinguished: {len(self.agent2.extinguished)}",
+                  f"🔥 Active fires: {len(self.fires)}"]
+        self.renderer.grid(self.view, header, overlay, footer, 0.15)
     
-    def extinguish(self, agent, fires_list, symbol):
-        if not fires_list: return False
-        target, path = agent.bfs(agent.pos, fires_list, self.grid)
+    def next_route(self, agent):
+        fires_list = self.zones[agent]
+        if not fires_list: return None
+        if self.planner:
+            # First fire in rollout order that can be reached from here
+            dist, parent = grid_search.bfs_tree(self.grid, [agent.pos])
+            reached = [f for f in fires_list if dist[grid_search.cell_id(f, self.cols)] != grid_search.UNREACHED]
+            target = reached[0] if reached else None
+            path = target and grid_search.reconstruct_path(parent, grid_search.cell_id(target, self.cols), self.cols)
+        elif self.incremental:
+            target, path = self.incremental.path(agent.id, agent.pos, fires_list)
+        elif self.wavefront:
+            target, path = self.wavefront.search(agent.pos, fires_list)
+        else:
+            target, path = self.fields[agent.id].path(agent.pos)
         if target and path:
-            for pos in path:
-                self.step += 1
-                agent.pos = pos
-                if pos not in agent.path: agent.path.append(pos)
-                self.visualize()
-                if self.step % self.spread_interval == 0 and self.spread_fire():
-                    print(f"\n🔥 Fire spread at step {self.step}")
-            agent.extinguished.append(target)
-            self.fires.remove(target)
-            fires_list.remove(target)
-            self.time_log.append((self.step, len(self.fires)))
-            print(f"\n{symbol} extinguished fire at {target}!")
-            time.sleep(0.3)
-            return True
-        return False
+            return target, path[1:]
+        return None
+    
+    def moved(self, agent):
+        agent.path.add(agent.pos)
+        # D* Lite repairs the route after every step
+        if self.incremental and self.scheduler.routes[agent][1]:
+            self.scheduler.replan(agent)
+    
+    def extinguish(self, agent, target):
+        agent.extinguished.append(target)
+        self.fires.remove(target)
+        self.zones[agent].remove(target)
+        self.fields[agent.id].remove_target(target)
+        if self.fire_model:
+            self.fire_model.extinguish(target)
+        self.time_log.append((self.scheduler.tick, len(self.fires)))
+        self.renderer.write(f"\n{agent.symbol} extinguished fire at {target}!")
+        self.renderer.pause(0.3)
+    
+    def tick(self, tick):
+        self.step = tick
+        self.visualize()
+        if self.fires and self.step % self.spread_interval == 0 and self.spread_fire():
+            self.renderer.write(f"\n🔥 Fire spread at step {self.step}")
+            self.look_ahead()
     
     def run(self):
-        print(f"\nStarting Cooperative Firefighting System...\n🚒 Agent 1: {self.agent1.pos}\n🚑 Agent 2: {self.agent2.pos}\n🔥 Fires: {len(self.fires)}")
+        self.renderer.write(f"\nStarting Cooperative Firefighting System...\n🚒 Agent 1: {self.agent1.pos}\n🚑 Agent 2: {self.agent2.pos}\n🔥 Fires: {len(self.fires)}")
         self.visualize()
-        while self.fires:
-            if self.step > 0 and self.step % self.spread_interval == 0 and self.spread_fire():
-                print(f"\n🔥 Fire spread at step {self.step}")
-            if not (self.extinguish(self.agent1, self.agent1_fires, "🚒") or self.extinguish(self.agent2, self.agent2_fires, "🚑")):
-                break
+        self.scheduler.run()
+        if self.planner:
+            self.planner.close()
         self.show_results()
     
     def show_results(self):
-        print(f"\n{'='*60}\nALL FIRES EXTINGUISHED!\n{'='*60}")
-        print(f"Total time: {self.step} steps\n🚒 Agent 1: {len(self.agent1.extinguished)}\n🚑 Agent 2: {len(self.agent2.extinguished)}\nSpread events: {len(self.all_fires)-6}")
-        print(f"\n{'='*60}\nFIRE PROGRESS GRAPH\n{'='*60}\n")
+        banner = "ALL FIRES EXTINGUISHED!" if not self.fires else f"{len(self.fires)} FIRES STILL BURNING"
+        self.renderer.write(f"\n{'='*60}\n{banner}\n{'='*60}")
+        self.renderer.write(f"Total time: {self.step} steps\n🚒 Agent 1: {len(self.agent1.extinguished)}\n🚑 Agent 2: {len(self.agent2.extinguished)}\nSpread events: {len(self.all_fires)-self.initial_fires}")
+        if self.incremental:
+            stats = self.incremental.stats
+            full = f" (full replans: {stats['full_expanded']})" if self.incremental.compare else ""
+            self.renderer.write(f"Incremental replans: {stats['replans']}, nodes expanded: {stats['expanded']}{full}")
+        if self.planner:
+            stats = self.planner.stats
+            self.renderer.write(f"Lookahead: {stats['scored']}/{stats['candidates']} plans scored, "
+                  f"{stats['rollouts']} rollouts in {stats['runtime']:.2f}s")
+        self.renderer.write(f"\n{'='*60}\nFIRE PROGRESS GRAPH\n{'='*60}\n")
         if self.time_log:
             max_fires = max(max(log[1] for log in self.time_log) + 1, len(self.all_fires))
-            print("Fires")
+            self.renderer.write("Fires")
             for fc in range(max_fires, -1, -1):
-                print(f"{fc:2d} |" + "".join("🔥" if fires >= fc else "  " for _, fires in self.time_log))
-            print("   +" + "-" * (len(self.time_log) * 2) + "\n    Time (steps)")
-        print(f"{'='*60}\n")
+                self.renderer.write(f"{fc:2d} |" + "".join("🔥" if fires >= fc else "  " for _, fires in self.time_log))
+            self.renderer.write("   +" + "-" * (len(self.time_log) * 2) + "\n    Time (steps)")
+        self.renderer.write(f"{'='*60}\n")
 
 
 if __name__ == "__main__":
-    system = FirefightingSystem()
-    system.run()
\ No newline at end of file
+    cli.main(lambda renderer: FirefightingSystem(renderer=renderer).run())
\ No newline at end of file
@@ -0,0 +1,140 @@
+from collections import deque
+
+from grid_search import MOVES
+from spatial_index import NearestCellIndex
+
+
+def decompose(free):
+    # Boustrophedon cell decomposition of a set of free grid cells, sweeping
+    # rows top to bottom. Each row splits into runs of free columns; a run
+    # extends the cell above it only while the two overlap one-to-one, so a
+    # new cell starts wherever an obstacle splits or merges the free space.
+    # Returns the cells as lists of (row, first col, last col) runs.
+    by_row = {}
+    for r, c in free:
+        by_row.setdefault(r, []).append(c)
+    cells = []
+    prev, prev_row = [], None  # previous row's runs as (lo, hi, cell index)
+    for r in sorted(by_row):
+        cs = sorted(by_row[r])
+        runs = []
+        lo = cs[0]
+        for a, b in zip(cs, cs[1:]):
+            if b != a + 1:
+                runs.append((lo, a))
+                lo = b
+        runs.append((lo, cs[-1]))
+        if prev_row != r - 1:
+            prev = []
+
+        cur = []
+        for lo, hi in runs:
+            above = [p for p in prev if p[0] <= hi and lo <= p[1]]
+            if len(above) == 1:
+                plo, phi, k = above[0]
+                if sum(1 for q in runs if q[0] <= phi and plo <= q[1]) == 1:
+                    cells[k].append((r, lo, hi))
+                    cur.append((lo, hi, k))
+                    continue
+            cells.append([(r, lo, hi)])
+            cur.append((lo, hi, len(cells) - 1))
+        prev, prev_row = cur, r
+    return cells
+
+
+def shortest_path(start, goal, walkable, blocked=()):
+    # BFS over cells where walkable(pos) holds, avoiding blocked; the path
+    # excludes start and ends on goal, or None when goal can't be reached
+    parent = {start: None}
+    queue = deque([start])
+    while queue:
+        pos = queue.popleft()
+        if pos == goal:
+            path = []
+            while pos != start:
+                path.append(pos)
+                pos = parent[pos]
+            return path[::-1]
+        for dr, dc in MOVES:
+            nxt = (pos[0] + dr, pos[1] + dc)
+            if nxt not in parent and nxt not in blocked and walkable(nxt):
+                parent[nxt] = pos
+                queue.append(nxt)
+    return None
+
+
+def coverage_route(start, area, walkable=None):
+    # One boustrophedon tour over area from start, excluding start: cells of
+    # the decomposition are taken nearest first, each swept row by row in
+    # alternating directions from its nearer corner, and any gap between
+    # consecutive rows or cells is bridged by a shortest path over walkable
+    # cells (default: the area itself).
+    if walkable is None:
+        walkable = set(area).__contains__
+    cells = decompose(area)
+    if not cells:
+        return []
+
+    # Where each cell can be entered: its four corners, with the sweep order
+    # that starts there, indexed for nearest-corner queries
+    entries = {}
+    for k, runs in enumerate(cells):
+        for order in (runs, runs[::-1]):
+            r, lo, hi = order[0]
+            entries.setdefault((r, lo), (k, order, True))
+            entries.setdefault((r, hi), (k, order, False))
+    rows = max(runs[-1][0] for runs in cells) + 1
+    cols = max(hi for runs in cells for _, _, hi in runs) + 1
+    corners = NearestCellIndex(rows, cols, entries)
+
+    route = []
+    pos = start
+    while len(corners):
+        k, runs, left = entries[corners.nearest(pos)]
+        for order in (runs, runs[::-1]):
+            corners.discard((order[0][0], order[0][1]))
+            corners.discard((order[0][0], order[0][2]))
+        for r, lo, hi in runs:
+            cols = range(lo, hi + 1) if left else range(hi, lo - 1, -1)
+            first = (r, cols[0])
+            if first != pos and abs(r - pos[0]) + abs(cols[0] - pos[1]) != 1:
+                bridge = shortest_path(pos, first, walkable)
+                if bridge:
+                    route.extend(bridge[:-1])
+            route.extend((r, c) for c in cols if (r, c) != pos)
+            pos = route[-1] if route else pos
+            left = not left
+    return route
+
+
+class CoverageRoute:
+    # A precomputed coverage tour being followed. Cells that are blocked when
+    # the bot gets to them are skipped and the tour is rejoined by a local
+    # detour, so the whole route is never replanned.
+    def __init__(self, start, area, walkable=None):
+        self.walkable = walkable or set(area).__contains__
+        self.cells = coverage_route(start, area, self.walkable)
+        self.i = 0
+
+    def __len__(self):
+        return len(self.cells) - self.i
+
+    def next(self, pos, blocked=()):
+        # Cell to move to from pos, or None once the tour is used up
+        cells = self.cells
+        while self.i < len(cells):
+            nxt = cells[self.i]
+            if nxt == pos or nxt in blocked:
+                self.i += 1
+                continue
+            if abs(nxt[0] - pos[0]) + abs(nxt[1] - pos[1]) != 1:
+                detour = shortest_path(pos, nxt, self.walkable, blocked)
+                if detour is None:
+                    # Cut off for now; leave it for later
+                    self.i += 1
+                    continue
+                cells[self.i:self.i] = detour[:-1]
+                nxt = cells[self.i]
+            self.i += 1
+            return nxt
+        return None
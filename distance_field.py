@@ -0,0 +1,140 @@
+import heapq
+from array import array
+from collections import deque
+
+import grid_search
+from grid_search import MOVES
+
+INF = 2 ** 31 - 1
+NO_OWNER = -1
+
+
+class DistanceField:
+    # Reverse multi-source BFS from every target ("Dijkstra map"). Each cell
+    # stores its distance to the nearest target and which target that is, so
+    # any agent can read its goal and next step without searching.
+    def __init__(self, grid, targets=(), blocked=(), moves=MOVES):
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.moves = moves
+        self.passable = grid_search.open_cells(grid, blocked)
+        self.targets = set()
+        self.dist = array('i', [INF]) * (self.rows * self.cols)
+        self.owner = array('i', [NO_OWNER]) * (self.rows * self.cols)
+        self.updated = 0  # cells touched by the last update
+
+        queue = deque()
+        for t in targets:
+            tid = grid_search.cell_id(t, self.cols)
+            if tid not in self.targets:
+                self.targets.add(tid)
+                self.dist[tid], self.owner[tid] = 0, tid
+                queue.append(tid)
+        self._bfs(queue)
+
+    def _neighbors(self, cid):
+        r, c = divmod(cid, self.cols)
+        for dr, dc in self.moves:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < self.rows and 0 <= nc < self.cols:
+                yield nr * self.cols + nc
+
+    def _bfs(self, queue):
+        dist, owner, passable = self.dist, self.owner, self.passable
+        touched = len(queue)
+        while queue:
+            cur = queue.popleft()
+            d = dist[cur] + 1
+            for nxt in self._neighbors(cur):
+                if passable[nxt] and dist[nxt] == INF:
+                    dist[nxt], owner[nxt] = d, owner[cur]
+                    queue.append(nxt)
+                    touched += 1
+        self.updated = touched
+
+    def _flood(self, heap):
+        # Dijkstra from seeds with differing start distances; only lowers values
+        dist, owner, passable = self.dist, self.owner, self.passable
+        touched = 0
+        while heap:
+            d, cur, src = heapq.heappop(heap)
+            if d > dist[cur]:
+                continue
+            touched += 1
+            for nxt in self._neighbors(cur):
+                if passable[nxt] and d + 1 < dist[nxt]:
+                    dist[nxt], owner[nxt] = d + 1, src
+                    heapq.heappush(heap, (d + 1, nxt, src))
+        self.updated = touched
+
+    def add_target(self, target):
+        tid = grid_search.cell_id(target, self.cols)
+        if tid in self.targets:
+            return
+        self.targets.add(tid)
+        self.dist[tid], self.owner[tid] = 0, tid
+        self._flood([(0, tid, tid)])
+
+    def remove_target(self, target):
+        tid = grid_search.cell_id(target, self.cols)
+        if tid not in self.targets:
+            return
+        self.targets.discard(tid)
+        dist, owner = self.dist, self.owner
+
+        # Cells that pointed at the removed target form a connected region
+        region = [tid]
+        owner[tid] = NO_OWNER
+        i = 0
+        while i < len(region):
+            for nxt in self._neighbors(region[i]):
+                if owner[nxt] == tid:
+                    owner[nxt] = NO_OWNER
+                    region.append(nxt)
+            i += 1
+        for cid in region:
+            dist[cid] = INF
+
+        # Re-seed the region from its border with the surviving targets
+        heap = []
+        for cid in region:
+            if not self.passable[cid]:
+                continue
+            best = INF
+            for nxt in self._neighbors(cid):
+                if dist[nxt] < best:
+                    best, src = dist[nxt], owner[nxt]
+            if best < INF:
+                dist[cid], owner[cid] = best + 1, src
+                heap.append((best + 1, cid, src))
+        heapq.heapify(heap)
+        self._flood(heap)
+        self.updated += len(region)
+
+    def distance(self, pos):
+        d = self.dist[grid_search.cell_id(pos, self.cols)]
+        return None if d == INF else d
+
+    def nearest(self, pos):
+        src = self.owner[grid_search.cell_id(pos, self.cols)]
+        return None if src == NO_OWNER else grid_search.cell_pos(src, self.cols)
+
+    def next_step(self, pos):
+        # Follow the cell's own target so ties between targets never switch goals
+        cid = grid_search.cell_id(pos, self.cols)
+        d, src = self.dist[cid], self.owner[cid]
+        if d == INF or d == 0:
+            return None
+        for nxt in self._neighbors(cid):
+            if self.dist[nxt] == d - 1 and self.owner[nxt] == src:
+                return grid_search.cell_pos(nxt, self.cols)
+        return None
+
+    def path(self, pos):
+        # Downhill walk to the nearest target; includes pos, like grid_search.bfs
+        target = self.nearest(pos)
+        if target is None:
+            return None, []
+        path = [pos]
+        while path[-1] != target:
+            path.append(self.next_step(path[-1]))
+        return target, path
@@ -0,0 +1,180 @@
+import heapq
+
+from grid_search import MOVES
+
+INF = float('inf')
+
+
+class DStarLite:
+    # Incremental planner (D* Lite, Koenig & Likhachev) on a 4-connected grid.
+    # It searches backwards from the goals, so the start may move and cells
+    # may open or close between calls; plan() then repairs only the part of
+    # the search tree the changes affected. Several goals act as one
+    # super-goal, so goals can also be added or removed incrementally.
+    def __init__(self, grid, start, goals, blocked=(), moves=MOVES):
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.moves = moves
+        self.static = {(r, c) for r in range(self.rows) for c in range(self.cols) if grid[r][c] == 1}
+        self.walls = self.static | set(blocked)
+        self.goals = set(goals)
+        self.start = self.last = start
+        self.km = 0
+        self.g, self.rhs = {}, {}
+        self.open, self.in_open = [], {}
+        self.expanded = 0       # expansions of the last plan() call
+        self.total_expanded = 0
+        for goal in self.goals:
+            self.rhs[goal] = 0
+            self._push(goal)
+
+    def _h(self, pos):
+        return abs(pos[0] - self.start[0]) + abs(pos[1] - self.start[1])
+
+    def _key(self, pos):
+        m = min(self.g.get(pos, INF), self.rhs.get(pos, INF))
+        return (m + self._h(pos) + self.km, m)
+
+    def _push(self, pos):
+        key = self._key(pos)
+        self.in_open[pos] = key
+        heapq.heappush(self.open, (key, pos))
+
+    def _neighbors(self, pos):
+        r, c = pos
+        for dr, dc in self.moves:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < self.rows and 0 <= nc < self.cols:
+                yield (nr, nc)
+
+    def _update(self, pos):
+        if pos not in self.goals:
+            best = INF
+            if pos not in self.walls:
+                for nxt in self._neighbors(pos):
+                    if nxt not in self.walls:
+                        best = min(best, self.g.get(nxt, INF) + 1)
+            self.rhs[pos] = best
+        self.in_open.pop(pos, None)
+        if self.g.get(pos, INF) != self.rhs.get(pos, INF):
+            self._push(pos)
+
+    def _top_key(self):
+        while self.open:
+            key, pos = self.open[0]
+            if self.in_open.get(pos) == key:
+                return key
+            heapq.heappop(self.open)
+        return (INF, INF)
+
+    def plan(self):
+        self.expanded = 0
+        g, rhs = self.g, self.rhs
+        while (self._top_key() < self._key(self.start)
+               or rhs.get(self.start, INF) != g.get(self.start, INF)):
+            if not self.open:
+                break
+            old_key, pos = heapq.heappop(self.open)
+            del self.in_open[pos]
+            new_key = self._key(pos)
+            self.expanded += 1
+            if old_key < new_key:
+                self._push(pos)
+            elif g.get(pos, INF) > rhs.get(pos, INF):
+                g[pos] = rhs[pos]
+                for nxt in self._neighbors(pos):
+                    self._update(nxt)
+            else:
+                g[pos] = INF
+                self._update(pos)
+                for nxt in self._neighbors(pos):
+                    self._update(nxt)
+        self.total_expanded += self.expanded
+        return self.path()
+
+    def path(self):
+        # Greedy descent over g-values; includes the start like grid_search.bfs
+        pos = self.start
+        if self.g.get(pos, INF) == INF:
+            return None, []
+        path = [pos]
+        while pos not in self.goals:
+            pos = min((n for n in self._neighbors(pos) if n not in self.walls),
+                      key=lambda n: self.g.get(n, INF))
+            if self.g.get(pos, INF) == INF or len(path) > self.rows * self.cols:
+                return None, []
+            path.append(pos)
+        return pos, path
+
+    def move_start(self, start):
+        self.start = start
+        self.km += abs(self.last[0] - start[0]) + abs(self.last[1] - start[1])
+        self.last = start
+
+    def set_cells(self, opened=(), closed=()):
+        changed = []
+        for pos in closed:
+            if pos not in self.walls:
+                self.walls.add(pos)
+                changed.append(pos)
+        for pos in opened:
+            if pos in self.walls and pos not in self.static:
+                self.walls.discard(pos)
+                changed.append(pos)
+        for pos in changed:
+            self._update(pos)
+            for nxt in self._neighbors(pos):
+                self._update(nxt)
+
+    def set_goals(self, goals):
+        goals = set(goals)
+        changed = self.goals ^ goals
+        self.goals = goals
+        for pos in changed:
+            if pos in goals:
+                self.rhs[pos] = 0
+                self.in_open.pop(pos, None)
+                if self.g.get(pos, INF) != 0:
+                    self._push(pos)
+            else:
+                self._update(pos)
+
+
+def full_replan_expansions(grid, start, goals, walls, moves=MOVES):
+    # Expansions a from-scratch plan needs on the same state, for comparison
+    planner = DStarLite(grid, start, goals, walls, moves)
+    planner.plan()
+    return planner.expanded
+
+
+class IncrementalPlanner:
+    # Keeps one DStarLite per agent and feeds it the difference between the
+    # dynamic obstacles and goals it saw last tick and the current ones
+    def __init__(self, grid, moves=MOVES, compare=False):
+        self.grid = grid
+        self.moves = moves
+        self.compare = compare
+        self.planners = {}
+        self.dynamic = {}
+        self.stats = {"replans": 0, "expanded": 0, "full_expanded": 0}
+
+    def path(self, key, start, goals, blocked=()):
+        if not goals:
+            return None, []
+        blocked = set(blocked)
+        blocked.discard(start)
+        planner = self.planners.get(key)
+        if planner is None:
+            planner = self.planners[key] = DStarLite(self.grid, start, goals, blocked, self.moves)
+        else:
+            old = self.dynamic[key]
+            planner.move_start(start)
+            planner.set_cells(opened=old - blocked, closed=blocked - old)
+            planner.set_goals(goals)
+        self.dynamic[key] = blocked
+        target, path = planner.plan()
+
+        self.stats["replans"] += 1
+        self.stats["expanded"] += planner.expanded
+        if self.compare:
+            self.stats["full_expanded"] += full_replan_expansions(self.grid, start, goals, blocked, self.moves)
+        return target, path
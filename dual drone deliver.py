@@ -1,12 +1,22 @@
 import heapq
-import time
+
+import cli
+import instruments
+from assignment import assign_tasks, balanced
+from gridmap import open_map
+from jps import JumpPointSearch
+from renderers import AnsiRenderer, GridView
+from scheduler import TickScheduler
 
 class Drone:
+    __slots__ = ("id", "pos", "path", "target", "expanded")
+
     def __init__(self, drone_id, start_pos):
         self.id = drone_id
         self.pos = start_pos
         self.path = []
         self.target = None
+        self.expanded = 0
     
     def a_star(self, start, goal, grid):
         def h(p1, p2):
@@ -15,21 +25,29 @@ class Drone:
         open_set = [(0, start)]
         came_from = {}
         g_score = {start: 0}
+        closed = set()
         
         while open_set:
             _, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            closed.add(current)
+            self.expanded += 1
             
             if current == goal:
                 path = []
                 while current in came_from:
                     path.append(current)
                     current = came_from[current]
+                if instruments.active:
+                    instruments.active.search("drone.a_star", len(closed), len(g_score))
                 return path[::-1]
             
             for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
                 neighbor = (current[0] + dx, current[1] + dy)
                 
-                if (0 <= neighbor[0] < len(grid) and 0 <= neighbor[1] < len(grid[0])):
+                if (0 <= neighbor[0] < len(grid) and 0 <= neighbor[1] < len(grid[0])
+                    and grid[neighbor[0]][neighbor[1]] != 1 and neighbor not in closed):
                     tentative_g = g_score[current] + 1
                     
                     if neighbor not in g_score or tentative_g < g_score[neighbor]:
@@ -38,162 +56,154 @@ class Drone:
                         heapq.heappush(open_set, (f_score, neighbor))
                         came_from[neighbor] = current
         
+        if instruments.active:
+            instruments.active.search("drone.a_star", len(closed), len(g_score))
         return []
 
 
 class DeliverySystem:
-    def __init__(self):
-        self.rows = 12
-        self.cols = 20
-        self.grid = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
-        
-        self.drone1 = Drone(1, (0, 0))
-        self.drone2 = Drone(2, (self.rows-1, self.cols-1))
+    def __init__(self, engine="astar", grid_map=None, renderer=None):
+        self.renderer = renderer or AnsiRenderer()
+        # grid_map: a map file (gridmap.py) to fly over instead of open sky
+        grid_map = open_map(grid_map)
+        if grid_map:
+            self.grid, self.rows, self.cols = grid_map, grid_map.rows, grid_map.cols
+        else:
+            self.rows = 12
+            self.cols = 20
+            self.grid = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        self.view = None
+        if self.renderer.active:
+            self.view = GridView([["⬛ " if v == 1 else "⬜ " for v in row] for row in self.grid], cell_width=3)
+
+        # engine="wavefront" floods with NumPy (needs numpy), engine="jps" uses
+        # Jump Point Search; default is Drone.a_star
+        self.wavefront = None
+        if engine == "wavefront":
+            from wavefront import Wavefront
+            self.wavefront = Wavefront(self.grid)
+        self.jps = JumpPointSearch(self.grid) if engine == "jps" else None
+        
+        starts = (grid_map and grid_map.get("starts")) or [(0, 0), (self.rows-1, self.cols-1)]
+        self.drone1 = Drone(1, starts[0])
+        self.drone2 = Drone(2, starts[1])
         
         # Delivery goals (destinations)
-        self.goals = [(2, 18), (5, 3), (9, 10), (7, 15)]
+        self.goals = (grid_map and grid_map.get("targets")) or [(2, 18), (5, 3), (9, 10), (7, 15)]
         self.delivered = []  # Track delivered packages
-        self.coverage = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        self.coverage = {}  # cell -> times flown over
         self.step = 0
         
         self.assign_packages()
+        
+        # Both drones fly one cell per tick
+        self.scheduler = TickScheduler([self.drone1, self.drone2], self.grid, self.next_route, self.deliver,
+                                       moved=self.moved, on_tick=self.tick)
     
     def assign_packages(self):
-        # Greedy assignment: assign nearest goals
-        available = list(self.goals)
-        
-        # Drone 1 gets nearest goal
-        dist1 = [(self.manhattan(self.drone1.pos, p), p) for p in available]
-        dist1.sort()
-        self.drone1.target = dist1[0][1]
-        available.remove(self.drone1.target)
-        
-        # Drone 2 gets nearest from remaining
-        dist2 = [(self.manhattan(self.drone2.pos, p), p) for p in available]
-        dist2.sort()
-        self.drone2.target = dist2[0][1]
-        available.remove(self.drone2.target)
-        
-        # Assign remaining goals
-        self.drone1_goals = [self.drone1.target]
-        self.drone2_goals = [self.drone2.target]
-        
-        for goal in available:
-            d1 = self.manhattan(self.drone1.target, goal)
-            d2 = self.manhattan(self.drone2.target, goal)
-            if d1 < d2:
-                self.drone1_goals.append(goal)
-            else:
-                self.drone2_goals.append(goal)
+        # Even split of the goals with the least total flight distance; each
+        # drone starts with its nearest goal
+        self.drone1_goals, self.drone2_goals = assign_tasks(
+            self.grid, [self.drone1.pos, self.drone2.pos], self.goals, balanced(self.goals, 2))
+        self.drone1.target = self.drone1_goals[0] if self.drone1_goals else None
+        self.drone2.target = self.drone2_goals[0] if self.drone2_goals else None
+        self.assigned = {self.drone1: self.drone1_goals, self.drone2: self.drone2_goals}
+        self.symbols = {self.drone1: "🚁", self.drone2: "🚂"}
+    
+    def plan(self, drone, target):
+        if self.wavefront:
+            return self.wavefront.search(drone.pos, [target])[1][1:]
+        if self.jps:
+            path = self.jps.search(drone.pos, target)
+            drone.expanded += self.jps.expanded
+            return path
+        return drone.a_star(drone.pos, target, self.grid)
+    
+    def next_route(self, drone):
+        goals = self.assigned[drone]
+        if not goals:
+            return None
+        drone.target = goals[0]
+        return drone.target, self.plan(drone, drone.target)
     
-    def manhattan(self, p1, p2):
-        return abs(p1[0] - p2[0]) + abs(p1[1] - p2[1])
+    def moved(self, drone):
+        drone.path.append(drone.pos)
+        self.coverage[drone.pos] = self.coverage.get(drone.pos, 0) + 1
+    
+    def deliver(self, drone, target):
+        # Mark as delivered
+        self.goals.remove(target)
+        self.delivered.append(target)
+        self.assigned[drone].pop(0)
+        self.renderer.write(f"\n{self.symbols[drone]} Drone {drone.id} delivered to {target}!")
+        self.renderer.pause(0.5)
+    
+    def tick(self, tick):
+        self.step = tick
+        self.visualize()
     
     def visualize(self):
-        print("\n" * 2)
-        print(f"{'='*70}")
-        print(f"DUAL DRONE DELIVERY - Step {self.step}")
-        print(f"{'='*70}\n")
-        
-        for i in range(self.rows):
-            row = ""
-            for j in range(self.cols):
-                if (i, j) == self.drone1.pos:
-                    row += "🚁 "
-                elif (i, j) == self.drone2.pos:
-                    row += "🚂 "
-                elif (i, j) in self.delivered:
-                    row += "📦 "  # Delivered package
-                elif (i, j) in self.goals:
-                    row += "🎯 "  # Delivery goal
-                elif (i, j) in self.drone1.path:
-                    row += "\033[94m·\033[0m "
-                elif (i, j) in self.drone2.path:
-                    row += "\033[92m·\033[0m "
-                else:
-                    row += "⬜ "
-            print(row)
-        
-        print(f"\n🚁 Drone 1 at {self.drone1.pos}, target: {self.drone1.target}")
-        print(f"🚂 Drone 2 at {self.drone2.pos}, target: {self.drone2.target}")
-        print(f"🎯 Goals remaining: {len(self.goals)} | 📦 Delivered: {len(self.delivered)}")
-        time.sleep(0.15)
+        if not self.renderer.active:
+            return
+        header = ["\n" * 2, f"{'='*70}", f"DUAL DRONE DELIVERY - Step {self.step}", f"{'='*70}\n"]
+        
+        # Later layers win: trails, goals, delivered packages, then drones
+        overlay = {}
+        for pos in self.drone2.path:
+            overlay[pos] = "\033[92m·\033[0m "
+        for pos in self.drone1.path:
+            overlay[pos] = "\033[94m·\033[0m "
+        for pos in self.goals:
+            overlay[pos] = "🎯 "  # Delivery goal
+        for pos in self.delivered:
+            overlay[pos] = "📦 "  # Delivered package
+        overlay[self.drone2.pos] = "🚂 "
+        overlay[self.drone1.pos] = "🚁 "
+        
+        footer = [f"\n🚁 Drone 1 at {self.drone1.pos}, target: {self.drone1.target}",
+                  f"🚂 Drone 2 at {self.drone2.pos}, target: {self.drone2.target}",
+                  f"🎯 Goals remaining: {len(self.goals)} | 📦 Delivered: {len(self.delivered)}"]
+        self.renderer.grid(self.view, header, overlay, footer, 0.15)
     
     def run(self):
-        print("\nStarting Dual Drone Delivery System...")
-        print(f"🚁 Drone 1 starts at {self.drone1.pos}")
-        print(f"🚂 Drone 2 starts at {self.drone2.pos}")
-        print(f"\n🎯 Delivery goals: {self.goals}")
-        print(f"Drone 1 assigned: {self.drone1_goals}")
-        print(f"Drone 2 assigned: {self.drone2_goals}")
+        self.renderer.write("\nStarting Dual Drone Delivery System...")
+        self.renderer.write(f"🚁 Drone 1 starts at {self.drone1.pos}")
+        self.renderer.write(f"🚂 Drone 2 starts at {self.drone2.pos}")
+        self.renderer.write(f"\n🎯 Delivery goals: {self.goals}")
+        self.renderer.write(f"Drone 1 assigned: {self.drone1_goals}")
+        self.renderer.write(f"Drone 2 assigned: {self.drone2_goals}")
         
         self.visualize()
         
-        total_time = 0
-        
-        # Deliver to all goals
-        while self.drone1_goals or self.drone2_goals:
-            # Drone 1 delivery
-            if self.drone1_goals:
-                target = self.drone1_goals[0]
-                path = self.drone1.a_star(self.drone1.pos, target, self.grid)
-                
-                for pos in path:
-                    self.step += 1
-                    self.drone1.pos = pos
-                    self.drone1.path.append(pos)
-                    self.coverage[pos[0]][pos[1]] += 1
-                    self.visualize()
-                
-                # Mark as delivered
-                self.goals.remove(target)
-                self.delivered.append(target)
-                self.drone1_goals.pop(0)
-                print(f"\n🚁 Drone 1 delivered to {target}!")
-                time.sleep(0.5)
-                total_time = max(total_time, self.step)
-            
-            # Drone 2 delivery
-            if self.drone2_goals:
-                target = self.drone2_goals[0]
-                path = self.drone2.a_star(self.drone2.pos, target, self.grid)
-                
-                for pos in path:
-                    self.step += 1
-                    self.drone2.pos = pos
-                    self.drone2.path.append(pos)
-                    self.coverage[pos[0]][pos[1]] += 1
-                    self.visualize()
-                
-                # Mark as delivered
-                self.goals.remove(target)
-                self.delivered.append(target)
-                self.drone2_goals.pop(0)
-                print(f"\n🚂 Drone 2 delivered to {target}!")
-                time.sleep(0.5)
-                total_time = max(total_time, self.step)
+        # Deliver to all goals, both drones at once
+        total_time = self.scheduler.run()
         
         self.show_results(total_time)
     
     def show_results(self, total_time):
-        print(f"\n{'='*70}")
-        print(f"DELIVERY COMPLETE!")
-        print(f"{'='*70}")
-        print(f"Total delivery time: {total_time} steps")
-        print(f"🚁 Drone 1 path length: {len(self.drone1.path)} steps")
-        print(f"🚂 Drone 2 path length: {len(self.drone2.path)} steps")
+        self.renderer.write(f"\n{'='*70}")
+        self.renderer.write(f"DELIVERY COMPLETE!")
+        self.renderer.write(f"{'='*70}")
+        self.renderer.write(f"Total delivery time: {total_time} steps")
+        self.renderer.write(f"🚁 Drone 1 path length: {len(self.drone1.path)} steps")
+        self.renderer.write(f"🚂 Drone 2 path length: {len(self.drone2.path)} steps")
+        self.renderer.write(f"Node expansions: 🚁 {self.drone1.expanded} | 🚂 {self.drone2.expanded}")
         
         # Coverage heatmap
-        print(f"\n{'='*70}")
-        print("COVERAGE HEATMAP")
-        print(f"{'='*70}\n")
+        if not self.renderer.active:
+            return
+        self.renderer.write(f"\n{'='*70}")
+        self.renderer.write("COVERAGE HEATMAP")
+        self.renderer.write(f"{'='*70}\n")
         
-        max_visits = max(max(row) for row in self.coverage)
+        max_visits = max(self.coverage.values(), default=0)
         for i in range(self.rows):
             row = ""
             for j in range(self.cols):
-                visits = self.coverage[i][j]
-                if visits == 0:
+                visits = self.coverage.get((i, j), 0)
+                if self.grid[i][j] == 1:
+                    row += "⬛ "
+                elif visits == 0:
                     row += "⬜ "
                 elif visits <= max_visits // 3:
                     row += "\033[92m█\033[0m "  # Light
@@ -201,12 +211,11 @@ class DeliverySystem:
                     row += "\033[93m█\033[0m "  # Medium
                 else:
                     row += "\033[91m█\033[0m "  # Heavy
-            print(row)
+            self.renderer.write(row)
         
-        print(f"\n\033[92m█\033[0m Low coverage  \033[93m█\033[0m Medium coverage  \033[91m█\033[0m High coverage")
-        print(f"{'='*70}\n")
+        self.renderer.write(f"\n\033[92m█\033[0m Low coverage  \033[93m█\033[0m Medium coverage  \033[91m█\033[0m High coverage")
+        self.renderer.write(f"{'='*70}\n")
 
 
 if __name__ == "__main__":
-    system = DeliverySystem()
-    system.run()
\ No newline at end of file
+    cli.main(lambda renderer: DeliverySystem(renderer=renderer).run())
\ No newline at end of file
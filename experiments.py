@@ -0,0 +1,240 @@
+import argparse
+import ast
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import scenarios
+from gridmap import GridMap, random_grid
+
+
+def _layout(rows, cols, density, starts, targets=0, drop=0):
+    # Episode generator for a scenario run on a map file: a random map of
+    # its default size, walls at `density` cut to one connected part, with
+    # distinct "starts", "targets" and "drop" cells drawn on it
+    def generate(rng):
+        grid, free = random_grid(rows, cols, density, rng)
+        cells = rng.sample(free, min(len(free), starts + targets + drop))
+        points = {"starts": cells[:starts], "targets": cells[starts:starts + targets]}
+        if drop:
+            points["drop"] = cells[starts + targets:]
+        return {"grid_map": GridMap.from_grid(grid, points)}
+    return generate
+
+
+def _halves(rows, cols, density):
+    # Painting's generator: robot A paints the left half of the map and B
+    # the right half, so each starts in its own half
+    def generate(rng):
+        grid, free = random_grid(rows, cols, density, rng)
+        starts = [rng.choice([p for p in free if (p[1] < cols // 2) == left]) for left in (True, False)]
+        return {"grid_map": GridMap.from_grid(grid, {"starts": starts})}
+    return generate
+
+
+def _seeded(generate):
+    # Also draws the scenario's own seed
+    return lambda rng: dict(generate(rng), seed=rng.randrange(2 ** 32))
+
+
+# Metrics of a finished run, from what each scenario's runner returns: the
+# system, or main()'s result for cleaning and path planners. Any of steps,
+# moves, waits, tasks and load (finished tasks per agent) may be missing.
+def _scheduled(done=None):
+    # TickScheduler scenarios; `done` names the agents' finished-task list
+    def metrics(system):
+        scheduler = system.scheduler
+        result = {"steps": scheduler.tick, "moves": scheduler.stats["moves"], "waits": scheduler.stats["waits"]}
+        if done:
+            result["load"] = [len(getattr(agent, done)) for agent in scheduler.agents]
+        return result
+    return metrics
+
+
+def _drones(system):
+    return dict(_scheduled()(system), tasks=len(system.delivered))
+
+
+def _cleaning(result):
+    bot1, bot2, step = result
+    return {"steps": step, "load": [len(bot1.cleaned), len(bot2.cleaned)]}
+
+
+def _path_planners(paths):
+    if paths is None:
+        return {"steps": 0, "tasks": 0}
+    moves = sum(a != b for path in paths for a, b in zip(path, path[1:]))
+    return {"steps": len(paths[0]) - 1, "moves": moves, "tasks": len(paths)}
+
+
+def _maze(system):
+    return {"steps": system.step, "load": [len(system.collected[name]) for name in "AB"]}
+
+
+def _painting(system):
+    return {"steps": system.step, "load": [len(system.robot_a.painted), len(system.robot_b.painted)]}
+
+
+def _exploration(system):
+    return {"steps": system.step, "load": [len(agent.explored) for agent in system.agents]}
+
+
+# name -> (episode generator, metrics). A generator takes a seeded Random
+# and returns the options that make a new instance of the scenario.
+EPISODES = {
+    "cleaning": (_layout(6, 8, 0.1, 2), _cleaning),
+    "path_planners": (_layout(5, 6, 0.2, 2, 2), _path_planners),
+    "maze": (_layout(7, 9, 0.3, 2, 3), _maze),
+    "rescue": (_layout(7, 12, 0.2, 2, 4), _scheduled("rescued")),
+    "warehouse": (_layout(5, 10, 0.15, 2, 4, 1), _scheduled("collected")),
+    "firefighters": (_seeded(_layout(10, 16, 0.1, 2, 6)), _scheduled("extinguished")),
+    "drones": (_layout(12, 20, 0.1, 2, 4), _drones),
+    "painting": (_halves(8, 16, 0.1), _painting),
+    "exploration": (_layout(8, 12, 0.0, 3), _exploration),
+    "resources": (_layout(10, 16, 0.1, 3, 8), _scheduled("collected")),
+}
+
+
+def episode(name, seed, index, options=None):
+    # Runs episode `index` of the batch seeded with `seed` headless and
+    # returns its metrics; the same (seed, index) always gives the same map.
+    # options override the generated ones.
+    generate, metrics = EPISODES[name]
+    rng = random.Random(f"{name}:{seed}:{index}")
+    opts = generate(rng)
+    opts.update(options or {})
+    result = metrics(scenarios.run(name, **opts))
+    load = result.get("load")
+    if load is not None:
+        result.setdefault("tasks", sum(load))
+    if result.get("moves"):
+        result["efficiency"] = result["tasks"] / result["moves"]
+    result["episode"] = index
+    return result
+
+
+def run_chunk(name, seed, start, stop, options=None):
+    return [episode(name, seed, i, options) for i in range(start, stop)]
+
+
+class Summary:
+    # Streaming aggregate of episode metrics: count, mean and spread
+    # (Welford), min and max per metric, plus each agent's mean load and
+    # the gap between the busiest and idlest agent. Metrics an episode
+    # doesn't report are left out of their aggregates.
+    METRICS = ("steps", "tasks", "moves", "efficiency", "waits", "imbalance")
+
+    def __init__(self):
+        self.episodes = 0
+        self.stats = {key: [0, 0.0, 0.0, math.inf, -math.inf] for key in self.METRICS}  # n, mean, M2, min, max
+        self.load = []
+
+    def add(self, result):
+        self.episodes += 1
+        load = result.get("load") or []
+        values = dict(result)
+        if load:
+            values["imbalance"] = max(load) - min(load)
+        for key in self.METRICS:
+            if key not in values:
+                continue
+            x = values[key]
+            s = self.stats[key]
+            s[0] += 1
+            delta = x - s[1]
+            s[1] += delta / s[0]
+            s[2] += delta * (x - s[1])
+            s[3], s[4] = min(s[3], x), max(s[4], x)
+        if len(self.load) < len(load):
+            self.load.extend([0] * (len(load) - len(self.load)))
+        for k, tasks in enumerate(load):
+            self.load[k] += tasks
+
+    def mean(self, key):
+        return self.stats[key][1]
+
+    def std(self, key):
+        n, _, m2 = self.stats[key][:3]
+        return math.sqrt(m2 / (n - 1)) if n > 1 else 0.0
+
+    def report(self):
+        lines = [f"{self.episodes} episodes",
+                 f"{'metric':<11}{'mean':>10}{'std':>10}{'min':>10}{'max':>10}"]
+        for key in self.METRICS:
+            s = self.stats[key]
+            if s[0]:
+                lines.append(f"{key:<11}{s[1]:>10.3f}{self.std(key):>10.3f}{s[3]:>10.3f}{s[4]:>10.3f}")
+        if self.load:
+            shares = " ".join(f"{tasks / max(self.episodes, 1):.2f}" for tasks in self.load)
+            lines.append(f"mean load per agent: {shares}")
+        return "\n".join(lines)
+
+
+def run_batch(name, episodes, seed=0, workers=None, chunk=None, options=None, on_episode=None):
+    # Runs episodes 0..episodes-1 over a process pool (workers=0 runs them
+    # inline) in chunks of `chunk`, so each dispatch carries enough work to
+    # hide the pickling round trip. Results stream into a Summary as chunks
+    # finish; on_episode(result) sees every episode too.
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunk is None:
+        chunk = max(1, min(256, episodes // (4 * max(workers, 1))))
+    summary = Summary()
+    bounds = [(i, min(i + chunk, episodes)) for i in range(0, episodes, chunk)]
+
+    def collect(results):
+        for result in results:
+            summary.add(result)
+            if on_episode:
+                on_episode(result)
+
+    if not workers:
+        for start, stop in bounds:
+            collect(run_chunk(name, seed, start, stop, options))
+        return summary
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(run_chunk, name, seed, start, stop, options) for start, stop in bounds]
+        for future in as_completed(futures):
+            collect(future.result())
+    return summary
+
+
+def _option(text):
+    key, _, value = text.partition("=")
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return key, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded random episodes of a scenario headless.")
+    parser.add_argument("scenario", choices=sorted(EPISODES))
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="processes (default: one per core, 0 runs inline)")
+    parser.add_argument("--chunk", type=int, help="episodes per dispatch")
+    parser.add_argument("--option", type=_option, action="append", default=[],
+                        help="scenario option as key=value, e.g. spread='stochastic'")
+    parser.add_argument("--out", help="write each episode's metrics to this file as JSON lines")
+    args = parser.parse_args(argv)
+
+    out = open(args.out, "w") if args.out else None
+    began = time.perf_counter()
+    try:
+        summary = run_batch(args.scenario, args.episodes, args.seed, args.workers, args.chunk, dict(args.option),
+                            on_episode=(lambda result: out.write(json.dumps(result) + "\n")) if out else None)
+    finally:
+        if out:
+            out.close()
+    print(summary.report())
+    print(f"{time.perf_counter() - began:.2f}s")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import numpy as np
+
+from grid_search import MOVES
+
+
+class FireModel:
+    # Stochastic cellular-automaton fire. Each step every unburnt cell with
+    # fuel ignites with probability 1 - prod(1 - p) over its burning
+    # neighbours, where p is the cell's ignition probability scaled by how
+    # well the wind lines up with the direction the fire would travel.
+    # Burning cells use up one unit of fuel per step and go out at zero.
+    # The whole grid is updated with array shifts, one random draw per cell,
+    # so a step costs the same few passes over memory at any fire size.
+    #
+    # ignition and fuel are a scalar or a (rows, cols) array; fuel=None
+    # burns forever and a fuel of 0 never catches (walls, water). wind is a
+    # (dr, dc) vector: a unit of wind along a move doubles p that way and
+    # a unit against it stops spread in that direction.
+    def __init__(self, rows, cols, ignition=0.1, fuel=None, wind=(0, 0), seed=None, burning=()):
+        self.rows, self.cols = rows, cols
+        self.ignition = np.broadcast_to(np.asarray(ignition, dtype=np.float32), (rows, cols))
+        if fuel is None:
+            fuel = np.inf
+        self.fuel = np.array(np.broadcast_to(np.asarray(fuel, dtype=np.float64), (rows, cols)))
+        self.burning = np.zeros((rows, cols), dtype=bool)
+        self.rng = np.random.default_rng(seed)
+        self.set_wind(wind)
+        self.burned_out = set()  # cells that ran out of fuel in the last step
+        self.ignite(burning)
+
+    @classmethod
+    def from_grid(cls, grid, **options):
+        # Model over a scenario grid; walls (1) have no fuel
+        walls = np.asarray(grid) == 1
+        fuel = options.pop("fuel", None)
+        fuel = np.broadcast_to(np.inf if fuel is None else np.asarray(fuel, dtype=np.float64), walls.shape)
+        return cls(walls.shape[0], walls.shape[1], fuel=np.where(walls, 0.0, fuel), **options)
+
+    def set_wind(self, wind):
+        self.wind = wind
+        # Per move: the ignition probability for fire travelling that way
+        self.spread = [(dr, dc, np.clip(self.ignition * np.float32(1 + dr * wind[0] + dc * wind[1]), 0, 1))
+                       for dr, dc in MOVES]
+
+    def ignite(self, cells):
+        for r, c in cells:
+            if self.fuel[r, c] > 0:
+                self.burning[r, c] = True
+
+    def extinguish(self, pos):
+        self.burning[pos] = False
+
+    def step(self):
+        # Advance one step; returns the set of newly ignited cells
+        burning, rows, cols = self.burning, self.rows, self.cols
+        unlit = np.ones((rows, cols), dtype=np.float32)
+        for dr, dc, p in self.spread:
+            # Cells at (r, c) catch from a burning (r - dr, c - dc)
+            dst = (slice(max(dr, 0), rows + min(dr, 0)), slice(max(dc, 0), cols + min(dc, 0)))
+            src = (slice(max(-dr, 0), rows + min(-dr, 0)), slice(max(-dc, 0), cols + min(-dc, 0)))
+            unlit[dst] *= 1.0 - p[dst] * burning[src]
+        caught = (self.rng.random((rows, cols), dtype=np.float32) >= unlit) & ~burning & (self.fuel > 0)
+
+        self.fuel[burning] -= 1
+        out = burning & (self.fuel <= 0)
+        burning &= ~out
+        burning |= caught
+        self.burned_out = set(zip(*map(np.ndarray.tolist, np.nonzero(out))))
+        return set(zip(*map(np.ndarray.tolist, np.nonzero(caught))))
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+
+import grid_search
+from grid_search import MOVES, UNREACHED
+
+
+class DistanceCache:
+    # Reverse-BFS distance tables for fixed goals on one grid. Tables are keyed
+    # by (goal, grid version), evicted least-recently-used under an entry and
+    # byte cap, and dropped whenever a cell changes through set_cell().
+    def __init__(self, grid, max_entries=64, max_bytes=64 * 1024 * 1024, moves=MOVES):
+        self.grid = grid
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.moves = moves
+        self.version = 0
+        self.tables = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = 0
+        self._passable = None
+
+    def set_cell(self, r, c, value):
+        if self.grid[r][c] != value:
+            self.grid[r][c] = value
+            self.invalidate()
+
+    def invalidate(self):
+        self.version += 1
+        self.tables.clear()
+        self.bytes = 0
+        self._passable = None
+
+    def table(self, goal):
+        key = (goal, self.version)
+        dist = self.tables.get(key)
+        if dist is not None:
+            self.hits += 1
+            self.tables.move_to_end(key)
+            return dist
+
+        self.misses += 1
+        if self._passable is None:
+            self._passable = grid_search.open_cells(self.grid)
+        # A goal inside a wall gets a source-less table: nothing can reach it
+        sources = [goal] if self._passable[grid_search.cell_id(goal, self.cols)] else []
+        dist, _ = grid_search.bfs_tree(self.grid, sources, moves=self.moves, passable=self._passable)
+        size = dist.itemsize * len(dist)
+        self.tables[key] = dist
+        self.bytes += size
+        while len(self.tables) > 1 and (len(self.tables) > self.max_entries or self.bytes > self.max_bytes):
+            _, old = self.tables.popitem(last=False)
+            self.bytes -= old.itemsize * len(old)
+        return dist
+
+    def distance(self, pos, goal):
+        d = self.table(goal)[grid_search.cell_id(pos, self.cols)]
+        return None if d == UNREACHED else d
+
+    def path(self, start, goal, blocked=()):
+        # Walk the goal's table downhill from start, stepping around blocked
+        # cells; search only when every downhill step is blocked
+        dist = self.table(goal)
+        cols = self.cols
+        cur = grid_search.cell_id(start, cols)
+        blocked = set(blocked)
+        if dist[cur] == UNREACHED:
+            # Starting inside a wall (e.g. a shelf cell) still allows stepping out
+            if self._passable[cur]:
+                return []
+            return grid_search.bfs(self.grid, start, [goal], blocked, self.moves)[1]
+        path = [start]
+        while dist[cur] > 0:
+            r, c = divmod(cur, cols)
+            for dr, dc in self.moves:
+                nr, nc = r + dr, c + dc
+                if (0 <= nr < self.rows and 0 <= nc < cols and (nr, nc) not in blocked
+                        and dist[nr * cols + nc] == dist[cur] - 1):
+                    cur = nr * cols + nc
+                    path.append((nr, nc))
+                    break
+            else:
+                return grid_search.bfs(self.grid, start, [goal], blocked, self.moves)[1]
+        return path
@@ -1,16 +1,21 @@
-import time
+import cli
+from gridmap import open_map
+from renderers import AnsiRenderer, GridView
+from world_state import WorldState
 
 class PaintingRobot:
-    def __init__(self, robot_id, start_pos, color, symbol):
+    __slots__ = ("id", "pos", "color", "symbol", "painted", "stack", "visited")
+
+    def __init__(self, robot_id, start_pos, color, symbol, world):
         self.id = robot_id
         self.pos = start_pos
         self.color = color
         self.symbol = symbol
-        self.painted = []
+        self.painted = world.layer()
         self.stack = [start_pos]
-        self.visited = set()
+        self.visited = world.layer()
     
-    def paint_next(self, grid, area):
+    def paint_next(self, world, area):
         while self.stack:
             r, c = self.stack.pop()
             
@@ -20,14 +25,13 @@ class PaintingRobot:
             self.visited.add((r, c))
             self.pos = (r, c)
             
-            if grid[r][c] == 0:
-                grid[r][c] = self.id
-                self.painted.append((r, c))
+            if world.claim((r, c), self.id):
+                self.painted.add((r, c))
                 
                 # Add neighbors to stack
                 for dr, dc in [(0,1), (1,0), (0,-1), (-1,0)]:
                     nr, nc = r + dr, c + dc
-                    if 0 <= nr < len(grid) and 0 <= nc < len(grid[0]):
+                    if 0 <= nr < world.rows and 0 <= nc < world.cols:
                         if (nr, nc) not in self.visited and (nr, nc) in area:
                             self.stack.append((nr, nc))
                 
@@ -37,50 +41,53 @@ class PaintingRobot:
 
 
 class GridPaintingSystem:
-    def __init__(self):
-        self.rows = 8
-        self.cols = 16
-        self.grid = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+    def __init__(self, grid_map=None, renderer=None):
+        self.renderer = renderer or AnsiRenderer()
+        # grid_map: a map file (gridmap.py) to paint; its walls stay bare
+        grid_map = open_map(grid_map)
+        self.rows = grid_map.rows if grid_map else 8
+        self.cols = grid_map.cols if grid_map else 16
+        # Each cell is owned by the robot that painted it
+        self.world = WorldState(self.rows, self.cols, grid_map)
+        self.view = None
+        if self.renderer.active:
+            self.view = GridView([["⬜ "] * self.cols for _ in range(self.rows)], cell_width=3)
         
         # Both robots start from specific points
-        self.robot_a = PaintingRobot(1, (0, 0), "blue", "🤖")
-        self.robot_b = PaintingRobot(2, (self.rows-1, self.cols-1), "green", "🦾")
+        starts = (grid_map and grid_map.get("starts")) or [(0, 0), (self.rows-1, self.cols-1)]
+        self.robot_a = PaintingRobot(1, starts[0], "blue", "🤖", self.world)
+        self.robot_b = PaintingRobot(2, starts[1], "green", "🦾", self.world)
         
         # Divide grid vertically: left half for A, right half for B
         mid_col = self.cols // 2
-        self.area_a = [(i, j) for i in range(self.rows) for j in range(mid_col)]
-        self.area_b = [(i, j) for i in range(self.rows) for j in range(mid_col, self.cols)]
+        walkable = self.world.walkable
+        self.area_a = self.world.layer((i, j) for i in range(self.rows) for j in range(mid_col) if walkable((i, j)))
+        self.area_b = self.world.layer((i, j) for i in range(self.rows) for j in range(mid_col, self.cols)
+                                       if walkable((i, j)))
         self.step = 0
     
     def visualize(self):
-        print("\n" * 2)
-        print(f"{'='*60}")
-        print(f"GRID PAINTING AGENTS - Step {self.step}")
-        print(f"{'='*60}\n")
+        if not self.renderer.active:
+            return
+        header = ["\n" * 2, f"{'='*60}", f"GRID PAINTING AGENTS - Step {self.step}", f"{'='*60}\n"]
         
-        for i in range(self.rows):
-            row = ""
-            for j in range(self.cols):
-                if (i, j) == self.robot_a.pos:
-                    row += "🤖 "
-                elif (i, j) == self.robot_b.pos:
-                    row += "🦾 "
-                elif self.grid[i][j] == 1:
-                    row += "\033[94m█\033[0m "  # Blue for Robot A
-                elif self.grid[i][j] == 2:
-                    row += "\033[92m█\033[0m "  # Green for Robot B
-                else:
-                    row += "⬜ "
-            print(row)
+        # Later layers win: painted cells, then the robots
+        overlay = {}
+        for pos in self.robot_b.painted:
+            overlay[pos] = "\033[92m█\033[0m "  # Green for Robot B
+        for pos in self.robot_a.painted:
+            overlay[pos] = "\033[94m█\033[0m "  # Blue for Robot A
+        overlay[self.robot_b.pos] = "🦾 "
+        overlay[self.robot_a.pos] = "🤖 "
         
-        print(f"\n🤖 Robot A at {self.robot_a.pos}, painted: {len(self.robot_a.painted)} cells")
-        print(f"🦾 Robot B at {self.robot_b.pos}, painted: {len(self.robot_b.painted)} cells")
-        time.sleep(0.2)
+        footer = [f"\n🤖 Robot A at {self.robot_a.pos}, painted: {len(self.robot_a.painted)} cells",
+                  f"🦾 Robot B at {self.robot_b.pos}, painted: {len(self.robot_b.painted)} cells"]
+        self.renderer.grid(self.view, header, overlay, footer, 0.2)
     
     def run(self):
-        print("\nStarting Grid Painting...")
-        print(f"🤖 Robot A starts at {self.robot_a.pos}")
-        print(f"🦾 Robot B starts at {self.robot_b.pos}")
+        self.renderer.write("\nStarting Grid Painting...")
+        self.renderer.write(f"🤖 Robot A starts at {self.robot_a.pos}")
+        self.renderer.write(f"🦾 Robot B starts at {self.robot_b.pos}")
         self.visualize()
         
         # Paint one cell at a time alternating between robots
@@ -89,11 +96,11 @@ class GridPaintingSystem:
             painted = False
             
             # Robot A paints next cell
-            if self.robot_a.paint_next(self.grid, self.area_a):
+            if self.robot_a.paint_next(self.world, self.area_a):
                 painted = True
             
             # Robot B paints next cell
-            if self.robot_b.paint_next(self.grid, self.area_b):
+            if self.robot_b.paint_next(self.world, self.area_b):
                 painted = True
             
             if not painted:
@@ -105,20 +112,19 @@ class GridPaintingSystem:
     
     def show_results(self):
         total_cells = len(self.robot_a.painted) + len(self.robot_b.painted)
-        total_grid = self.rows * self.cols
+        total_grid = len(self.area_a) + len(self.area_b)
         coverage = (total_cells / total_grid) * 100
         
-        print(f"\n{'='*60}")
-        print(f"PAINTING COMPLETE!")
-        print(f"{'='*60}")
-        print(f"Total cells painted: {total_cells}/{total_grid}")
-        print(f"Coverage: {coverage:.1f}%")
-        print(f"\033[94m█\033[0m Robot A: {len(self.robot_a.painted)} cells (left half)")
-        print(f"\033[92m█\033[0m Robot B: {len(self.robot_b.painted)} cells (right half)")
-        print(f"Overlap: 0 cells (100% coordination)")
-        print(f"{'='*60}\n")
+        self.renderer.write(f"\n{'='*60}")
+        self.renderer.write(f"PAINTING COMPLETE!")
+        self.renderer.write(f"{'='*60}")
+        self.renderer.write(f"Total cells painted: {total_cells}/{total_grid}")
+        self.renderer.write(f"Coverage: {coverage:.1f}%")
+        self.renderer.write(f"\033[94m█\033[0m Robot A: {len(self.robot_a.painted)} cells (left half)")
+        self.renderer.write(f"\033[92m█\033[0m Robot B: {len(self.robot_b.painted)} cells (right half)")
+        self.renderer.write(f"Overlap: 0 cells (100% coordination)")
+        self.renderer.write(f"{'='*60}\n")
 
 
 if __name__ == "__main__":
-    system = GridPaintingSystem()
-    system.run()
\ No newline at end of file
+    cli.main(lambda renderer: GridPaintingSystem(renderer=renderer).run())
\ No newline at end of file
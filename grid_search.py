@@ -0,0 +1,116 @@
+from array import array
+from collections import deque
+
+import instruments
+
+# Neighbour order used by most scenarios: right, down, left, up
+MOVES = ((0, 1), (1, 0), (0, -1), (-1, 0))
+UNREACHED = -1
+# Byte translation table: 1 (wall) -> 0, any other cell value -> 1
+_OPEN = bytes(0 if v == 1 else 1 for v in range(256))
+
+
+def cell_id(pos, cols):
+    return pos[0] * cols + pos[1]
+
+
+def cell_pos(cid, cols):
+    return divmod(cid, cols)
+
+
+def open_cells(grid, blocked=()):
+    # Flat passability map indexed by cell id: 1 is a wall, any other value is walkable
+    rows, cols = len(grid), len(grid[0])
+    cells = getattr(grid, "cells", None)
+    if cells is not None:
+        # Byte-backed grid (gridmap.GridMap): translate in one pass
+        passable = bytearray(cells).translate(_OPEN)
+    else:
+        passable = bytearray(0 if v == 1 else 1 for row in grid for v in row)
+    for r, c in blocked:
+        if 0 <= r < rows and 0 <= c < cols:
+            passable[r * cols + c] = 0
+    return passable
+
+
+def reconstruct_path(parent, end, cols):
+    path = [end]
+    while parent[path[-1]] != path[-1]:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return [divmod(cid, cols) for cid in path]
+
+
+def _report(name, parent, queue):
+    # Search counts for instruments, read off the parent array afterwards so
+    # the loop carries no counters
+    generated = len(parent) - parent.count(UNREACHED)
+    instruments.active.search(name, generated - len(queue), generated)
+
+
+def bfs(grid, start, goals, blocked=(), moves=MOVES, passable=None):
+    # Shortest path from start to the nearest goal; the path includes start
+    if not goals:
+        return None, []
+    rows, cols = len(grid), len(grid[0])
+    if passable is None:
+        passable = open_cells(grid, blocked)
+    goal_ids = {cell_id(g, cols) for g in goals}
+
+    parent = array('i', [UNREACHED]) * (rows * cols)
+    src = cell_id(start, cols)
+    parent[src] = src
+    queue = deque([src])
+
+    while queue:
+        cur = queue.popleft()
+        if cur in goal_ids:
+            if instruments.active:
+                _report("bfs", parent, queue)
+            return cell_pos(cur, cols), reconstruct_path(parent, cur, cols)
+        r, c = divmod(cur, cols)
+        for dr, dc in moves:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols:
+                nxt = cur + dr * cols + dc
+                if passable[nxt] and parent[nxt] == UNREACHED:
+                    parent[nxt] = cur
+                    queue.append(nxt)
+
+    if instruments.active:
+        _report("bfs", parent, queue)
+    return None, []
+
+
+def bfs_tree(grid, sources, blocked=(), moves=MOVES, passable=None):
+    # Multi-source BFS over the whole grid: distance and parent arrays indexed by cell id
+    rows, cols = len(grid), len(grid[0])
+    if passable is None:
+        passable = open_cells(grid, blocked)
+
+    dist = array('i', [UNREACHED]) * (rows * cols)
+    parent = array('i', [UNREACHED]) * (rows * cols)
+    queue = deque()
+    for s in sources:
+        sid = cell_id(s, cols)
+        if dist[sid] == UNREACHED:
+            dist[sid] = 0
+            parent[sid] = sid
+            queue.append(sid)
+
+    while queue:
+        cur = queue.popleft()
+        d = dist[cur] + 1
+        r, c = divmod(cur, cols)
+        for dr, dc in moves:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols:
+                nxt = cur + dr * cols + dc
+                if passable[nxt] and dist[nxt] == UNREACHED:
+                    dist[nxt] = d
+                    parent[nxt] = cur
+                    queue.append(nxt)
+
+    if instruments.active:
+        _report("bfs_tree", parent, queue)
+    return dist, parent
@@ -0,0 +1,151 @@
+import io
+import mmap
+import struct
+from array import array
+
+from grid_search import UNREACHED, bfs_tree
+
+# File layout, little-endian:
+#   header   magic, rows, cols, number of point lists, offset of the cells
+#   lists    per list: name length (uint16), name (utf-8), count (uint32),
+#            then count (row, col) pairs as int32
+#   cells    rows * cols uint8 values, row-major, starting on a page
+#            boundary so rows map straight onto pages
+MAGIC = b"GRIDMAP1"
+HEADER = struct.Struct("<8sIIIQ")
+PAGE = mmap.ALLOCATIONGRANULARITY
+
+
+class GridMap:
+    # A grid stored in a map file and memory-mapped copy-on-write: grid[r][c]
+    # reads one byte of the mapping, so only the pages a scenario touches are
+    # ever read, and writes stay private to this process. It passes for the
+    # list-of-lists grids the scenarios use (len(), grid[r], grid[r][c],
+    # iteration) and converts to a NumPy array without copying.
+    # points holds the named cell lists saved with it ("starts", "targets").
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._attach(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY), path)
+
+    @classmethod
+    def from_grid(cls, grid, points=None):
+        # A map held in anonymous memory instead of a file, for generated
+        # maps that are used once
+        buffer = io.BytesIO()
+        _write(buffer, grid, points)
+        data = buffer.getbuffer()
+        mapping = mmap.mmap(-1, len(data))
+        mapping.write(data)
+        grid_map = cls.__new__(cls)
+        grid_map._attach(mapping, "<memory>")
+        return grid_map
+
+    def _attach(self, mapping, path):
+        self.mapping = mapping
+        magic, self.rows, self.cols, lists, offset = HEADER.unpack_from(self.mapping)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a grid map")
+        self.points = {}
+        pos = HEADER.size
+        for _ in range(lists):
+            (size,) = struct.unpack_from("<H", self.mapping, pos)
+            name = bytes(self.mapping[pos + 2:pos + 2 + size]).decode()
+            (count,) = struct.unpack_from("<I", self.mapping, pos + 2 + size)
+            pos += 6 + size
+            flat = array('i')
+            flat.frombytes(self.mapping[pos:pos + 8 * count])
+            self.points[name] = list(zip(flat[::2], flat[1::2]))
+            pos += 8 * count
+        self.cells = memoryview(self.mapping)[offset:offset + self.rows * self.cols]
+        self._rows = [None] * self.rows  # row views, made on first use
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, r):
+        row = self._rows[r]
+        if row is None:
+            if r < 0:
+                r += self.rows
+            row = self._rows[r] = self.cells[r * self.cols:(r + 1) * self.cols]
+        return row
+
+    def __iter__(self):
+        return (self[r] for r in range(self.rows))
+
+    def __array__(self, dtype=None, copy=None):
+        import numpy as np
+        arr = np.frombuffer(self.cells, dtype=np.uint8).reshape(self.rows, self.cols)
+        return arr if dtype is None else arr.astype(dtype)
+
+    def get(self, name, default=None):
+        # A saved point list, or default when the map has none by that name
+        return list(self.points[name]) if name in self.points else default
+
+    def close(self):
+        self._rows = [None] * self.rows
+        self.cells.release()
+        self.mapping.close()
+
+
+def save_map(path, grid, points=None):
+    # Writes grid (list of lists of 0-255 ints, a GridMap or a 2-D array)
+    # and the named point lists in the map format
+    with open(path, "wb") as f:
+        _write(f, grid, points)
+
+
+def _write(f, grid, points=None):
+    points = points or {}
+    rows, cols = len(grid), len(grid[0])
+    lists = b""
+    for name, cells in points.items():
+        encoded = name.encode()
+        flat = array('i', [v for cell in cells for v in cell])
+        lists += struct.pack("<H", len(encoded)) + encoded + struct.pack("<I", len(cells)) + flat.tobytes()
+    offset = -(-(HEADER.size + len(lists)) // PAGE) * PAGE
+    f.write(HEADER.pack(MAGIC, rows, cols, len(points), offset) + lists)
+    f.write(bytes(offset - HEADER.size - len(lists)))
+    if isinstance(grid, GridMap):
+        f.write(grid.cells)
+    elif hasattr(grid, "tobytes"):
+        f.write(grid.astype("uint8").tobytes())
+    else:
+        for row in grid:
+            f.write(bytes(row))
+
+
+def load_map(path):
+    return GridMap(path)
+
+
+def open_map(spec):
+    # Scenario grid_map option: a map file path, a loaded GridMap or None
+    if spec is None or isinstance(spec, GridMap):
+        return spec
+    return load_map(spec)
+
+
+def random_grid(rows, cols, density, rng):
+    # rows x cols grid with about `density` walls drawn from rng (a
+    # random.Random), cut down to one connected part holding at least half
+    # the free cells (the biggest part found, if none does) so every free
+    # cell can get to every other one. Returns the grid and its free cells
+    # in row-major order.
+    grid = [[1 if rng.random() < density else 0 for _ in range(cols)] for _ in range(rows)]
+    grid[rows // 2][cols // 2] = 0
+    free = [(r, c) for r in range(rows) for c in range(cols) if grid[r][c] == 0]
+    source, best, best_size = (rows // 2, cols // 2), None, -1
+    for _ in range(100):
+        dist, _ = bfs_tree(grid, [source])
+        size = len(dist) - dist.count(UNREACHED)
+        if size > best_size:
+            best, best_size = dist, size
+        if 2 * size >= len(free):
+            break
+        source = rng.choice(free)
+    for cid, d in enumerate(best):
+        if d == UNREACHED:
+            grid[cid // cols][cid % cols] = 1
+    free = [(r, c) for r in range(rows) for c in range(cols) if grid[r][c] == 0]
+    return grid, free
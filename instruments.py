@@ -0,0 +1,136 @@
+import json
+import time
+from contextlib import nullcontext
+
+# Reports from the planners, renderers and scenarios go to `active`. While it
+# is None every hook is a single falsy check: hot paths read it once per call
+# and only then work out what to report, so nothing is counted per node.
+active = None
+_OFF = nullcontext()
+
+
+class _Phase:
+    # Re-entrant wall-clock timer for one phase name
+    __slots__ = ("calls", "seconds", "_starts")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self._starts = []
+
+    def __enter__(self):
+        self._starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self._starts.pop()
+        self.calls += 1
+
+
+class Histogram:
+    # Count, total, min and max of the observed values, plus a count per
+    # power-of-two bucket (bucket k holds values below 2**k)
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.buckets = {}
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        k = int(value).bit_length()
+        self.buckets[k] = self.buckets.get(k, 0) + 1
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class Instruments:
+    # Counters, histograms and per-phase timers for one or more runs.
+    # Phase times include any phases nested inside them ("run" holds
+    # everything); the report gives each phase's share of "run" when one was
+    # timed, otherwise of the time since the instruments were created.
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.phases = {}
+        self.created = time.perf_counter()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+        hist.add(value)
+
+    def phase(self, name):
+        timer = self.phases.get(name)
+        if timer is None:
+            timer = self.phases[name] = _Phase()
+        return timer
+
+    def search(self, name, expanded, generated):
+        # One finished graph search: nodes taken off its queue or heap and
+        # distinct nodes put on it
+        self.count(name + ".calls")
+        self.observe(name + ".expanded", expanded)
+        self.observe(name + ".generated", generated)
+
+    def as_dict(self):
+        return {
+            "counters": dict(self.counters),
+            "histograms": {name: {"count": h.count, "total": h.total, "mean": h.mean(), "min": h.min,
+                                  "max": h.max, "buckets": {str(k): n for k, n in sorted(h.buckets.items())}}
+                           for name, h in self.histograms.items()},
+            "phases": {name: {"calls": p.calls, "seconds": p.seconds} for name, p in self.phases.items()},
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=1, sort_keys=True)
+
+    def report(self):
+        lines = []
+        if self.phases:
+            whole = self.phases["run"].seconds if "run" in self.phases else time.perf_counter() - self.created
+            lines.append(f"{'phase':<28}{'calls':>10}{'seconds':>12}{'share':>9}")
+            for name, p in sorted(self.phases.items(), key=lambda item: -item[1].seconds):
+                share = 100 * p.seconds / whole if whole else 0.0
+                lines.append(f"{name:<28}{p.calls:>10}{p.seconds:>12.4f}{share:>8.1f}%")
+        if self.counters:
+            lines.append(f"{'counter':<28}{'value':>10}")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<28}{value:>10}")
+        if self.histograms:
+            lines.append(f"{'histogram':<28}{'count':>10}{'mean':>12}{'min':>9}{'max':>9}")
+            for name, h in sorted(self.histograms.items()):
+                lines.append(f"{name:<28}{h.count:>10}{h.mean():>12.1f}{h.min:>9}{h.max:>9}")
+        return "\n".join(lines)
+
+
+def enable(instruments=None):
+    # Starts reporting into instruments (a new Instruments by default) and
+    # returns it
+    global active
+    active = instruments or Instruments()
+    return active
+
+
+def disable():
+    # Stops reporting and returns what was collected
+    global active
+    collected, active = active, None
+    return collected
+
+
+def phase(name):
+    # Context manager timing `name` while enabled, a shared no-op otherwise
+    return active.phase(name) if active else _OFF
@@ -0,0 +1,126 @@
+import heapq
+from bisect import bisect_left, bisect_right
+
+
+class JumpPointSearch:
+    # Jump Point Search for 4-connected uniform-cost grids (1 is blocked).
+    # Straight runs are skipped until a forced neighbour, the goal or a wall,
+    # so only jump points enter the open list. Each row's "next stop" tables
+    # are built on first use and reused across queries on the same grid.
+    def __init__(self, grid):
+        self.grid = grid
+        self.rows, self.cols = len(grid), len(grid[0])
+        self.row_stops = {}
+        self.expanded = 0  # jump points expanded by the last search
+
+    def walkable(self, r, c):
+        return 0 <= r < self.rows and 0 <= c < self.cols and self.grid[r][c] != 1
+
+    def _stops(self, r):
+        # Sorted columns where a rightward (and a leftward) run must stop:
+        # walls plus cells with a forced neighbour for that heading
+        stops = self.row_stops.get(r)
+        if stops is None:
+            cols = self.cols
+            free = [v != 1 for v in self.grid[r]]
+            up = [v != 1 for v in self.grid[r - 1]] if r > 0 else [False] * cols
+            down = [v != 1 for v in self.grid[r + 1]] if r + 1 < self.rows else [False] * cols
+            up_l, down_l = [False] + up[:-1], [False] + down[:-1]
+            up_r, down_r = up[1:] + [False], down[1:] + [False]
+            right = [c for c in range(cols) if not free[c] or (up[c] and not up_l[c]) or (down[c] and not down_l[c])]
+            left = [c for c in range(cols) if not free[c] or (up[c] and not up_r[c]) or (down[c] and not down_r[c])]
+            stops = self.row_stops[r] = (right, left)
+        return stops
+
+    def _jump_h(self, r, c, dc, goal):
+        if not self.walkable(r, c):
+            return None
+        right, left = self._stops(r)
+        if dc > 0:
+            i = bisect_left(right, c)
+            stop = right[i] if i < len(right) else self.cols
+        else:
+            i = bisect_right(left, c)
+            stop = left[i - 1] if i else -1
+        if goal[0] == r and min(c, stop) <= goal[1] <= max(c, stop):
+            return goal
+        if 0 <= stop < self.cols and self.walkable(r, stop):
+            return (r, stop)
+        return None
+
+    def _jump_v(self, r, c, dr, goal):
+        w = self.walkable
+        while w(r, c):
+            if (r, c) == goal:
+                return goal
+            if (w(r, c - 1) and not w(r - dr, c - 1)) or (w(r, c + 1) and not w(r - dr, c + 1)):
+                return (r, c)
+            # A horizontal jump point reachable from here makes this a turn point
+            if self._jump_h(r, c + 1, 1, goal) or self._jump_h(r, c - 1, -1, goal):
+                return (r, c)
+            r += dr
+        return None
+
+    def _jump(self, r, c, dr, dc, goal):
+        if dc:
+            return self._jump_h(r, c, dc, goal)
+        return self._jump_v(r, c, dr, goal)
+
+    def _successors(self, pos, parent):
+        r, c = pos
+        if parent is None:
+            dirs = ((0, 1), (1, 0), (0, -1), (-1, 0))
+        else:
+            dr = (r > parent[0]) - (r < parent[0])
+            dc = (c > parent[1]) - (c < parent[1])
+            if dc:
+                dirs = ((-1, 0), (1, 0), (0, dc))
+            else:
+                dirs = ((0, -1), (0, 1), (dr, 0))
+        return dirs
+
+    def search(self, start, goal):
+        # Same contract as Drone.a_star: the path excludes start, [] if unreachable
+        self.expanded = 0
+        if not self.walkable(*goal):
+            return []
+        h = lambda p: abs(p[0] - goal[0]) + abs(p[1] - goal[1])
+        open_set = [(h(start), 0, start)]
+        g_score = {start: 0}
+        came_from = {start: None}
+        closed = set()
+
+        while open_set:
+            _, g, pos = heapq.heappop(open_set)
+            if pos in closed:
+                continue
+            closed.add(pos)
+            self.expanded += 1
+            if pos == goal:
+                return self._unfold(came_from, goal)
+            for dr, dc in self._successors(pos, came_from[pos]):
+                point = self._jump(pos[0] + dr, pos[1] + dc, dr, dc, goal)
+                if point is None or point in closed:
+                    continue
+                ng = g + abs(point[0] - pos[0]) + abs(point[1] - pos[1])
+                if ng < g_score.get(point, float('inf')):
+                    g_score[point] = ng
+                    came_from[point] = pos
+                    heapq.heappush(open_set, (ng + h(point), ng, point))
+        return []
+
+    def _unfold(self, came_from, goal):
+        # Expand the straight segments between jump points into single steps
+        points = []
+        cur = goal
+        while cur is not None:
+            points.append(cur)
+            cur = came_from[cur]
+        points.reverse()
+        path = []
+        for (r0, c0), (r1, c1) in zip(points, points[1:]):
+            dr, dc = (r1 > r0) - (r1 < r0), (c1 > c0) - (c1 < c0)
+            while (r0, c0) != (r1, c1):
+                r0, c0 = r0 + dr, c0 + dc
+                path.append((r0, c0))
+        return path
@@ -1,8 +1,13 @@
-import time
+import cli
+from gridmap import open_map
+from renderers import AnsiRenderer, GridView
+from world_state import WorldState
 
 class ExplorerAgent:
-    def __init__(self, agent_id, start_pos, symbol):
-        self.id, self.pos, self.symbol, self.explored = agent_id, start_pos, symbol, [start_pos]
+    __slots__ = ("id", "pos", "symbol", "explored")
+
+    def __init__(self, agent_id, start_pos, symbol, world):
+        self.id, self.pos, self.symbol, self.explored = agent_id, start_pos, symbol, world.layer([start_pos])
     
     def explore_next(self, region, explored_all):
         # Find nearest unexplored cell in assigned region
@@ -18,21 +23,29 @@ class ExplorerAgent:
         new_pos = (self.pos[0] + dr, self.pos[1] + dc)
         self.pos = new_pos
         
-        if new_pos not in self.explored:
-            self.explored.append(new_pos)
+        self.explored.add(new_pos)
         
         return new_pos
 
 
 class MapExplorationSystem:
-    def __init__(self):
-        self.rows, self.cols = 8, 12
+    def __init__(self, grid_map=None, renderer=None):
+        self.renderer = renderer or AnsiRenderer()
+        # grid_map: a map file (gridmap.py) giving the size and starts; the
+        # explorers fly, so its walls don't stop them
+        grid_map = open_map(grid_map)
+        self.rows, self.cols = (grid_map.rows, grid_map.cols) if grid_map else (8, 12)
         self.total_cells = self.rows * self.cols
+        self.view = None
+        if self.renderer.active:
+            self.view = GridView([["██"] * self.cols for _ in range(self.rows)], border=True)
+        self.world = WorldState(self.rows, self.cols)
         
         # Agents
-        self.agent1 = ExplorerAgent(1, (0, 0), "🤖")
-        self.agent2 = ExplorerAgent(2, (self.rows-1, self.cols-1), "🦾")
-        self.agent3 = ExplorerAgent(3, (0, self.cols-1), "🚁")
+        starts = (grid_map and grid_map.get("starts")) or [(0, 0), (self.rows-1, self.cols-1), (0, self.cols-1)]
+        self.agent1 = ExplorerAgent(1, starts[0], "🤖", self.world)
+        self.agent2 = ExplorerAgent(2, starts[1], "🦾", self.world)
+        self.agent3 = ExplorerAgent(3, starts[2], "🚁", self.world)
         
         self.agents = [self.agent1, self.agent2, self.agent3]
         self.step = 0
@@ -54,56 +67,41 @@ class MapExplorationSystem:
         self.regions = [self.region1, self.region2, self.region3]
     
     def visualize(self):
-        print("\n" * 2)
-        print(f"{'='*50}")
-        print(f"MAP EXPLORATION - Step {self.step}")
-        print(f"{'='*50}\n")
+        if not self.renderer.active:
+            return
+        header = ["\n" * 2, f"{'='*50}", f"MAP EXPLORATION - Step {self.step}", f"{'='*50}\n"]
         
-        explored_all = set()
+        explored_all = self.world.layer()
         for agent in self.agents:
             explored_all.update(agent.explored)
         
-        # Top border
-        print("┌" + "──" * self.cols + "┐")
-        
-        for i in range(self.rows):
-            row = "│"
-            for j in range(self.cols):
-                if (i, j) == self.agent1.pos:
-                    row += "🤖"
-                elif (i, j) == self.agent2.pos:
-                    row += "🦾"
-                elif (i, j) == self.agent3.pos:
-                    row += "🚁"
-                elif (i, j) in self.agent1.explored:
-                    row += "\033[94m░░\033[0m"
-                elif (i, j) in self.agent2.explored:
-                    row += "\033[92m░░\033[0m"
-                elif (i, j) in self.agent3.explored:
-                    row += "\033[93m░░\033[0m"
-                else:
-                    row += "██"
-            row += "│"
-            print(row)
-        
-        # Bottom border
-        print("└" + "──" * self.cols + "┘")
+        # Later layers win: explored cells, then the agents
+        overlay = {}
+        for pos in self.agent3.explored:
+            overlay[pos] = "\033[93m░░\033[0m"
+        for pos in self.agent2.explored:
+            overlay[pos] = "\033[92m░░\033[0m"
+        for pos in self.agent1.explored:
+            overlay[pos] = "\033[94m░░\033[0m"
+        overlay[self.agent3.pos] = "🚁"
+        overlay[self.agent2.pos] = "🦾"
+        overlay[self.agent1.pos] = "🤖"
         
         coverage = (len(explored_all) / self.total_cells) * 100
-        print(f"\n🤖 Agent 1: {len(self.agent1.explored)} | 🦾 Agent 2: {len(self.agent2.explored)} | 🚁 Agent 3: {len(self.agent3.explored)}")
-        print(f"Coverage: {coverage:.1f}% ({len(explored_all)}/{self.total_cells})")
-        time.sleep(0.1)
+        footer = [f"\n🤖 Agent 1: {len(self.agent1.explored)} | 🦾 Agent 2: {len(self.agent2.explored)} | 🚁 Agent 3: {len(self.agent3.explored)}",
+                  f"Coverage: {coverage:.1f}% ({len(explored_all)}/{self.total_cells})"]
+        self.renderer.grid(self.view, header, overlay, footer, 0.1)
     
     def run(self):
-        print(f"\nStarting Map Exploration System...")
-        print(f"Map size: {self.rows}x{self.cols} = {self.total_cells} cells")
-        print(f"🤖 Agent 1: {self.agent1.pos} (Region 1)")
-        print(f"🦾 Agent 2: {self.agent2.pos} (Region 3)")
-        print(f"🚁 Agent 3: {self.agent3.pos} (Region 3)\n")
+        self.renderer.write(f"\nStarting Map Exploration System...")
+        self.renderer.write(f"Map size: {self.rows}x{self.cols} = {self.total_cells} cells")
+        self.renderer.write(f"🤖 Agent 1: {self.agent1.pos} (Region 1)")
+        self.renderer.write(f"🦾 Agent 2: {self.agent2.pos} (Region 3)")
+        self.renderer.write(f"🚁 Agent 3: {self.agent3.pos} (Region 3)\n")
         
         self.visualize()
         
-        explored_all = set()
+        explored_all = self.world.layer()
         for agent in self.agents:
             explored_all.update(agent.explored)
         
@@ -126,23 +124,25 @@ class MapExplorationSystem:
         self.show_results()
     
     def show_results(self):
-        explored_all = set()
+        explored_all = self.world.layer()
         for agent in self.agents:
             explored_all.update(agent.explored)
         
         coverage = (len(explored_all) / self.total_cells) * 100
         efficiency = (len(explored_all) / self.step) if self.step > 0 else 0
         
-        print(f"\n{'='*70}\nEXPLORATION COMPLETE!\n{'='*70}")
-        print(f"Total steps: {self.step}")
-        print(f"Coverage: {coverage:.1f}% ({len(explored_all)}/{self.total_cells})")
-        print(f"Efficiency: {efficiency:.2f} cells/step")
-        print(f"🤖 Agent 1: {len(self.agent1.explored)} cells")
-        print(f"🦾 Agent 2: {len(self.agent2.explored)} cells")
-        print(f"🚁 Agent 3: {len(self.agent3.explored)} cells")
+        self.renderer.write(f"\n{'='*70}\nEXPLORATION COMPLETE!\n{'='*70}")
+        self.renderer.write(f"Total steps: {self.step}")
+        self.renderer.write(f"Coverage: {coverage:.1f}% ({len(explored_all)}/{self.total_cells})")
+        self.renderer.write(f"Efficiency: {efficiency:.2f} cells/step")
+        self.renderer.write(f"🤖 Agent 1: {len(self.agent1.explored)} cells")
+        self.renderer.write(f"🦾 Agent 2: {len(self.agent2.explored)} cells")
+        self.renderer.write(f"🚁 Agent 3: {len(self.agent3.explored)} cells")
         
         # Exploration heatmap
-        print(f"\n{'='*70}\nEXPLORATION EFFICIENCY HEATMAP\n{'='*70}\n")
+        if not self.renderer.active:
+            return
+        self.renderer.write(f"\n{'='*70}\nEXPLORATION EFFICIENCY HEATMAP\n{'='*70}\n")
         
         # Create visit count map
         visit_map = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
@@ -152,10 +152,10 @@ class MapExplorationSystem:
         
         max_visits = max(max(row) for row in visit_map)
         
-        print("Legend: ██ Unexplored | 🟩 Low | 🟨 Medium | 🟥 High\n")
+        self.renderer.write("Legend: ██ Unexplored | 🟩 Low | 🟨 Medium | 🟥 High\n")
         
         # Top border
-        print("┌" + "──" * self.cols + "┐")
+        self.renderer.write("┌" + "──" * self.cols + "┐")
         
         for i in range(self.rows):
             row = "│"
@@ -170,32 +170,31 @@ class MapExplorationSystem:
                 else:
                     row += "\033[91m▓▓\033[0m"  # Red - explored 3+ times
             row += "│"
-            print(row)
+            self.renderer.write(row)
         
         # Bottom border
-        print("└" + "──" * self.cols + "┘")
+        self.renderer.write("└" + "──" * self.cols + "┘")
         
         # Exploration progress graph
-        print(f"\n{'='*70}\nEXPLORATION PROGRESS\n{'='*70}\n")
+        self.renderer.write(f"\n{'='*70}\nEXPLORATION PROGRESS\n{'='*70}\n")
         
         if self.exploration_log:
             max_cells = self.total_cells
             step_interval = max(1, len(self.exploration_log) // 20)
             
-            print("Cells")
+            self.renderer.write("Cells")
             for level in range(max_cells, -1, -max_cells//10):
                 line = f"{level:3d} |"
                 for idx, cells in enumerate(self.exploration_log):
                     if idx % step_interval == 0:
                         line += "█" if cells >= level else " "
-                print(line)
+                self.renderer.write(line)
             
-            print("    +" + "-" * (len(self.exploration_log) // step_interval + 1))
-            print("     Time (steps)")
+            self.renderer.write("    +" + "-" * (len(self.exploration_log) // step_interval + 1))
+            self.renderer.write("     Time (steps)")
         
-        print(f"\n{'='*70}\n")
+        self.renderer.write(f"\n{'='*70}\n")
 
 
 if __name__ == "__main__":
-    system = MapExplorationSystem()
-    system.run()
\ No newline at end of file
+    cli.main(lambda renderer: MapExplorationSystem(renderer=renderer).run())
\ No newline at end of file
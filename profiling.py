@@ -0,0 +1,92 @@
+import re
+import sys
+import time
+
+# Default filter for the top-N view: the search, planning and assignment
+# entry points, by function or module name
+PLANNERS = r"bfs|astar|a_star|sipp|jps|jump|dstar|wavefront|cbs|solve|plan|assign|hungarian|search|rollout"
+
+
+class StackProfiler:
+    # Deterministic profiler: sys.setprofile sees every Python and C call and
+    # return on this thread, and the time since the previous event goes to
+    # the stack that was running, so each collapsed stack ("a;b;c") ends up
+    # with its self time. Exact counts rather than samples, because most
+    # headless runs finish in milliseconds; expect them to run several times
+    # slower while profiled. Work in other processes is not seen.
+    def __init__(self):
+        self.stacks = {}
+        self._names = {}
+        self._keys = []
+        self._last = 0.0
+
+    def _name(self, frame, event, arg):
+        if event == "c_call":
+            module = getattr(arg, "__module__", None) or type(getattr(arg, "__self__", None)).__name__
+            return f"{module}:{arg.__qualname__}"
+        code = frame.f_code
+        name = self._names.get(code)
+        if name is None:
+            module = frame.f_globals.get("__name__", "?")
+            name = self._names[code] = f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+        return name
+
+    def _event(self, frame, event, arg):
+        now = time.perf_counter()
+        keys = self._keys
+        if keys:
+            key = keys[-1]
+            self.stacks[key] = self.stacks.get(key, 0.0) + now - self._last
+        if event == "call" or event == "c_call":
+            name = self._name(frame, event, arg)
+            keys.append(keys[-1] + ";" + name if keys else name)
+        elif keys:
+            keys.pop()
+        self._last = time.perf_counter()
+
+    def run(self, fn, *args, **kwargs):
+        # fn(*args, **kwargs) under the profiler; stacks add up over calls
+        self._keys = []
+        self._last = time.perf_counter()
+        sys.setprofile(self._event)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sys.setprofile(None)
+
+    def collapsed(self):
+        # One "frame;frame;frame microseconds" line per stack, the input
+        # format of flamegraph.pl, speedscope and inferno
+        lines = []
+        for key, seconds in sorted(self.stacks.items()):
+            micros = round(seconds * 1e6)
+            if micros:
+                lines.append(f"{key} {micros}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, path):
+        with open(path, "w") as f:
+            f.write(self.collapsed())
+
+    def functions(self):
+        # function -> [self seconds, total seconds]; a function counts once
+        # per stack however deep it recurses
+        table = {}
+        for key, seconds in self.stacks.items():
+            frames = key.split(";")
+            for name in set(frames):
+                table.setdefault(name, [0.0, 0.0])[1] += seconds
+            table[frames[-1]][0] += seconds
+        return table
+
+    def top(self, n=15, match=PLANNERS):
+        # The n functions matching `match` with the most total time
+        pattern = re.compile(match)
+        whole = sum(self.stacks.values())
+        rows = sorted(((name, own, total) for name, (own, total) in self.functions().items()
+                       if pattern.search(name)), key=lambda row: -row[2])[:n]
+        lines = [f"{'function':<48}{'self ms':>10}{'total ms':>10}{'share':>8}"]
+        for name, own, total in rows:
+            share = 100 * total / whole if whole else 0.0
+            lines.append(f"{name:<48}{own * 1000:>10.2f}{total * 1000:>10.2f}{share:>7.1f}%")
+        return "\n".join(lines)
@@ -0,0 +1,202 @@
+import re
+import sys
+import time
+import unicodedata
+
+import instruments
+
+_ESCAPE = re.compile(r"\033\[[0-9;]*[A-Za-z]")
+
+
+def display_width(text):
+    # Terminal columns taken by text: escapes take none, wide glyphs take two
+    width = 0
+    for ch in _ESCAPE.sub("", text):
+        if unicodedata.combining(ch) or ch == "\ufe0f":
+            continue
+        width += 2 if unicodedata.east_asian_width(ch) in "WF" else 1
+    return width
+
+
+class GridView:
+    # Static layer of a scenario display: background glyphs (walls, floor)
+    # prepared once, the width of one cell in columns and an optional box
+    def __init__(self, background, cell_width=2, border=False):
+        self.background = background
+        self.rows, self.cols = len(background), len(background[0])
+        self.cell_width = cell_width
+        self.border = border
+        self.padded = [[self.pad(g) for g in row] for row in background]
+
+    def pad(self, glyph):
+        return glyph + " " * max(0, self.cell_width - display_width(glyph))
+
+    def lines(self, overlay, padded=False):
+        cells = self.padded if padded else self.background
+        pad = self.pad if padded else str
+        rows = []
+        for r in range(self.rows):
+            bg = cells[r]
+            row = "".join(pad(overlay[(r, c)]) if (r, c) in overlay else bg[c] for c in range(self.cols))
+            rows.append("│" + row + "│" if self.border else row)
+        if self.border:
+            edge = "─" * (self.cols * self.cell_width)
+            rows = ["┌" + edge + "┐"] + rows + ["└" + edge + "┘"]
+        return rows
+
+
+class NullRenderer:
+    # Headless: frames are never built, nothing is printed, nothing sleeps
+    active = False
+
+    def frame(self, text, delay=0):
+        pass
+
+    def grid(self, view, header, overlay, footer, delay=0):
+        pass
+
+    def write(self, *args, sep=" ", end="\n"):
+        pass
+
+    def pause(self, seconds):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LogRenderer(NullRenderer):
+    # Headless with messages: frames are never built and nothing sleeps, but
+    # write() prints, so a run still shows its log and final results
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def write(self, *args, sep=" ", end="\n"):
+        print(*args, sep=sep, end=end, file=self.stream or sys.stdout)
+
+
+class AnsiRenderer:
+    # Interactive terminal output: prints every frame and honours the delays
+    active = True
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def frame(self, text, delay=0):
+        with instruments.phase("render"):
+            self.write(text)
+        self.pause(delay)
+
+    def grid(self, view, header, overlay, footer, delay=0):
+        with instruments.phase("render"):
+            self.write("\n".join(header + view.lines(overlay) + footer))
+        self.pause(delay)
+
+    def write(self, *args, sep=" ", end="\n"):
+        print(*args, sep=sep, end=end, file=self.stream or sys.stdout)
+
+    def pause(self, seconds):
+        with instruments.phase("sleep"):
+            time.sleep(seconds)
+
+    def clear(self):
+        self.write("\033[2J\033[H", end="")
+
+
+class DiffRenderer(AnsiRenderer):
+    # Live view that redraws only what changed. The first frame (or one after
+    # the layout changed) is drawn in full; later frames move the cursor to
+    # each overlay cell whose glyph differs and rewrite just that cell, so a
+    # frame costs O(changed cells) instead of O(rows x cols).
+    def __init__(self, stream=None, fps=None):
+        super().__init__(stream)
+        self.fps = fps
+        self.view = None
+        self.shown = {}
+        self.header = []
+        self.footer = []
+        self.scrolled = False
+
+    def _out(self):
+        return self.stream or sys.stdout
+
+    def grid(self, view, header, overlay, footer, delay=0):
+        with instruments.phase("render"):
+            self._draw(view, header, overlay, footer)
+        self.pause(1 / self.fps if self.fps else delay)
+
+    def _draw(self, view, header, overlay, footer):
+        header = "\n".join(header).split("\n")
+        footer = "\n".join(footer).split("\n")
+        top = len(header) + (1 if view.border else 0)
+        left = 1 if view.border else 0
+        if (view is not self.view or self.scrolled or len(header) != len(self.header)
+                or len(footer) != len(self.footer)):
+            out = ["\033[2J\033[H", "\n".join(header + view.lines(overlay, padded=True) + footer), "\n"]
+            self.view, self.scrolled = view, False
+        else:
+            out = []
+            for i, line in enumerate(header):
+                if line != self.header[i]:
+                    out.append(f"\033[{i + 1};1H\033[2K{line}")
+            padded = view.padded
+            for pos in self.shown.keys() | overlay.keys():
+                glyph = overlay.get(pos)
+                if glyph != self.shown.get(pos):
+                    r, c = pos
+                    cell = view.pad(glyph) if glyph is not None else padded[r][c]
+                    out.append(f"\033[{top + r + 1};{left + c * view.cell_width + 1}H{cell}")
+            base = top + view.rows + (1 if view.border else 0)
+            for i, line in enumerate(footer):
+                if line != self.footer[i]:
+                    out.append(f"\033[{base + i + 1};1H\033[2K{line}")
+            out.append(f"\033[{base + len(footer) + 1};1H")
+        self.shown = dict(overlay)
+        self.header, self.footer = header, footer
+        stream = self._out()
+        stream.write("".join(out))
+        stream.flush()
+
+    def write(self, *args, sep=" ", end="\n"):
+        # Messages print below the live view; the next frame redraws in full
+        # in case they scrolled the screen
+        super().write(*args, sep=sep, end=end)
+        self.scrolled = True
+
+    def clear(self):
+        pass
+
+
+class RecordingRenderer:
+    # Keeps frames and messages in memory for tests and replays; delays are
+    # summed instead of slept
+    active = True
+
+    def __init__(self):
+        self.frames = []
+        self.lines = []
+        self.paused = 0.0
+
+    def frame(self, text, delay=0):
+        self.frames.append(text)
+        self.paused += delay
+
+    def grid(self, view, header, overlay, footer, delay=0):
+        self.frame("\n".join(header + view.lines(overlay) + footer), delay)
+
+    def write(self, *args, sep=" ", end="\n"):
+        self.lines.append(sep.join(str(a) for a in args))
+
+    def pause(self, seconds):
+        self.paused += seconds
+
+    def clear(self):
+        pass
+
+
+RENDERERS = {"null": NullRenderer, "log": LogRenderer, "ansi": AnsiRenderer, "diff": DiffRenderer,
+             "record": RecordingRenderer}
+
+
+def make(name):
+    return RENDERERS[name]()
@@ -0,0 +1,120 @@
+from bisect import bisect_right
+from operator import itemgetter
+
+INF = float('inf')
+
+_start = itemgetter(0)
+
+
+class ReservationTable:
+    # Space-time reservations for any number of agents. Each cell keeps a
+    # sorted list of (start, end, agent) occupied intervals, end exclusive,
+    # so an agent waiting or parked on a cell costs one entry instead of one
+    # per timestep. Moves are packed into one int per (time, from, to) so
+    # swap conflicts can be rejected. Intervals of one cell may overlap: a
+    # parked agent's hold can cover a later pass planned by someone else, so
+    # each cell also keeps the furthest-reaching interval among those
+    # started so far, and a lookup is one bisect on the starts.
+    def __init__(self, rows, cols):
+        self.rows, self.cols = rows, cols
+        self.cells = rows * cols
+        self.intervals = {}  # cell id -> [(start, end, agent), ...] sorted by start
+        self.reach = {}      # cell id -> [(end, agent) of the latest-ending of intervals[:i + 1], ...]
+        self.edges = {}      # packed move -> agent
+        self.owned = {}      # agent -> ([(cell id, interval), ...], [packed move, ...])
+
+    def _edge(self, t, frm, to):
+        return (t * self.cells + frm) * self.cells + to
+
+    def _reach_from(self, cell, i):
+        # Recomputes reach[cell] from interval i on
+        bucket = self.intervals[cell]
+        reach = self.reach.setdefault(cell, [])
+        del reach[i:]
+        best = reach[-1] if reach else (-INF, None)
+        for _, end, agent in bucket[i:]:
+            if end > best[0]:
+                best = (end, agent)
+            reach.append(best)
+
+    def reserve_path(self, agent, path, hold_time=50):
+        # path[t] is the agent's cell at time t; after arriving it stays on the
+        # last cell for hold_time steps (forever if hold_time is None)
+        cols = self.cols
+        spans, moves = self.owned.setdefault(agent, ([], []))
+        t0 = 0
+        for t in range(1, len(path) + 1):
+            if t < len(path) and path[t] == path[t0]:
+                continue
+            end = t
+            if t == len(path):
+                end = INF if hold_time is None else t + hold_time
+            cell = path[t0][0] * cols + path[t0][1]
+            span = (t0, end, agent)
+            bucket = self.intervals.setdefault(cell, [])
+            i = bisect_right(bucket, t0, key=_start)
+            bucket.insert(i, span)
+            self._reach_from(cell, i)
+            spans.append((cell, span))
+            if t < len(path):
+                key = self._edge(t, cell, path[t][0] * cols + path[t][1])
+                self.edges[key] = agent
+                moves.append(key)
+            t0 = t
+
+    def release(self, agent):
+        spans, moves = self.owned.pop(agent, ((), ()))
+        for cell, span in spans:
+            bucket = self.intervals[cell]
+            i = bucket.index(span)
+            del bucket[i]
+            if bucket:
+                self._reach_from(cell, i)
+            else:
+                del self.intervals[cell]
+                del self.reach[cell]
+        for key in moves:
+            # Another agent may have reserved the same move since
+            if self.edges.get(key) == agent:
+                self.edges.pop(key, None)
+
+    def holder(self, pos, t):
+        # An agent occupying pos at time t, or None
+        cell = pos[0] * self.cols + pos[1]
+        bucket = self.intervals.get(cell)
+        if not bucket:
+            return None
+        i = bisect_right(bucket, t, key=_start)
+        if i:
+            end, agent = self.reach[cell][i - 1]
+            if end > t:
+                return agent
+        return None
+
+    def blocked(self, pos, t):
+        # Hot path of time-aware search: most cells have no reservations
+        cell = pos[0] * self.cols + pos[1]
+        bucket = self.intervals.get(cell)
+        if not bucket:
+            return False
+        i = bisect_right(bucket, t, key=_start)
+        return i > 0 and self.reach[cell][i - 1][0] > t
+
+    def swap_blocked(self, frm, to, t):
+        # Moving frm -> to arriving at t would swap with an agent going to -> frm
+        cols = self.cols
+        return self._edge(t, to[0] * cols + to[1], frm[0] * cols + frm[1]) in self.edges
+
+    def safe_intervals(self, pos, horizon=INF):
+        # Maximal (start, end) stretches before horizon when pos is free
+        safe = []
+        t = 0
+        for start, end, _ in self.intervals.get(pos[0] * self.cols + pos[1], ()):
+            if start >= horizon:
+                break
+            if start > t:
+                safe.append((t, start))
+            t = max(t, end)
+        if t < horizon:
+            safe.append((t, horizon))
+        return safe
@@ -1,144 +1,163 @@
-import time
-from collections import deque
+import cli
+import grid_search
+from auction import Auction
+from gridmap import open_map
+from renderers import AnsiRenderer, GridView
+from scheduler import TickScheduler
+from world_state import WorldState
 
 class CollectorAgent:
-    def __init__(self, agent_id, start_pos, symbol):
-        self.id, self.pos, self.symbol, self.collected, self.path = agent_id, start_pos, symbol, [], []
+    __slots__ = ("id", "pos", "symbol", "collected", "path")
+
+    def __init__(self, agent_id, start_pos, symbol, world):
+        self.id, self.pos, self.symbol, self.collected, self.path = agent_id, start_pos, symbol, [], world.layer()
     
     def bfs(self, start, goals, grid):
-        if not goals: return None, []
-        queue, visited = deque([(start, [])]), {start}
-        while queue:
-            pos, path = queue.popleft()
-            if pos in goals: return pos, path + [pos]
-            for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
-                nx, ny = pos[0] + dx, pos[1] + dy
-                if 0 <= nx < len(grid) and 0 <= ny < len(grid[0]) and (nx, ny) not in visited:
-                    visited.add((nx, ny))
-                    queue.append(((nx, ny), path + [pos]))
-        return None, []
+        return grid_search.bfs(grid, start, goals)
 
 
 class ResourceCollectionSystem:
-    def __init__(self):
-        self.rows, self.cols = 10, 16
-        self.grid = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+    def __init__(self, engine="bfs", resources=None, grid_map=None, renderer=None):
+        self.renderer = renderer or AnsiRenderer()
+        # grid_map: a map file (gridmap.py) to run on instead of the open field
+        grid_map = open_map(grid_map)
+        if grid_map:
+            self.grid, self.rows, self.cols = grid_map, grid_map.rows, grid_map.cols
+        else:
+            self.rows, self.cols = 10, 16
+            self.grid = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        self.view = None
+        if self.renderer.active:
+            self.view = GridView([["⬛ " if v == 1 else "⬜ " for v in row] for row in self.grid], cell_width=3)
+        self.world = WorldState(self.rows, self.cols, self.grid)
+
+        # engine="wavefront" floods with NumPy (needs numpy); default is the BFS core
+        self.wavefront = None
+        if engine == "wavefront":
+            from wavefront import Wavefront
+            self.wavefront = Wavefront(self.grid)
         
         # Shared task queue - resources
-        self.task_queue = [(1, 3), (2, 14), (4, 8), (6, 5), (7, 12), (8, 2), (3, 10), (5, 15)]
+        self.task_queue = list(resources or (grid_map and grid_map.get("targets"))
+                               or [(1, 3), (2, 14), (4, 8), (6, 5), (7, 12), (8, 2), (3, 10), (5, 15)])
         self.all_resources = list(self.task_queue)
         
         # Agents
-        self.agent1 = CollectorAgent(1, (0, 0), "🤖")
-        self.agent2 = CollectorAgent(2, (self.rows-1, self.cols-1), "🦾")
-        self.agent3 = CollectorAgent(3, (0, self.cols-1), "🚁")
+        starts = (grid_map and grid_map.get("starts")) or [(0, 0), (self.rows-1, self.cols-1), (0, self.cols-1)]
+        self.agent1 = CollectorAgent(1, starts[0], "🤖", self.world)
+        self.agent2 = CollectorAgent(2, starts[1], "🦾", self.world)
+        self.agent3 = CollectorAgent(3, starts[2], "🚁", self.world)
         
         self.agents = [self.agent1, self.agent2, self.agent3]
         self.step = 0
-    
-    def assign_task(self):
-        # Distributed decision logic: assign nearest resource from queue
-        if not self.task_queue: return None, None
         
-        best_agent, best_resource, min_dist = None, None, float('inf')
-        for agent in self.agents:
-            for resource in self.task_queue:
-                dist = abs(resource[0] - agent.pos[0]) + abs(resource[1] - agent.pos[1])
-                if dist < min_dist:
-                    min_dist, best_agent, best_resource = dist, agent, resource
+        # Market allocation: agents bid on resources, only the movers re-bid
+        self.auction = Auction(self.task_queue)
+        self.targets = {}  # agent -> resource it won
         
-        # Don't remove from queue yet - remove when actually collected
-        return best_agent, best_resource
+        # Every agent moves one cell per tick
+        self.scheduler = TickScheduler(self.agents, self.grid, self.next_route, self.collect,
+                                       moved=lambda agent: agent.path.add(agent.pos), on_tick=self.tick)
+    
+    def assign_tasks(self):
+        # Distributed decision logic: every idle agent wins a resource at once
+        idle = [agent for agent in self.agents if agent not in self.targets]
+        for agent in idle:
+            self.auction.update_agent(agent, agent.pos)
+        self.targets.update(self.auction.allocate(idle))
+    
+    def next_route(self, agent):
+        while True:
+            if agent not in self.targets:
+                self.assign_tasks()
+            resource = self.targets.get(agent)
+            if resource is None:
+                return None
+            if self.wavefront:
+                path = self.wavefront.search(agent.pos, [resource])[1]
+            else:
+                path = agent.bfs(agent.pos, [resource], self.grid)[1]
+            if path:
+                return resource, path[1:]
+            # Bids are straight-line guesses: put a resource this agent can't
+            # reach back up for the others, and bid again
+            del self.targets[agent]
+            self.auction.add_task(resource, exclude=[agent])
+    
+    def collect(self, agent, resource):
+        # Remove from queue when actually collected
+        del self.targets[agent]
+        if resource in self.task_queue:
+            self.task_queue.remove(resource)
+        agent.collected.append(resource)
+        self.renderer.write(f"\n{agent.symbol} Agent {agent.id} collected resource at {resource}!")
+        self.renderer.pause(0.3)
+    
+    def tick(self, tick):
+        self.step = tick
+        self.visualize()
     
     def visualize(self):
-        print("\n" * 2)
-        print(f"{'='*60}")
-        print(f"RESOURCE COLLECTION TEAM - Step {self.step}")
-        print(f"{'='*60}\n")
+        if not self.renderer.active:
+            return
+        header = ["\n" * 2, f"{'='*60}", f"RESOURCE COLLECTION TEAM - Step {self.step}", f"{'='*60}\n"]
         
-        for i in range(self.rows):
-            row = ""
-            for j in range(self.cols):
-                if (i, j) == self.agent1.pos:
-                    row += "🤖 "
-                elif (i, j) == self.agent2.pos:
-                    row += "🦾 "
-                elif (i, j) == self.agent3.pos:
-                    row += "🚁 "
-                elif (i, j) in self.task_queue:
-                    row += "💎 "
-                elif (i, j) in self.agent1.collected:
-                    row += "\033[94m·\033[0m "
-                elif (i, j) in self.agent2.collected:
-                    row += "\033[92m·\033[0m "
-                elif (i, j) in self.agent3.collected:
-                    row += "\033[93m·\033[0m "
-                else:
-                    row += "⬜ "
-            print(row)
+        # Later layers win: collected cells, resources, then the agents
+        overlay = {}
+        for pos in self.agent3.collected:
+            overlay[pos] = "\033[93m·\033[0m "
+        for pos in self.agent2.collected:
+            overlay[pos] = "\033[92m·\033[0m "
+        for pos in self.agent1.collected:
+            overlay[pos] = "\033[94m·\033[0m "
+        for pos in self.task_queue:
+            overlay[pos] = "💎 "
+        overlay[self.agent3.pos] = "🚁 "
+        overlay[self.agent2.pos] = "🦾 "
+        overlay[self.agent1.pos] = "🤖 "
         
-        print(f"\n🤖 Agent 1: {len(self.agent1.collected)} | 🦾 Agent 2: {len(self.agent2.collected)} | 🚁 Agent 3: {len(self.agent3.collected)}")
-        print(f"💎 Resources remaining: {len(self.task_queue)}")
-        time.sleep(0.15)
+        footer = [f"\n🤖 Agent 1: {len(self.agent1.collected)} | 🦾 Agent 2: {len(self.agent2.collected)} | 🚁 Agent 3: {len(self.agent3.collected)}",
+                  f"💎 Resources remaining: {len(self.task_queue)}"]
+        self.renderer.grid(self.view, header, overlay, footer, 0.15)
     
     def run(self):
-        print(f"\nStarting Resource Collection System...")
-        print(f"🤖 Agent 1: {self.agent1.pos} | 🦾 Agent 2: {self.agent2.pos} | 🚁 Agent 3: {self.agent3.pos}")
-        print(f"💎 Total resources: {len(self.all_resources)}\n")
+        self.renderer.write(f"\nStarting Resource Collection System...")
+        self.renderer.write(f"🤖 Agent 1: {self.agent1.pos} | 🦾 Agent 2: {self.agent2.pos} | 🚁 Agent 3: {self.agent3.pos}")
+        self.renderer.write(f"💎 Total resources: {len(self.all_resources)}\n")
         
         self.visualize()
         
-        while self.task_queue:
-            agent, resource = self.assign_task()
-            
-            if not agent or not resource:
-                break
-            
-            path = agent.bfs(agent.pos, [resource], self.grid)[1]
-            
-            if path:
-                for pos in path:
-                    self.step += 1
-                    agent.pos = pos
-                    if pos not in agent.path:
-                        agent.path.append(pos)
-                    self.visualize()
-                
-                # Remove from queue when actually collected
-                if resource in self.task_queue:
-                    self.task_queue.remove(resource)
-                agent.collected.append(resource)
-                print(f"\n{agent.symbol} Agent {agent.id} collected resource at {resource}!")
-                time.sleep(0.3)
+        self.scheduler.run()
         
         self.show_results()
     
     def show_results(self):
         total = sum(len(agent.collected) for agent in self.agents)
-        print(f"\n{'='*60}\nALL RESOURCES COLLECTED!\n{'='*60}")
-        print(f"Total time: {self.step} steps\nTotal resources: {total}")
+        banner = "ALL RESOURCES COLLECTED!" if not self.task_queue else f"{len(self.task_queue)} RESOURCES NOT COLLECTED"
+        self.renderer.write(f"\n{'='*60}\n{banner}\n{'='*60}")
+        self.renderer.write(f"Total time: {self.step} steps\nTotal resources: {total}")
         
         # Bar chart
-        print(f"\n{'='*60}\nRESOURCE COLLECTION CHART\n{'='*60}\n")
+        self.renderer.write(f"\n{'='*60}\nRESOURCE COLLECTION CHART\n{'='*60}\n")
         max_collected = max(len(agent.collected) for agent in self.agents)
         
         for agent in self.agents:
             bar = "█" * len(agent.collected)
-            print(f"{agent.symbol} Agent {agent.id}: {bar} ({len(agent.collected)})")
+            self.renderer.write(f"{agent.symbol} Agent {agent.id}: {bar} ({len(agent.collected)})")
         
         # Horizontal bar graph
-        print(f"\n{'='*60}\nCOLLECTION DISTRIBUTION\n{'='*60}\n")
-        print("Resources")
+        self.renderer.write(f"\n{'='*60}\nCOLLECTION DISTRIBUTION\n{'='*60}\n")
+        self.renderer.write("Resources")
         for level in range(max_collected, -1, -1):
             line = f"{level:2d} |"
             for agent in self.agents:
                 line += " 💎 " if len(agent.collected) >= level else "   "
-            print(line)
-        print("   +" + "---" * len(self.agents))
-        print("     " + "  ".join([f"A{agent.id}" for agent in self.agents]))
+            self.renderer.write(line)
+        self.renderer.write("   +" + "---" * len(self.agents))
+        self.renderer.write("     " + "  ".join([f"A{agent.id}" for agent in self.agents]))
         
-        print(f"\n{'='*60}\n")
+        self.renderer.write(f"\n{'='*60}\n")
 
 
 if __name__ == "__main__":
-    system = ResourceCollectionSystem()
+    cli.main(lambda renderer: ResourceCollectionSystem(renderer=renderer).run())
@@ -0,0 +1,203 @@
+import copy
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from grid_search import MOVES
+
+
+def nearest_chain(pos, targets):
+    # Visiting order that always goes to the closest remaining target
+    left, order = list(targets), []
+    while left:
+        pos = min(left, key=lambda t: abs(t[0] - pos[0]) + abs(t[1] - pos[1]))
+        left.remove(pos)
+        order.append(pos)
+    return order
+
+
+def step_toward(pos, target, free):
+    # One greedy move that shortens the Manhattan distance over free cells,
+    # or stay put; rollouts trade exact paths for speed
+    d = abs(target[0] - pos[0]) + abs(target[1] - pos[1])
+    for dr, dc in MOVES:
+        nxt = (pos[0] + dr, pos[1] + dc)
+        if (abs(target[0] - nxt[0]) + abs(target[1] - nxt[1]) < d
+                and 0 <= nxt[0] < free.shape[0] and 0 <= nxt[1] < free.shape[1] and free[nxt]):
+            return nxt
+    return pos
+
+
+def rollout(model, free, agents, orders, budget, spread_interval, phase, seed):
+    # Plays one future forward on model (which it changes): each tick the
+    # agents step toward the first still-burning fire of their order and put
+    # it out on arrival; the fire spreads on every spread_interval-th tick
+    # counted from phase, and each new fire joins the order of the nearest
+    # agent (the later one on ties), as in the scenario.
+    # Returns (cells ignited, cells still burning, ticks taken) after at most
+    # budget ticks.
+    model.rng = np.random.default_rng(seed)
+    burning = model.burning
+    agents, orders = list(agents), [list(order) for order in orders]
+    ignited = 0
+    for t in range(1, budget + 1):
+        for k, pos in enumerate(agents):
+            order = orders[k]
+            while order and not burning[order[0]]:
+                order.pop(0)
+            if not order:
+                continue
+            agents[k] = pos = step_toward(pos, order[0], free)
+            if pos == order[0]:
+                model.extinguish(pos)
+        if (phase + t) % spread_interval == 0:
+            new = sorted(model.step())
+            for fire in new:
+                k = min(range(len(agents)), key=lambda k: (abs(fire[0] - agents[k][0]) + abs(fire[1] - agents[k][1]), -k))
+                orders[k].append(fire)
+            ignited += len(new)
+        if not burning.any():
+            return ignited, 0, t
+    return ignited, int(burning.sum()), budget
+
+
+def _fork(model):
+    # Copy of model a rollout can change; the spread tables are shared
+    fork = copy.copy(model)
+    fork.burning, fork.fuel = model.burning.copy(), model.fuel.copy()
+    return fork
+
+
+def _mean(results):
+    return tuple(sum(r[i] for r in results) / len(results) for i in range(3))
+
+
+def score(model, free, agents, orders, budget, spread_interval, phase, seeds):
+    # Mean (ignited, still burning, ticks) over one rollout per seed
+    return _mean([rollout(_fork(model), free, agents, orders, budget, spread_interval, phase, seed)
+                  for seed in seeds])
+
+
+# Worker processes get the model and free mask once, from the pool
+# initializer; each plan() call then sends only the fire state, pickled
+# once and unpacked once per worker
+_worker = {}
+
+
+def _install(model, free):
+    _worker.update(model=model, free=free, version=None)
+
+
+def _worker_rollout(version, state, agents, orders, budget, spread_interval, phase, seed):
+    model = _worker["model"]
+    if _worker["version"] != version:
+        model.burning, model.fuel, wind = pickle.loads(state)
+        if wind != model.wind:
+            model.set_wind(wind)
+        _worker["version"] = version
+    return rollout(_fork(model), _worker["free"], agents, orders, budget, spread_interval, phase, seed)
+
+
+class RolloutPlanner:
+    # Picks target orders for the agents by simulating the fire forward.
+    # Candidates are the current zones in nearest-first order plus, for each
+    # fire and agent, the plan where that agent handles that fire first.
+    # Each candidate is scored on the same `rollouts` seeds (so they face
+    # the same luck) over `budget` ticks, and the one that lets the fewest
+    # cells ignite wins, then the one that leaves the fewest burning, then
+    # the quickest. Single rollouts are spread over `workers` processes
+    # (0 scores them inline), never more queued than there are workers, so
+    # work left over when `deadline` passes is at most one rollout per
+    # worker; the candidates with every rollout finished by then are
+    # compared and the rest is dropped.
+    def __init__(self, workers=2, rollouts=8, budget=40, deadline=0.2, seed=0):
+        self.workers = workers
+        self.rollouts = rollouts
+        self.budget = budget
+        self.deadline = deadline
+        self.seed = seed
+        self.calls = 0
+        self.pool = None
+        self.running = set()  # rollouts from earlier calls still holding a worker
+        self.stats = {"candidates": 0, "scored": 0, "rollouts": 0, "runtime": 0.0}
+
+    def candidates(self, agents, zones):
+        plans = [[nearest_chain(pos, zone) for pos, zone in zip(agents, zones)]]
+        for fire in (f for zone in zones for f in zone):
+            rest = [[f for f in zone if f != fire] for zone in zones]
+            for k in range(len(agents)):
+                plan = [nearest_chain(pos, zone) for pos, zone in zip(agents, rest)]
+                plan[k] = [fire] + nearest_chain(fire, rest[k])
+                if plan not in plans:
+                    plans.append(plan)
+        return plans
+
+    def plan(self, model, free, agents, zones, spread_interval, phase=0):
+        # Best target order per agent; the nearest-first plan when nothing
+        # was scored in time
+        began = time.perf_counter()
+        plans = self.candidates(agents, zones)
+        self.calls += 1
+        seeds = [(self.seed, self.calls, i) for i in range(self.rollouts)]
+        rest = (self.budget, spread_interval, phase)
+        if self.workers:
+            results = self._pool_rollouts(model, free, agents, plans, rest, seeds, began)
+        else:
+            results = {}
+            for i, plan in enumerate(plans):
+                if results and time.perf_counter() - began > self.deadline:
+                    break
+                results[i] = [rollout(_fork(model), free, agents, plan, *rest, seed) for seed in seeds]
+        scores = {i: _mean(r) for i, r in results.items() if len(r) == len(seeds)}
+
+        stats = self.stats
+        stats["candidates"] += len(plans)
+        stats["scored"] += len(scores)
+        stats["rollouts"] += sum(len(r) for r in results.values())
+        stats["runtime"] += time.perf_counter() - began
+        if not scores:
+            return plans[0]
+        # Ties keep the earlier candidate, so the plain nearest-first plan
+        # stands unless a rollout shows something better
+        best = min(scores, key=lambda i: (scores[i], i))
+        return plans[best]
+
+    def _pool_rollouts(self, model, free, agents, plans, rest, seeds, began):
+        # Rollout results per candidate index, run one (candidate, seed) at a
+        # time with at most `workers` in flight, counting stale ones
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=_install, initargs=(model, free))
+        state = pickle.dumps((model.burning, model.fuel, model.wind))
+        tasks = iter([(i, seed) for i in range(len(plans)) for seed in seeds])
+        running = {future for future in self.running if not future.done()}
+        pending, results = {}, {}
+        exhausted = False
+        while True:
+            left = self.deadline - (time.perf_counter() - began)
+            if left <= 0:
+                break
+            while not exhausted and len(running) + len(pending) < self.workers:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                    break
+                i, seed = task
+                future = self.pool.submit(_worker_rollout, self.calls, state, agents, plans[i], *rest, seed)
+                pending[future] = i
+            if not pending:
+                break
+            done, _ = wait(running | set(pending), timeout=left, return_when=FIRST_COMPLETED)
+            running -= done
+            for future in done:
+                if future in pending:
+                    results.setdefault(pending.pop(future), []).append(future.result())
+        self.running = running | {future for future in pending if not future.cancel()}
+        return results
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+            self.running = set()
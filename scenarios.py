@@ -0,0 +1,56 @@
+import importlib.util
+import os
+
+import instruments
+from renderers import NullRenderer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (script, runner). Runners take the loaded module, a renderer and
+# scenario options, and return the finished system (or main()'s result).
+SCENARIOS = {
+    "cleaning": ("Cleaning Crew Coordination .py",
+                 lambda m, renderer, **kw: m.main(renderer=renderer, **kw)),
+    "path_planners": ("Cooperative Path Planners.py",
+                      lambda m, renderer, **kw: m.main(renderer=renderer, **kw)),
+    "maze": ("Dual Maze Navigators .py",
+             lambda m, renderer, **kw: _run(m.CooperativeMaze(m.MAZE_LAYOUT, renderer=renderer, **kw), "run_simulation")),
+    "rescue": ("Rescue Bot Squad.py",
+               lambda m, renderer, **kw: _run(m.RescueSystem(renderer=renderer, **kw))),
+    "warehouse": ("Warehouse Pickup Team.py",
+                  lambda m, renderer, **kw: _run(m.WarehouseSystem(renderer=renderer, **kw))),
+    "firefighters": ("cooperative firefighters.py",
+                     lambda m, renderer, **kw: _run(m.FirefightingSystem(renderer=renderer, **kw))),
+    "drones": ("dual drone deliver.py",
+               lambda m, renderer, **kw: _run(m.DeliverySystem(renderer=renderer, **kw))),
+    "painting": ("grid painting agents.py",
+                 lambda m, renderer, **kw: _run(m.GridPaintingSystem(renderer=renderer, **kw))),
+    "exploration": ("map exploration partners.py",
+                    lambda m, renderer, **kw: _run(m.MapExplorationSystem(renderer=renderer, **kw))),
+    "resources": ("resource sollection team.py",
+                  lambda m, renderer, **kw: _run(m.ResourceCollectionSystem(renderer=renderer, **kw))),
+}
+
+_modules = {}
+
+
+def _run(system, method="run"):
+    getattr(system, method)()
+    return system
+
+
+def load(name):
+    # The scripts have spaces in their file names, so import them by path
+    if name not in _modules:
+        script = SCENARIOS[name][0]
+        spec = importlib.util.spec_from_file_location("scenario_" + name, os.path.join(HERE, script))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[name] = module
+    return _modules[name]
+
+
+def run(name, renderer=None, **options):
+    # Headless by default: no frames are built, nothing prints or sleeps
+    with instruments.phase("run"):
+        return SCENARIOS[name][1](load(name), renderer or NullRenderer(), **options)
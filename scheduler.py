@@ -0,0 +1,186 @@
+from collections import deque
+
+from grid_search import bfs_tree, reconstruct_path
+from reservations import ReservationTable
+from spacetime import astar_time_aware
+
+# Task of a route that only clears the way for another agent; arrive() is
+# not called when it is used up
+ASIDE = "aside"
+
+
+class TickScheduler:
+    # Runs agents simultaneously: every tick each agent with a route advances
+    # one cell, so a run takes as long as its slowest agent rather than the
+    # sum of all of them. Moves are checked against each other every tick:
+    # two agents never enter the same cell or swap cells, and the later agent
+    # in the list waits instead. An agent stuck for `patience` ticks is
+    # replanned in space-time around the other agents' remaining routes, so
+    # it can pull aside and let them pass. If an idle or blocked agent on its
+    # route leaves it no way round, that agent is sent to the nearest cell
+    # off the route, with the stuck agent first backing out of the way when
+    # that is the only way out.
+    #
+    # plan(agent) returns (task, route) with the route excluding the agent's
+    # cell ([] when it is already there), or None when it has nothing to do.
+    # arrive(agent, task) runs when the route is used up, moved(agent) after
+    # each step and on_tick(tick) once the tick's moves are done.
+    def __init__(self, agents, grid, plan, arrive, moved=None, on_tick=None, patience=3, max_ticks=10000):
+        self.agents = list(agents)
+        self.grid = grid
+        self.plan, self.arrive = plan, arrive
+        self.moved, self.on_tick = moved, on_tick
+        self.patience = patience
+        self.max_ticks = max_ticks
+        self.routes = {}  # agent -> (task, deque of cells still to walk; a repeated cell is a wait)
+        self.waits = {}   # agent -> consecutive ticks spent blocked
+        self.tick = 0
+        self.stats = {"moves": 0, "waits": 0, "replans": 0}
+
+    def replan(self, agent):
+        # Drop the agent's route; plan() is asked again next tick. A route
+        # clearing the way for another agent is walked to the end first.
+        if self.routes.get(agent, (None,))[0] is not ASIDE:
+            self.routes.pop(agent, None)
+
+    def _assign(self):
+        for agent in self.agents:
+            if agent not in self.routes:
+                got = self.plan(agent)
+                if got:
+                    self.routes[agent] = (got[0], deque(got[1]))
+                    self.waits[agent] = 0
+            elif self.waits.get(agent, 0) >= self.patience:
+                task, route = self.routes[agent]
+                detour = self._plan_around(agent, route[-1])
+                if detour:
+                    self.routes[agent] = (task, deque(detour))
+                    self.stats["replans"] += 1
+                elif task is not ASIDE:
+                    self._clear_way(agent, route)
+                self.waits[agent] = 0
+
+    def _plan_around(self, agent, goal):
+        # Space-time route to goal that keeps off every other agent's
+        # remaining route. Agents without one stay parked where they are;
+        # blocked ones hold their cell for a while, as they will replan too,
+        # unless it is this agent in their way: they go on once it moves.
+        grid = self.grid
+        table = ReservationTable(len(grid), len(grid[0]))
+        for other in self.agents:
+            if other is agent:
+                continue
+            if other not in self.routes:
+                table.reserve_path(other, [other.pos], hold_time=None)
+            elif self.waits.get(other) and self.routes[other][1][0] != agent.pos:
+                table.reserve_path(other, [other.pos], hold_time=self.patience)
+            else:
+                table.reserve_path(other, [other.pos, *self.routes[other][1]], hold_time=None)
+        # Arrive only once nobody passes through the goal any more
+        spans = table.intervals.get(goal[0] * table.cols + goal[1], ())
+        if any(end == float('inf') for _, end, _ in spans):
+            return None
+        min_arrival = max((end for _, end, _ in spans), default=0)
+        path = astar_time_aware(agent.pos, goal, grid, table, max_time=len(grid) * len(grid[0]) + min_arrival,
+                                min_arrival=min_arrival, safe_intervals=True)
+        return path[1:] if path else None
+
+    def _clear_way(self, agent, route):
+        # Moves an idle or blocked agent on agent's route to the nearest cell
+        # off it. When that means passing agent (a dead end), agent first
+        # backs off to the nearest cell clear of the other's way out. Routes
+        # given up this way are planned again once the agents are clear.
+        keep_off = set(route) | {agent.pos}
+        for other in self.agents:
+            if other is agent or other.pos not in keep_off or (other in self.routes and not self.waits.get(other)):
+                continue
+            rest = [a.pos for a in self.agents if a is not other and a is not agent]
+            way = self._nearest_off(other.pos, keep_off, rest + [agent.pos])
+            if way is None:
+                way = self._nearest_off(other.pos, keep_off, rest)
+                back = way and self._nearest_off(agent.pos, set(way), rest + [other.pos])
+                if not back:
+                    continue
+                self.routes[agent] = (ASIDE, deque(back))
+            self.routes[other] = (ASIDE, deque(way))
+            self.waits[other] = 0
+            self.stats["replans"] += 1
+            return
+
+    def _nearest_off(self, start, avoid, blocked):
+        # Route (without start) to the nearest cell outside avoid, or None
+        cols = len(self.grid[0])
+        dist, parent = bfs_tree(self.grid, [start], blocked=blocked)
+        best = None
+        for cid, d in enumerate(dist):
+            if d > 0 and (best is None or d < dist[best]) and divmod(cid, cols) not in avoid:
+                best = cid
+        return reconstruct_path(parent, best, cols)[1:] if best is not None else None
+
+    def _resolve(self, proposals):
+        # Agents out of proposals (agent -> next cell) that must wait. Each
+        # collision stops one more mover, then the tick is checked again,
+        # since a waiting agent can block the cell someone else wanted.
+        waiting = set()
+        while True:
+            nxt = {a: proposals[a] if a in proposals and a not in waiting else a.pos for a in self.agents}
+            stop = None
+            owner = {}
+            for a in self.agents:
+                b = owner.get(nxt[a])
+                if b is None:
+                    owner[nxt[a]] = a
+                elif nxt[a] != a.pos:
+                    stop = a
+                    break
+                elif nxt[b] != b.pos:
+                    stop = b
+                    break
+            if stop is None:
+                here = {a.pos: a for a in self.agents}
+                for a in self.agents:
+                    b = here.get(nxt[a])
+                    if b is not None and b is not a and nxt[b] == a.pos:
+                        stop = a if self.agents.index(a) > self.agents.index(b) else b
+                        break
+            if stop is None:
+                return waiting
+            waiting.add(stop)
+
+    def step(self):
+        # One tick; False once no agent has anything left to do
+        self._assign()
+        if not self.routes:
+            return False
+        proposals = {a: route[0] for a, (task, route) in self.routes.items() if route and route[0] != a.pos}
+        waiting = self._resolve(proposals)
+        self.tick += 1
+        for agent in self.agents:
+            if agent not in self.routes:
+                continue
+            task, route = self.routes[agent]
+            if agent in waiting:
+                self.waits[agent] += 1
+                self.stats["waits"] += 1
+                continue
+            if route:
+                pos = route.popleft()
+                if pos != agent.pos:
+                    agent.pos = pos
+                    self.waits[agent] = 0
+                    self.stats["moves"] += 1
+                    if self.moved:
+                        self.moved(agent)
+            if not route:
+                self.routes.pop(agent, None)
+                if task is not ASIDE:
+                    self.arrive(agent, task)
+        if self.on_tick:
+            self.on_tick(self.tick)
+        return True
+
+    def run(self):
+        # Ticks until every agent is done; returns the makespan in ticks
+        while self.tick < self.max_ticks and self.step():
+            pass
+        return self.tick
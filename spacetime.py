@@ -0,0 +1,297 @@
+import heapq
+
+import instruments
+from grid_search import UNREACHED
+
+
+def heuristic(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def goal_heuristic(goal, distances=None):
+    # h(pos) towards goal. With a goal_cache.DistanceCache it is the true
+    # wall-aware distance from the goal's cached reverse-BFS table, shared by
+    # every replan for that goal, and None where the goal can't be reached;
+    # without one it is the Manhattan distance.
+    if distances is None:
+        return lambda pos: heuristic(pos, goal)
+    table, cols = distances.table(goal), distances.cols
+
+    def h(pos):
+        d = table[pos[0] * cols + pos[1]]
+        return None if d == UNREACHED else d
+    return h
+
+
+def astar_grid(start, goal, grid, distances=None):
+    R, C = len(grid), len(grid[0])
+    h = goal_heuristic(goal, distances)
+    open_heap = []
+    heapq.heappush(open_heap, (h(start) or 0, 0, start, None))
+    came_from = {}
+    gscore = {start: 0}
+
+    while open_heap:
+        f, g, pos, parent = heapq.heappop(open_heap)
+        if pos in came_from:
+            continue
+        came_from[pos] = parent
+
+        if pos == goal:
+            path = []
+            cur = pos
+            while cur is not None:
+                path.append(cur)
+                cur = came_from[cur]
+            if instruments.active:
+                instruments.active.search("astar_grid", len(came_from), len(gscore))
+            return list(reversed(path))
+
+        r, c = pos
+        for dr, dc in ((-1,0),(1,0),(0,-1),(0,1)):
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < R and 0 <= nc < C and grid[nr][nc] == 0:
+                ng = g + 1
+                neigh = (nr, nc)
+                hn = h(neigh)
+                if hn is not None and ng < gscore.get(neigh, 1e9):
+                    gscore[neigh] = ng
+                    heapq.heappush(open_heap, (ng + hn, ng, neigh, pos))
+    if instruments.active:
+        instruments.active.search("astar_grid", len(came_from), len(gscore))
+    return None
+
+
+def astar_time_aware(start, goal, grid, reservations, max_time=400, min_arrival=0, conflicts=None,
+                     safe_intervals=False, distances=None):
+    # Space-time A* around a reservation table (anything with blocked() and
+    # swap_blocked()). The goal only counts from min_arrival on, so a caller
+    # can keep the agent off it while others still pass. conflicts(pos, t),
+    # if given, scores soft collisions; among equally short paths the one
+    # with the fewest is returned. safe_intervals=True plans with sipp();
+    # distances (a DistanceCache) swaps Manhattan for true distances.
+    if safe_intervals:
+        return sipp(start, goal, grid, reservations, max_time, min_arrival, distances)
+    R, C = len(grid), len(grid[0])
+    h = goal_heuristic(goal, distances)
+    start_state = (start[0], start[1], 0)
+    open_heap = []
+    heapq.heappush(open_heap, (h(start) or 0, 0, 0, start_state, None))
+    came_from = {}
+    best = {start_state: (0, 0)}
+    blocked, swap_blocked = reservations.blocked, reservations.swap_blocked
+
+    while open_heap:
+        f, k, g, state, parent = heapq.heappop(open_heap)
+        if state in came_from:
+            continue
+        came_from[state] = parent
+        r, c, t = state
+
+        if (r, c) == goal and t >= min_arrival:
+            path = []
+            cur = state
+            while cur is not None:
+                path.append((cur[0], cur[1]))
+                cur = came_from[cur]
+            if instruments.active:
+                instruments.active.search("astar_time_aware", len(came_from), len(best))
+            return list(reversed(path))
+
+        if t + 1 > max_time:
+            continue
+
+        for dr, dc in ((-1,0),(1,0),(0,-1),(0,1),(0,0)):
+            nr, nc = r + dr, c + dc
+            nt = t + 1
+            if not (0 <= nr < R and 0 <= nc < C):
+                continue
+            if grid[nr][nc] == 1:
+                continue
+
+            # Waiting can't swap, so only moves need the edge check
+            if blocked((nr, nc), nt) or ((dr or dc) and swap_blocked((r, c), (nr, nc), nt)):
+                continue
+
+            hn = h((nr, nc))
+            if hn is None:
+                continue
+            next_state = (nr, nc, nt)
+            ng = g + 1
+            nk = k + conflicts((nr, nc), nt) if conflicts else 0
+            if (ng, nk) < best.get(next_state, (1e9, 0)):
+                best[next_state] = (ng, nk)
+                heapq.heappush(open_heap, (ng + hn, nk, ng, next_state, state))
+    if instruments.active:
+        instruments.active.search("astar_time_aware", len(came_from), len(best))
+    return None
+
+
+def focal_time_aware(start, goal, grid, reservations, w, max_time=400, min_arrival=0, conflicts=None,
+                     distances=None):
+    # Bounded-suboptimal astar_time_aware (focal search): any state whose f
+    # is within w times the smallest open f may be expanded, and the one with
+    # the fewest conflicts() so far goes first. Returns (path, lower bound on
+    # the optimal path length); the path is at most w times longer.
+    R, C = len(grid), len(grid[0])
+    h = goal_heuristic(goal, distances)
+    start_state = (start[0], start[1], 0)
+    f0 = h(start) or 0
+    waiting = {f0: [(0, 0, start_state, None)]}  # f -> entries not yet in focal
+    live = {f0: 1}                               # f -> entries not yet expanded
+    focal = []
+    fmin, bound = f0, -1
+    came_from = {}
+    best = {start_state: (0, 0)}
+    blocked, swap_blocked = reservations.blocked, reservations.swap_blocked
+
+    while live:
+        # Counts drop to 0 as entries are expanded; skip the emptied f values
+        while live and not live.get(fmin):
+            live.pop(fmin, None)
+            fmin = min(live) if live else fmin
+        if not live:
+            break
+        if fmin * w > bound:
+            for f in range(bound + 1, int(fmin * w) + 1):
+                for k, g, state, parent in waiting.pop(f, ()):
+                    heapq.heappush(focal, (k, f, -g, state, parent))
+            bound = int(fmin * w)
+        k, f, g, state, parent = heapq.heappop(focal)
+        g = -g
+        live[f] -= 1
+        if state in came_from:
+            continue
+        came_from[state] = parent
+        r, c, t = state
+
+        if (r, c) == goal and t >= min_arrival:
+            path = []
+            cur = state
+            while cur is not None:
+                path.append((cur[0], cur[1]))
+                cur = came_from[cur]
+            if instruments.active:
+                instruments.active.search("focal_time_aware", len(came_from), len(best))
+            return list(reversed(path)), fmin
+
+        if t + 1 > max_time:
+            continue
+
+        for dr, dc in ((-1,0),(1,0),(0,-1),(0,1),(0,0)):
+            nr, nc = r + dr, c + dc
+            nt = t + 1
+            if not (0 <= nr < R and 0 <= nc < C) or grid[nr][nc] == 1:
+                continue
+            if blocked((nr, nc), nt) or ((dr or dc) and swap_blocked((r, c), (nr, nc), nt)):
+                continue
+
+            hn = h((nr, nc))
+            if hn is None:
+                continue
+            next_state = (nr, nc, nt)
+            ng = g + 1
+            nk = k + conflicts((nr, nc), nt) if conflicts else 0
+            seen = best.get(next_state)
+            if seen and seen[0] <= ng and seen[1] <= nk:
+                continue
+            best[next_state] = (ng, nk)
+            nf = ng + hn
+            live[nf] = live.get(nf, 0) + 1
+            if nf <= bound:
+                heapq.heappush(focal, (nk, nf, -ng, next_state, state))
+            else:
+                waiting.setdefault(nf, []).append((nk, ng, next_state, state))
+    if instruments.active:
+        instruments.active.search("focal_time_aware", len(came_from), len(best))
+    return None, fmin
+
+
+def sipp(start, goal, grid, reservations, max_time=400, min_arrival=0, distances=None):
+    # Safe Interval Path Planning (Phillips & Likhachev): a state is a cell
+    # and one of its safe intervals (from reservations.safe_intervals()),
+    # reached at the earliest possible time, so waiting costs no states.
+    # Arrives as early as astar_time_aware and returns the same kind of
+    # per-timestep path.
+    R, C = len(grid), len(grid[0])
+    h = goal_heuristic(goal, distances)
+    intervals = {}
+    swap_blocked = reservations.swap_blocked
+
+    def safe(pos):
+        found = intervals.get(pos)
+        if found is None:
+            found = intervals[pos] = reservations.safe_intervals(pos, max_time + 1)
+        return found
+
+    # Like astar_time_aware, the agent may stand on its start at t=0 even if
+    # that cell is reserved then; it just has to leave or be safe at t=1
+    spans = safe(start)
+    if not spans or spans[0][0] > 0:
+        if spans and spans[0][0] == 1:
+            intervals[start] = [(0, spans[0][1])] + spans[1:]
+        else:
+            intervals[start] = [(0, 1)] + spans
+
+    start_state = (start, 0)
+    open_heap = [(h(start) or 0, 0, start_state, None)]
+    came_from = {}
+    arrival = {start_state: 0}
+
+    while open_heap:
+        f, t, state, parent = heapq.heappop(open_heap)
+        if state in came_from:
+            continue
+        came_from[state] = (parent, t)
+        pos, i = state
+        end = safe(pos)[i][1]
+
+        finish = max(t, min_arrival)
+        if pos == goal and finish < end and finish <= max_time:
+            if instruments.active:
+                instruments.active.search("sipp", len(came_from), len(arrival))
+            return _sipp_path(came_from, state, finish)
+
+        r, c = pos
+        for dr, dc in ((-1,0),(1,0),(0,-1),(0,1)):
+            nr, nc = r + dr, c + dc
+            if not (0 <= nr < R and 0 <= nc < C) or grid[nr][nc] == 1:
+                continue
+            nxt = (nr, nc)
+            hn = h(nxt)
+            if hn is None:
+                continue
+            for j, (lo, hi) in enumerate(safe(nxt)):
+                # Leave pos at some time in [t, end - 1], arrive one step later
+                arrive = max(t + 1, lo)
+                if arrive > end or arrive >= hi:
+                    if lo > end:
+                        break
+                    continue
+                while arrive <= end and arrive < hi and swap_blocked(pos, nxt, arrive):
+                    arrive += 1
+                if arrive > end or arrive >= hi or arrive > max_time:
+                    continue
+                key = (nxt, j)
+                if arrive < arrival.get(key, max_time + 1):
+                    arrival[key] = arrive
+                    heapq.heappush(open_heap, (arrive + hn, arrive, key, state))
+    if instruments.active:
+        instruments.active.search("sipp", len(came_from), len(arrival))
+    return None
+
+
+def _sipp_path(came_from, state, finish):
+    # Expand (cell, arrival time) hops into one cell per timestep, waiting
+    # on each cell until the next hop leaves it
+    hops = []
+    while state is not None:
+        parent, t = came_from[state]
+        hops.append((state[0], t))
+        state = parent
+    hops.reverse()
+    path = []
+    for (pos, t), (_, nt) in zip(hops, hops[1:]):
+        path.extend([pos] * (nt - t))
+    path.extend([hops[-1][0]] * (finish - hops[-1][1] + 1))
+    return path
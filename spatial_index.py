@@ -0,0 +1,73 @@
+from array import array
+from bisect import bisect_left
+
+
+class NearestCellIndex:
+    # Cells bucketed by row, each row a sorted array of columns for
+    # nearest() plus a byte per cell saying whether it is still in. Removing
+    # a cell only clears its byte; a row's array is compacted once more than
+    # half of it is removed cells, so removal is O(1) amortised and lookups
+    # step over at most as many removed cells as live ones. nearest() scans
+    # rows outward from the query and stops once the row distance alone
+    # exceeds the best Manhattan distance found, so a query costs a few
+    # bisects when something is close by instead of a pass over every cell.
+    def __init__(self, rows, cols, cells=()):
+        self.rows, self.cols = rows, cols
+        self.alive = [bytearray(cols) for _ in range(rows)]
+        for r, c in cells:
+            self.alive[r][c] = 1
+        self.row_cols = [array('i', (c for c in range(cols) if live[c])) for live in self.alive]
+        self.removed = [0] * rows
+        self.count = sum(len(cs) for cs in self.row_cols)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, pos):
+        r, c = pos
+        return 0 <= r < self.rows and 0 <= c < self.cols and self.alive[r][c] == 1
+
+    def discard(self, pos):
+        # True if the cell was in the index
+        if pos not in self:
+            return False
+        r, c = pos
+        live = self.alive[r]
+        live[c] = 0
+        self.count -= 1
+        self.removed[r] += 1
+        if 2 * self.removed[r] > len(self.row_cols[r]):
+            self.row_cols[r] = array('i', (c for c in self.row_cols[r] if live[c]))
+            self.removed[r] = 0
+        return True
+
+    def nearest(self, pos):
+        # Closest cell by Manhattan distance, ties to the first in row-major
+        # order (like min() over a row-major list), or None when empty
+        if not self.count:
+            return None
+        r0, c0 = pos
+        best = None  # (distance, row, col)
+        for dr in range(max(r0, self.rows - 1 - r0) + 1):
+            if best and dr > best[0]:
+                break
+            for r in (r0 - dr, r0 + dr) if dr else (r0,):
+                if not 0 <= r < self.rows:
+                    continue
+                cs = self.row_cols[r]
+                if not cs:
+                    continue
+                live = self.alive[r]
+                i = bisect_left(cs, c0)
+                left, right = i - 1, i
+                while left >= 0 and not live[cs[left]]:
+                    left -= 1
+                while right < len(cs) and not live[cs[right]]:
+                    right += 1
+                # Nearest column on the left first: it wins ties
+                for j in (left, right):
+                    if 0 <= j < len(cs):
+                        cand = (dr + abs(cs[j] - c0), r, cs[j])
+                        if best is None or cand < best:
+                            best = cand
+        return best[1], best[2]
@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assignment import NO_PATH, assign, assign_tasks, balanced
+
+
+def test_walled_off_agent_loses_no_reachable_task():
+    # Agent 2 is shut in the top-right corner; the victims along the bottom
+    # row are only reachable by agent 1
+    grid = [
+        [0, 0, 1, 0],
+        [0, 0, 1, 1],
+        [0, 0, 0, 0],
+        [0, 0, 0, 0],
+    ]
+    tasks = [(3, 0), (3, 1), (3, 2), (3, 3)]
+    groups = assign_tasks(grid, [(0, 0), (0, 3)], tasks, balanced(tasks, 2))
+    assert sorted(groups[0]) == sorted(tasks)
+    assert groups[1] == []
+
+
+def test_capacity_still_splits_reachable_tasks():
+    cost = [[1, 2, 3, 4], [4, 3, 2, 1]]
+    assert assign(cost, 2) == [[0, 1], [3, 2]]
+
+
+def test_unreachable_task_is_left_out():
+    cost = [[1, NO_PATH], [2, NO_PATH]]
+    groups = assign(cost, 1)
+    assert sorted(j for group in groups for j in group) == [0]
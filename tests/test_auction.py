@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auction import Auction
+
+
+def test_handed_back_task_goes_to_another_agent():
+    auction = Auction([(0, 1), (5, 5)])
+    auction.update_agent("a", (0, 0))
+    auction.update_agent("b", (0, 2))
+    assert auction.allocate(["a"]) == {"a": (0, 1)}
+    # a can't reach it after all
+    auction.add_task((0, 1), exclude=["a"])
+    auction.update_agent("a", (0, 0))
+    assert auction.allocate(["a", "b"]) == {"a": (5, 5), "b": (0, 1)}
+
+
+def test_task_no_agent_can_reach_stays_open():
+    auction = Auction([(0, 1)])
+    auction.update_agent("a", (0, 0))
+    assert auction.allocate(["a"]) == {"a": (0, 1)}
+    auction.add_task((0, 1), exclude=["a"])
+    assert auction.allocate(["a"]) == {}
+    assert (0, 1) in auction.open
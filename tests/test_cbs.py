@@ -0,0 +1,157 @@
+import heapq
+import itertools
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cbs import CBSSolver
+
+MOVES = ((0, 0), (0, 1), (1, 0), (0, -1), (-1, 0))
+
+# ECBS crashed here with an empty focal list
+CORRIDOR = [
+    [0, 1, 0, 0, 0],
+    [0, 0, 1, 0, 0],
+    [0, 1, 0, 0, 0],
+    [0, 0, 0, 0, 0],
+]
+
+
+def optimal_cost(grid, starts, goals):
+    # Brute-force sum of costs: Dijkstra over joint positions, with a flag
+    # per agent for "parked on its goal for good". Every agent not yet
+    # parked pays one per tick, which is what len(path) - 1 counts in CBS.
+    rows, cols = len(grid), len(grid[0])
+    n = len(starts)
+
+    def options(pos, done, goal):
+        if done:
+            return [(pos, True)]
+        found = []
+        for dr, dc in MOVES:
+            r, c = pos[0] + dr, pos[1] + dc
+            if 0 <= r < rows and 0 <= c < cols and grid[r][c] == 0:
+                found.append(((r, c), False))
+                if (r, c) == goal:
+                    found.append(((r, c), True))
+        return found
+
+    start = (tuple(starts), tuple(s == g for s, g in zip(starts, goals)))
+    # An agent starting on its goal may park at once; try both for each
+    firsts = {(tuple(starts), flags) for flags in itertools.product((False, True), repeat=n)
+              if all(not f or s == g for f, s, g in zip(flags, starts, goals))}
+    queue = [(0, state) for state in firsts | {start}]
+    seen = set()
+    while queue:
+        cost, (positions, done) = heapq.heappop(queue)
+        if (positions, done) in seen:
+            continue
+        seen.add((positions, done))
+        if all(done):
+            return cost
+        step = n - sum(done)
+        for moves in itertools.product(*(options(p, d, g) for p, d, g in zip(positions, done, goals))):
+            nxt = tuple(m[0] for m in moves)
+            if len(set(nxt)) < n:
+                continue
+            if any(nxt[a] == positions[b] and nxt[b] == positions[a]
+                   for a in range(n) for b in range(a + 1, n) if positions[a] != nxt[a]):
+                continue
+            state = (nxt, tuple(m[1] for m in moves))
+            if state not in seen:
+                heapq.heappush(queue, (cost + step, state))
+    return None
+
+
+def assert_valid(grid, starts, goals, paths):
+    # Paths start and end right, move one cell a tick through free cells,
+    # and no two agents share a cell or swap cells at any time
+    horizon = max(len(p) for p in paths)
+    at = lambda path, t: path[min(t, len(path) - 1)]
+    for path, start, goal in zip(paths, starts, goals):
+        assert path[0] == start and path[-1] == goal
+        for (r0, c0), (r1, c1) in zip(path, path[1:]):
+            assert abs(r1 - r0) + abs(c1 - c0) <= 1 and grid[r1][c1] == 0
+    for t in range(horizon):
+        cells = [at(p, t) for p in paths]
+        assert len(set(cells)) == len(cells), f"vertex conflict at t={t}"
+        if t:
+            for a, b in itertools.combinations(range(len(paths)), 2):
+                swapped = at(paths[a], t) == at(paths[b], t - 1) and at(paths[b], t) == at(paths[a], t - 1)
+                assert not swapped or at(paths[a], t) == at(paths[a], t - 1), f"swap at t={t}"
+
+
+def cost(paths):
+    return sum(len(p) - 1 for p in paths)
+
+
+def random_instance(rng, rows, cols, agents, density):
+    grid = [[1 if rng.random() < density else 0 for _ in range(cols)] for _ in range(rows)]
+    free = [(r, c) for r in range(rows) for c in range(cols) if grid[r][c] == 0]
+    if len(free) < agents:
+        return None
+    return grid, rng.sample(free, agents), rng.sample(free, agents)
+
+
+def test_cbs_is_optimal_on_tiny_instances():
+    rng = random.Random(1)
+    checked = 0
+    while checked < 25:
+        instance = random_instance(rng, 3, 4, 2, 0.2)
+        if instance is None:
+            continue
+        grid, starts, goals = instance
+        best = optimal_cost(grid, starts, goals)
+        paths = CBSSolver(grid).solve(starts, goals)
+        if best is None:
+            assert paths is None
+            continue
+        assert paths is not None
+        assert_valid(grid, starts, goals, paths)
+        assert cost(paths) == best
+        checked += 1
+
+
+def test_cbs_head_on_in_corridor_waits_in_the_bay():
+    grid = [
+        [0, 0, 0, 0],
+        [1, 0, 1, 1],
+    ]
+    starts, goals = [(0, 0), (0, 3)], [(0, 3), (0, 0)]
+    paths = CBSSolver(grid).solve(starts, goals)
+    assert_valid(grid, starts, goals, paths)
+    assert cost(paths) == optimal_cost(grid, starts, goals)
+
+
+def test_ecbs_regression_stays_within_bound():
+    starts, goals = [(3, 1), (2, 0), (2, 2)], [(1, 1), (3, 2), (0, 0)]
+    paths = CBSSolver(CORRIDOR).solve(starts, goals, w=1.5)
+    assert paths is not None
+    assert_valid(CORRIDOR, starts, goals, paths)
+    assert cost(paths) <= 1.5 * optimal_cost(CORRIDOR, starts, goals)
+
+
+def test_ecbs_stays_within_bound_on_random_instances():
+    rng = random.Random(2)
+    checked = 0
+    while checked < 15:
+        instance = random_instance(rng, 3, 4, 3, 0.15)
+        if instance is None:
+            continue
+        grid, starts, goals = instance
+        best = optimal_cost(grid, starts, goals)
+        if best is None:
+            continue
+        for w in (1.5, 2.0):
+            paths = CBSSolver(grid).solve(starts, goals, w=w)
+            assert paths is not None
+            assert_valid(grid, starts, goals, paths)
+            assert cost(paths) <= w * best
+        checked += 1
+
+
+def test_duplicate_goals_have_no_solution():
+    grid = [[0, 0, 0]]
+    assert CBSSolver(grid).solve([(0, 0), (0, 2)], [(0, 1), (0, 1)]) is None
@@ -0,0 +1,102 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import grid_search
+from reservations import ReservationTable
+from scheduler import TickScheduler
+
+
+class Agent:
+    def __init__(self, pos):
+        self.pos = pos
+
+
+def test_overlapping_holds_still_block():
+    table = ReservationTable(3, 3)
+    table.reserve_path("parked", [(1, 1)], hold_time=None)
+    table.reserve_path("pass", [(1, 0), (1, 1), (1, 2)], hold_time=0)
+    for t in (0, 1, 5, 100):
+        assert table.blocked((1, 1), t)
+        assert table.holder((1, 1), t) == "parked"
+    table.release("parked")
+    assert table.blocked((1, 1), 1) and table.holder((1, 1), 1) == "pass"
+    assert not table.blocked((1, 1), 0) and not table.blocked((1, 1), 2)
+    assert table.swap_blocked((1, 1), (1, 0), 1)
+
+
+def test_release_keeps_a_move_reserved_again_by_another_agent():
+    table = ReservationTable(1, 3)
+    table.reserve_path("a", [(0, 0), (0, 1)], hold_time=0)
+    table.reserve_path("b", [(0, 0), (0, 1)], hold_time=0)
+    table.release("a")
+    assert table.swap_blocked((0, 1), (0, 0), 1)
+    table.release("b")
+    assert not table.swap_blocked((0, 1), (0, 0), 1)
+    assert table.intervals == {}
+
+
+def run_to_goals(grid, starts, goals):
+    # Sends each agent to its goal under a TickScheduler and returns the
+    # agents' cells after every tick
+    agents = [Agent(s) for s in starts]
+    goal_of = dict(zip(agents, goals))
+    done = set()
+
+    def plan(agent):
+        if agent in done:
+            return None
+        _, path = grid_search.bfs(grid, agent.pos, [goal_of[agent]])
+        return "go", path[1:]
+
+    history = [list(starts)]
+    scheduler = TickScheduler(agents, grid, plan, lambda agent, task: done.add(agent),
+                              on_tick=lambda tick: history.append([a.pos for a in agents]), max_ticks=200)
+    scheduler.run()
+    return agents, history
+
+
+def assert_no_conflicts(history):
+    for before, after in zip(history, history[1:]):
+        assert len(set(after)) == len(after)
+        for a in range(len(after)):
+            for b in range(len(after)):
+                assert a == b or not (after[a] == before[b] and after[b] == before[a] and after[a] != before[a])
+
+
+def test_scheduler_passes_head_on_agents_through_a_bay():
+    grid = [
+        [0, 0, 0, 0, 0],
+        [1, 1, 0, 1, 1],
+    ]
+    agents, history = run_to_goals(grid, [(0, 0), (0, 4)], [(0, 4), (0, 0)])
+    assert [a.pos for a in agents] == [(0, 4), (0, 0)]
+    assert_no_conflicts(history)
+
+
+def test_scheduler_moves_an_idle_agent_off_the_route():
+    # Agent 2 is done in the corridor agent 1 has to go through
+    grid = [
+        [0, 0, 0, 0],
+        [1, 1, 0, 1],
+        [1, 1, 0, 0],
+    ]
+    agents, history = run_to_goals(grid, [(2, 3), (1, 2)], [(0, 0), (1, 2)])
+    assert agents[0].pos == (0, 0)
+    assert len(history) < 200
+    assert_no_conflicts(history)
+
+
+def test_scheduler_backs_off_to_let_an_idle_agent_out_of_a_dead_end():
+    # Agent 2 is done inside the pocket agent 1 has to reach the end of,
+    # and can only get out past agent 1
+    grid = [
+        [0, 0, 0],
+        [1, 0, 1],
+        [1, 0, 1],
+    ]
+    agents, history = run_to_goals(grid, [(0, 1), (1, 1)], [(2, 1), (1, 1)])
+    assert agents[0].pos == (2, 1)
+    assert len(history) < 200
+    assert_no_conflicts(history)
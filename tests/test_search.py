@@ -0,0 +1,73 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import grid_search
+from dstar_lite import DStarLite
+from jps import JumpPointSearch
+from reservations import ReservationTable
+from spacetime import astar_time_aware, sipp
+
+
+def random_grids(seed, count, rows=9, cols=11, density=0.25):
+    # (grid, start, goal) with start and goal on free cells
+    rng = random.Random(seed)
+    for _ in range(count):
+        grid = [[1 if rng.random() < density else 0 for _ in range(cols)] for _ in range(rows)]
+        free = [(r, c) for r in range(rows) for c in range(cols) if grid[r][c] == 0]
+        start, goal = rng.sample(free, 2)
+        yield grid, start, goal
+
+
+def bfs_length(grid, start, goal, blocked=()):
+    _, path = grid_search.bfs(grid, start, [goal], blocked=blocked)
+    return len(path) - 1 if path else None
+
+
+def test_jps_matches_bfs_lengths():
+    for grid, start, goal in random_grids(1, 200):
+        path = JumpPointSearch(grid).search(start, goal)
+        expected = bfs_length(grid, start, goal)
+        assert (len(path) if path else None) == expected
+        cells = [start] + path
+        for (r0, c0), (r1, c1) in zip(cells, cells[1:]):
+            assert abs(r1 - r0) + abs(c1 - c0) == 1 and grid[r1][c1] == 0
+
+
+def test_dstar_lite_matches_bfs_after_changes():
+    rng = random.Random(2)
+    for grid, start, goal in random_grids(2, 100):
+        planner = DStarLite(grid, start, [goal])
+        _, path = planner.plan()
+        assert (len(path) - 1 if path else None) == bfs_length(grid, start, goal)
+        # Close a few cells and step along the old path, as the scenarios do
+        free = [(r, c) for r in range(len(grid)) for c in range(len(grid[0]))
+                if grid[r][c] == 0 and (r, c) not in (start, goal)]
+        closed = rng.sample(free, 3)
+        if len(path) > 2 and path[1] not in closed:
+            start = path[1]
+            planner.move_start(start)
+        planner.set_cells(closed=closed)
+        _, path = planner.plan()
+        assert (len(path) - 1 if path else None) == bfs_length(grid, start, goal, blocked=closed)
+
+
+def test_sipp_arrives_as_early_as_time_aware_astar():
+    rng = random.Random(3)
+    for grid, start, goal in random_grids(3, 60, rows=7, cols=7, density=0.15):
+        table = ReservationTable(len(grid), len(grid[0]))
+        free = [(r, c) for r in range(len(grid)) for c in range(len(grid[0])) if grid[r][c] == 0]
+        for agent in range(3):
+            a, b = rng.sample([p for p in free if p not in (start, goal)], 2)
+            _, route = grid_search.bfs(grid, a, [b])
+            if route:
+                table.reserve_path(agent, route, hold_time=rng.choice([0, 3]))
+        expected = astar_time_aware(start, goal, grid, table, max_time=60)
+        path = sipp(start, goal, grid, table, max_time=60)
+        assert (len(path) if path else None) == (len(expected) if expected else None)
+        if path:
+            for t in range(1, len(path)):
+                assert not table.blocked(path[t], t)
+                assert not table.swap_blocked(path[t - 1], path[t], t)
@@ -0,0 +1,99 @@
+import numpy as np
+
+from grid_search import MOVES
+
+UNREACHED = -1
+
+
+def free_mask(grid, blocked=()):
+    # Boolean walkable mask from a list-of-lists or array grid; 1 is a wall
+    arr = np.asarray(grid)
+    if arr.dtype.kind in "biuf":
+        free = arr != 1
+    else:
+        free = np.array([[v != 1 for v in row] for row in grid], dtype=bool)
+    for r, c in blocked:
+        if 0 <= r < free.shape[0] and 0 <= c < free.shape[1]:
+            free[r, c] = False
+    return free
+
+
+def wave_distances(free, sources):
+    # BFS that expands the whole frontier per wave: neighbour ids come from
+    # vectorised index shifts, and the occupancy mask filters them in one go
+    rows, cols = free.shape
+    n = rows * cols
+    unseen = free.ravel().copy()
+    dist = np.full(n, UNREACHED, dtype=np.int32)
+    stamp = np.empty(n, dtype=np.int64)
+
+    frontier = np.unique(np.array([r * cols + c for r, c in sources], dtype=np.int64))
+    dist[frontier] = 0
+    unseen[frontier] = False
+    d = 0
+    while frontier.size:
+        d += 1
+        col = frontier % cols
+        grown = np.concatenate((frontier[col < cols - 1] + 1,
+                                frontier[col > 0] - 1,
+                                frontier[frontier < n - cols] + cols,
+                                frontier[frontier >= cols] - cols))
+        grown = grown[unseen[grown]]
+        # Drop duplicates without sorting: keep the last writer of each cell
+        order = np.arange(grown.size)
+        stamp[grown] = order
+        grown = grown[stamp[grown] == order]
+        unseen[grown] = False
+        dist[grown] = d
+        frontier = grown
+    return dist.reshape(rows, cols)
+
+
+def descend(dist, start, moves=MOVES):
+    # Walk downhill from start to a source; returns the cells visited
+    rows, cols = dist.shape
+    r, c = start
+    if dist[r, c] == UNREACHED:
+        return []
+    path = [(r, c)]
+    while dist[r, c] > 0:
+        d = dist[r, c]
+        for dr, dc in moves:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < rows and 0 <= nc < cols and dist[nr, nc] == d - 1:
+                r, c = nr, nc
+                break
+        path.append((r, c))
+    return path
+
+
+class Wavefront:
+    # Keeps the occupancy mask of a scenario grid so repeated floods skip the
+    # list-of-lists conversion. Call refresh() after walls change.
+    def __init__(self, grid):
+        self.grid = grid
+        self.refresh()
+
+    def refresh(self):
+        self.free = free_mask(self.grid)
+
+    def distances(self, sources, blocked=()):
+        free = self.free
+        if blocked:
+            free = free.copy()
+            for r, c in blocked:
+                free[r, c] = False
+        return wave_distances(free, sources)
+
+    def search(self, start, goals, blocked=()):
+        # Same contract as grid_search.bfs: nearest goal and a path including start
+        if not goals:
+            return None, []
+        dist = self.distances([start], blocked)
+        reachable = [g for g in goals if dist[g[0], g[1]] != UNREACHED]
+        if not reachable:
+            return None, []
+        goal = min(reachable, key=lambda g: dist[g[0], g[1]])
+        path = descend(dist, goal)
+        path.reverse()
+        return goal, path
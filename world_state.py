@@ -0,0 +1,113 @@
+from array import array
+
+import grid_search
+
+# Rough cost of one entry in a Python set of ints; a sparse layer becomes a
+# bitset once it would take more than one bit per cell
+SET_ENTRY_BYTES = 64
+
+
+class CellSet:
+    # Set of grid cells stored by flat cell id. Small layers are a set of
+    # ints; past cells / 512 members they switch to a packed bitset, so a
+    # layer costs min(~64 bytes per member, 1 bit per cell) and membership
+    # is O(1) either way. Iterates in row-major order.
+    __slots__ = ("rows", "cols", "ids", "bits", "count")
+
+    def __init__(self, rows, cols, cells=()):
+        self.rows, self.cols = rows, cols
+        self.ids = set()
+        self.bits = None
+        self.count = 0
+        for pos in cells:
+            self.add(pos)
+
+    def add(self, pos):
+        # True if the cell was not in the set yet
+        i = pos[0] * self.cols + pos[1]
+        bits = self.bits
+        if bits is None:
+            if i in self.ids:
+                return False
+            self.ids.add(i)
+            self.count += 1
+            if self.count * SET_ENTRY_BYTES * 8 > self.rows * self.cols:
+                self._to_bits()
+            return True
+        mask = 1 << (i & 7)
+        if bits[i >> 3] & mask:
+            return False
+        bits[i >> 3] |= mask
+        self.count += 1
+        return True
+
+    def update(self, cells):
+        if isinstance(cells, CellSet) and cells.bits is not None and cells.cols == self.cols:
+            if self.bits is None:
+                self._to_bits()
+            merged = int.from_bytes(self.bits, "little") | int.from_bytes(cells.bits, "little")
+            self.bits[:] = merged.to_bytes(len(self.bits), "little")
+            self.count = merged.bit_count()
+            return
+        for pos in cells:
+            self.add(pos)
+
+    def _to_bits(self):
+        bits = bytearray((self.rows * self.cols + 7) >> 3)
+        for i in self.ids:
+            bits[i >> 3] |= 1 << (i & 7)
+        self.bits, self.ids = bits, None
+
+    def __contains__(self, pos):
+        r, c = pos
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            return False
+        i = r * self.cols + c
+        if self.bits is None:
+            return i in self.ids
+        return self.bits[i >> 3] >> (i & 7) & 1 == 1
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        cols = self.cols
+        if self.bits is None:
+            for i in sorted(self.ids):
+                yield divmod(i, cols)
+            return
+        for byte, b in enumerate(self.bits):
+            while b:
+                low = b & -b
+                yield divmod((byte << 3) + low.bit_length() - 1, cols)
+                b ^= low
+
+
+class WorldState:
+    # Flat per-cell storage for a rows x cols world: passability as a
+    # bytearray (1 = walkable), the id of the agent owning each cell (0 =
+    # nobody) and CellSet layers for per-agent visits
+    __slots__ = ("rows", "cols", "passable", "owner")
+
+    def __init__(self, rows, cols, grid=None):
+        self.rows, self.cols = rows, cols
+        self.passable = grid_search.open_cells(grid) if grid is not None else bytearray(b"\x01") * (rows * cols)
+        self.owner = array('i', [0]) * (rows * cols)
+
+    def layer(self, cells=()):
+        return CellSet(self.rows, self.cols, cells)
+
+    def walkable(self, pos):
+        r, c = pos
+        return 0 <= r < self.rows and 0 <= c < self.cols and self.passable[r * self.cols + c] == 1
+
+    def owner_of(self, pos):
+        return self.owner[pos[0] * self.cols + pos[1]]
+
+    def claim(self, pos, agent_id):
+        # Give an unowned cell to agent_id; False if someone already owns it
+        i = pos[0] * self.cols + pos[1]
+        if self.owner[i]:
+            return False
+        self.owner[i] = agent_id
+        return True